@@ -0,0 +1,261 @@
+from typing import Optional, Tuple
+import numpy as np
+
+
+class EligibilityMatrix:
+    """
+    Boolean giver x receiver eligibility matrix over participant positions 0..n-1.
+
+    Almost every pair is eligible, so the matrix is stored as its complement: the forbidden
+    pairs in compressed sparse row form (indptr/indices) plus a sorted array of pair codes
+    (giver * n + receiver) for vectorized lookups. A dense n x n matrix would need 10 GB at
+    100k participants; this needs a few bytes per forbidden pair.
+    """
+
+    def __init__(self, n: int, givers: np.ndarray, receivers: np.ndarray):
+        """
+        Args:
+            n (int): Number of participants.
+            givers (np.ndarray): Giver position of each forbidden pair.
+            receivers (np.ndarray): Receiver position of each forbidden pair (same length as givers).
+        """
+        self.n = n
+
+        # Sorted, de-duplicated pair codes double as the CSR column order. Sort and drop repeats
+        # directly; np.unique is several times slower on the million-pair blocks of a large group
+        codes = np.sort(np.asarray(givers, dtype=np.int64) * n + np.asarray(receivers, dtype=np.int64))
+        self.codes = codes[np.concatenate(([True], codes[1:] != codes[:-1]))] if codes.size else codes
+        self.indices = self.codes % n if n else self.codes
+        self.indptr = np.searchsorted(self.codes, np.arange(n + 1, dtype=np.int64) * n)
+
+    def transpose(self) -> "EligibilityMatrix":
+        """The same rules seen from the receiver side."""
+        givers = self.codes // self.n if self.n else self.codes
+        return EligibilityMatrix(self.n, self.indices, givers)
+
+    def is_allowed(self, givers: np.ndarray, receivers: np.ndarray) -> np.ndarray:
+        """Vectorized lookup of whether each giver[i] may draw receiver[i]."""
+        queries = givers.astype(np.int64) * self.n + receivers
+        if not self.codes.size:
+            return np.ones(queries.size, dtype=bool)
+
+        found = np.minimum(np.searchsorted(self.codes, queries), self.codes.size - 1)
+        return self.codes[found] != queries
+
+    def forbidden_pairs(self, givers: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The forbidden pairs of the given rows, gathered from the CSR arrays without a Python loop.
+        Returns the index into givers and the receiver of each pair, ordered by that index.
+        """
+        starts = self.indptr[givers]
+        lengths = self.indptr[givers + 1] - starts
+
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        columns = self.indices[offsets + np.arange(lengths.sum())]
+        rows = np.repeat(np.arange(givers.size), lengths)
+
+        return rows, columns
+
+    def forbidden_counts(self, givers: np.ndarray) -> np.ndarray:
+        """For each receiver, the number of the given givers that may not draw them."""
+        _, columns = self.forbidden_pairs(givers)
+        return np.bincount(columns, minlength=self.n)
+
+    def first_allowed(self, givers: np.ndarray, receivers: np.ndarray) -> np.ndarray:
+        """
+        For each receiver, the index into givers of the first giver allowed to draw it
+        (givers.size when none is), in one pass over the givers' forbidden pairs.
+        """
+        rows, columns = self.forbidden_pairs(givers)
+        wanted = np.zeros(self.n, dtype=bool)
+        wanted[receivers] = True
+        keep = wanted[columns]
+
+        # Group the pairs by receiver, keeping each group's giver indices ascending
+        order = np.argsort(columns[keep], kind="stable")
+        rows, columns = rows[keep][order], columns[keep][order]
+        if not columns.size:
+            return np.zeros(receivers.size, dtype=np.int64)
+
+        group_starts = np.flatnonzero(np.concatenate(([True], columns[1:] != columns[:-1])))
+        group_sizes = np.diff(np.append(group_starts, columns.size))
+        rank = np.arange(columns.size) - np.repeat(group_starts, group_sizes)
+
+        # The forbidden indices of a group are distinct and ascending, so the first index
+        # missing from the group is the first position where the index runs ahead of its rank
+        first = np.zeros(self.n, dtype=np.int64)
+        first[columns[group_starts]] = group_sizes
+        gaps = rows != rank
+        gap_columns, gap_ranks = columns[gaps], rank[gaps]
+        first_gaps = np.concatenate(([True], gap_columns[1:] != gap_columns[:-1])) if gap_columns.size else gaps[:0]
+        first[gap_columns[first_gaps]] = gap_ranks[first_gaps]
+
+        return first[receivers]
+
+
+def random_perfect_matching(
+    matrix: EligibilityMatrix,
+    rng: np.random.Generator = None
+) -> Optional[np.ndarray]:
+    """
+    Samples a random giver -> receiver permutation that avoids every forbidden pair.
+
+    The engine starts from a uniformly random permutation, drops the pairs that break a rule
+    and repairs each of those givers with an augmenting path (Kuhn's algorithm). Each search
+    expands a whole layer of the complement graph at once with vectorized masks, costing
+    O(n) per layer plus O(forbidden pairs) per search, since each giver joins at most one frontier.
+
+    If no augmenting path exists for a giver, no perfect matching exists at all (Berge),
+    so infeasibility is proven without retrying.
+
+    Args:
+        matrix (EligibilityMatrix): The eligibility rules.
+        rng (np.random.Generator): Optional random source, for reproducible draws.
+
+    Returns:
+        Optional[np.ndarray]: receiver_of[g] for each giver position, or None if no valid permutation exists.
+    """
+    receiver_of, _ = _match(matrix, rng or np.random.default_rng(), stop_on_failure=True)
+    if (receiver_of < 0).any():
+        return None
+
+    return receiver_of
+
+
+def maximum_matching(matrix: EligibilityMatrix, rng: np.random.Generator = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Finds a maximum giver -> receiver matching that avoids every forbidden pair.
+
+    Args:
+        matrix (EligibilityMatrix): The eligibility rules.
+        rng (np.random.Generator): Optional random source, for reproducible draws.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: receiver_of[g] for each giver and giver_of[r] for each receiver,
+                                       with -1 for the positions left unmatched.
+    """
+    return _match(matrix, rng or np.random.default_rng(), stop_on_failure=False)
+
+
+def find_hall_violators(matrix: EligibilityMatrix, rng: np.random.Generator = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Finds the givers and receivers that make a perfect matching impossible.
+
+    By Hall's theorem a perfect matching is missing only if some set of givers can draw
+    from fewer receivers than there are givers in the set (or, symmetrically, some set of
+    receivers can only be drawn by too few givers). Starting from the positions left
+    unmatched by a maximum matching, the alternating paths reach exactly such a set.
+
+    Args:
+        matrix (EligibilityMatrix): The eligibility rules.
+        rng (np.random.Generator): Optional random source.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Sorted blocking giver positions and blocking receiver positions.
+                                       Both are empty when a perfect matching exists.
+    """
+    receiver_of, giver_of = maximum_matching(matrix, rng)
+
+    blocking_givers = _alternating_reach(np.flatnonzero(receiver_of < 0), matrix, giver_of)
+    blocking_receivers = _alternating_reach(np.flatnonzero(giver_of < 0), matrix.transpose(), receiver_of)
+
+    return blocking_givers, blocking_receivers
+
+
+def _match(matrix: EligibilityMatrix, rng: np.random.Generator, stop_on_failure: bool) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Starts from a uniformly random permutation and repairs the pairs that break a rule.
+    Returns as soon as one giver cannot be repaired when stop_on_failure is set.
+    """
+    givers = np.arange(matrix.n)
+
+    # Start from a uniformly random permutation and keep every pair that is allowed
+    permutation = rng.permutation(matrix.n)
+    allowed = matrix.is_allowed(givers, permutation)
+
+    receiver_of = np.where(allowed, permutation, -1)
+    giver_of = np.full(matrix.n, -1)
+    giver_of[permutation[allowed]] = givers[allowed]
+
+    # Repair each unmatched giver with an augmenting path
+    for giver in np.flatnonzero(~allowed):
+        if not _augment(giver, matrix, receiver_of, giver_of, rng) and stop_on_failure:
+            break
+
+    return receiver_of, giver_of
+
+
+def _augment(root: int, matrix: EligibilityMatrix, receiver_of: np.ndarray, giver_of: np.ndarray, rng) -> bool:
+    """
+    Breadth-first search for an augmenting path from an unmatched giver, applying it if found.
+
+    Each layer reaches every unvisited receiver that at least one frontier giver may draw,
+    found by counting how many frontier givers forbid each receiver, and picks each
+    receiver's parent from the same forbidden pairs. A layer costs O(n + forbidden pairs
+    of the frontier), independent of how many receivers it reaches.
+    """
+    visited = np.zeros(matrix.n, dtype=bool)
+    parent = np.full(matrix.n, -1)
+    frontier = np.array([root])
+
+    while frontier.size:
+        counts = matrix.forbidden_counts(frontier)
+        reached = np.flatnonzero(~visited & (counts < frontier.size))
+        if not reached.size:
+            return False
+        visited[reached] = True
+
+        # Receivers no frontier giver forbids can hang off any of them
+        open_receivers = counts[reached] == 0
+        parent[reached[open_receivers]] = rng.choice(frontier, size=open_receivers.sum())
+
+        # The rest need a frontier giver that is actually allowed to draw them
+        partial = reached[~open_receivers]
+        if partial.size:
+            parent[partial] = frontier[matrix.first_allowed(frontier, partial)]
+
+        # A free receiver ends the path; pick one at random to keep draws unbiased
+        free = reached[giver_of[reached] < 0]
+        if free.size:
+            _flip_path(rng.choice(free), parent, receiver_of, giver_of)
+            return True
+
+        # Otherwise continue from the givers currently holding the reached receivers
+        frontier = giver_of[reached]
+
+    return False
+
+
+def _flip_path(receiver: int, parent: np.ndarray, receiver_of: np.ndarray, giver_of: np.ndarray):
+    """Swap matched and unmatched edges along the path ending at a free receiver."""
+    while receiver >= 0:
+        giver = parent[receiver]
+        previous = receiver_of[giver]
+        receiver_of[giver] = receiver
+        giver_of[receiver] = giver
+        receiver = previous
+
+
+def _alternating_reach(sources: np.ndarray, matrix: EligibilityMatrix, mate_of: np.ndarray) -> np.ndarray:
+    """
+    Collects the sources plus every same-side position reachable from them by alternating paths.
+
+    From a source, any allowed position on the other side is reachable; in a maximum matching
+    those positions are all matched, and the walk continues from their mates.
+    """
+    reached = np.zeros(matrix.n, dtype=bool)
+    reached[sources] = True
+    visited = np.zeros(matrix.n, dtype=bool)
+    frontier = sources
+
+    while frontier.size:
+        counts = matrix.forbidden_counts(frontier)
+        other = np.flatnonzero(~visited & (counts < frontier.size))
+        visited[other] = True
+
+        mates = mate_of[other]
+        mates = mates[(mates >= 0) & ~reached[mates]]
+        reached[mates] = True
+        frontier = mates
+
+    return np.flatnonzero(reached)
@@ -1,12 +1,17 @@
 import os
 import uuid
+import asyncio
 import datetime
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 import jwt
 from jwt import ExpiredSignatureError, InvalidTokenError
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import ValidationError
 import logging
 
@@ -30,6 +35,26 @@ ACCESS_TOKEN_EXPIRE_MINUTES = int(os.environ.get('ACCESS_TOKEN_EXPIRE_MINUTES',
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# bcrypt takes 100-300 ms per call, so async handlers hash and verify on a dedicated, bounded
+# thread pool rather than on the event loop. bcrypt releases the GIL while hashing.
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 4))
+password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+
+# Password pool metrics
+_password_pool_lock = threading.Lock()
+_password_pool_stats = {"queue_depth": 0, "active": 0, "completed": 0}
+
+# Authenticated-user cache, keyed by token signature. Entries live for at most
+# USER_CACHE_TTL_SECONDS (and never past the token's own expiry), so profile changes
+# made in another worker process show up within that window.
+USER_CACHE_TTL_SECONDS = float(os.environ.get('USER_CACHE_TTL_SECONDS', 60))
+USER_CACHE_MAX_ENTRIES = int(os.environ.get('USER_CACHE_MAX_ENTRIES', 1024))
+_user_cache = OrderedDict()
+
+# Credentials are left out of the cached snapshot; if a request ever reads one, it loads from the database
+USER_CACHE_EXCLUDED_FIELDS = ("hashed_password", "reset_token", "reset_token_expiry")
+_user_cache_lock = threading.Lock()
+
 # Adding logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -45,6 +70,45 @@ def get_password_hash(password):
     return pwd_context.hash(password)
 
 
+def password_pool_stats():
+    """
+    Snapshot of the password hashing pool: configured workers, calls waiting for a worker,
+    calls currently hashing and calls completed since startup.
+    """
+    with _password_pool_lock:
+        return {"workers": PASSWORD_HASH_WORKERS, **_password_pool_stats}
+
+
+async def _run_in_password_pool(func, *args):
+    """Run a blocking hash function on the password pool and await the result."""
+
+    def tracked():
+        with _password_pool_lock:
+            _password_pool_stats["queue_depth"] -= 1
+            _password_pool_stats["active"] += 1
+        try:
+            return func(*args)
+        finally:
+            with _password_pool_lock:
+                _password_pool_stats["active"] -= 1
+                _password_pool_stats["completed"] += 1
+
+    with _password_pool_lock:
+        _password_pool_stats["queue_depth"] += 1
+
+    return await asyncio.get_running_loop().run_in_executor(password_executor, tracked)
+
+
+async def verify_password_async(plain_password, hashed_password):
+    """Verify a password against a hash without blocking the event loop."""
+    return await _run_in_password_pool(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password):
+    """Generate a hash from a password without blocking the event loop."""
+    return await _run_in_password_pool(get_password_hash, password)
+
+
 def create_reset_password_token():
     return str(uuid.uuid4())
 
@@ -62,6 +126,7 @@ def set_user_reset_state(db: Session, user: models.User, reset_token: str = None
 
     db.commit()
     db.refresh(user)
+    invalidate_cached_user(user.id)
 
     return user
 
@@ -105,6 +170,29 @@ def update_user_password(db: Session, user: models.User, new_password: str):
     # Commit changes to the database
     db.commit()
     db.refresh(user)
+    invalidate_cached_user(user.id)
+
+    return user
+
+
+async def update_user_password_async(db: Session, user: models.User, new_password: str):
+    """
+    Update the user's password, hashing it on the password pool.
+    Clears the reset token and expiry like update_user_password.
+    """
+
+    # Hash the new password off the event loop
+    hashed_password = await get_password_hash_async(new_password)
+
+    # Update user object
+    user.hashed_password = hashed_password
+    user.reset_token = None
+    user.reset_token_expiry = None
+
+    # Commit changes to the database
+    db.commit()
+    db.refresh(user)
+    invalidate_cached_user(user.id)
 
     return user
 
@@ -131,6 +219,28 @@ def authenticate_user(db: Session, username: str, password: str):
     return user
 
 
+async def authenticate_user_async(db: Session, username: str, password: str):
+    """Authenticate a user by username and password, verifying the hash on the password pool."""
+
+    # Query for this username in the users table
+    user = db.query(models.User).filter(models.User.username == username).first()
+
+    # If User is not found in the table, return boolean False
+    if not user:
+        logger.warning(f"Authentication failed for user: {username}. User not found.")
+        return False
+
+    # Check the password off the event loop
+    password_verified = await verify_password_async(password, user.hashed_password)
+
+    # If the password entered does not match, return boolean False
+    if not password_verified:
+        logger.warning(f"Authentication failed for user: {username}. Incorrect password.")
+        return False
+
+    return user
+
+
 def create_access_token(data: dict, expires_delta: datetime.timedelta = None):
     """
     Create a new access token.
@@ -161,8 +271,67 @@ def create_access_token(data: dict, expires_delta: datetime.timedelta = None):
     return encoded_jwt
 
 
+def _token_signature(token: str):
+    """The signature segment of a JWT, which uniquely identifies a verified token."""
+    return token.rsplit(".", 1)[-1] if token else None
+
+
+def _get_cached_user(db: Session, signature: str):
+    """
+    Return the cached user for a token signature attached to this session, or None.
+    The snapshot is merged without loading, so a cache hit issues no query.
+    """
+    with _user_cache_lock:
+        entry = _user_cache.get(signature)
+        if entry is None:
+            return None
+
+        expires_at, snapshot = entry
+        if expires_at <= datetime.datetime.now(datetime.timezone.utc).timestamp():
+            del _user_cache[signature]
+            return None
+
+        _user_cache.move_to_end(signature)
+
+    return db.merge(snapshot, load=False)
+
+
+def _cache_user(signature: str, user: models.User, token_expiry: float):
+    """Store a detached copy of the user's columns, other than the credentials, under the token signature."""
+    snapshot = models.User(**{
+        column.key: getattr(user, column.key)
+        for column in models.User.__table__.columns
+        if column.key not in USER_CACHE_EXCLUDED_FIELDS
+    })
+    make_transient_to_detached(snapshot)
+
+    expires_at = min(datetime.datetime.now(datetime.timezone.utc).timestamp() + USER_CACHE_TTL_SECONDS, token_expiry)
+
+    with _user_cache_lock:
+        _user_cache[signature] = (expires_at, snapshot)
+        _user_cache.move_to_end(signature)
+        while len(_user_cache) > USER_CACHE_MAX_ENTRIES:
+            _user_cache.popitem(last=False)
+
+
+def invalidate_cached_user(user_id: int):
+    """Drop every cached entry for a user. Call after changing the user's profile or password."""
+    with _user_cache_lock:
+        for signature in [signature for signature, (_, snapshot) in _user_cache.items() if snapshot.id == user_id]:
+            del _user_cache[signature]
+
+
 def get_current_user(db: Session = Depends(database.get_db), token: str = Depends(oauth2_scheme)):
-    """Get the current user from the provided token."""
+    """
+    Get the current user from the provided token.
+    Users are cached by token signature, so repeat requests skip the JWT decode and user query.
+    """
+
+    # A token seen recently was already verified; reuse its user
+    signature = _token_signature(token)
+    cached_user = _get_cached_user(db, signature) if signature else None
+    if cached_user is not None:
+        return cached_user
 
     # Design exception in case of invalid credentials
     credentials_exception = HTTPException(
@@ -194,9 +363,41 @@ def get_current_user(db: Session = Depends(database.get_db), token: str = Depend
     # Query for this username in the users table
     user = db.query(models.User).filter(models.User.username == username).first()
 
+    if user:
+        _cache_user(signature, user, payload.get("exp", 0))
+
     return user
 
 
+def get_request_user(request: Request, db: Session, token: str):
+    """
+    Get the current user once per request.
+    The result is kept on request.state, so repeated lookups within a request are free.
+    """
+    if not hasattr(request.state, "current_user"):
+        request.state.current_user = get_current_user(db, token)
+
+    return request.state.current_user
+
+
+async def get_current_user_async(db: AsyncSession, token: str):
+    """
+    Get the current user from the provided token on an async session.
+    Shares the user cache with get_current_user; a cache hit issues no query.
+    """
+    return await db.run_sync(get_current_user, token)
+
+
+async def get_request_user_async(request: Request, db: AsyncSession, token: str):
+    """
+    Get the current user once per request, on an async session.
+    """
+    if not hasattr(request.state, "current_user"):
+        request.state.current_user = await get_current_user_async(db, token)
+
+    return request.state.current_user
+
+
 def get_user_for_reset(db: Session = Depends(database.get_db), token: str = Depends(oauth2_scheme)):
     """Get the current user from the provided token."""
 
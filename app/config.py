@@ -1,16 +1,40 @@
+import os
+import time
 import datetime
+import threading
+from typing import Optional
+from types import MappingProxyType
+from fastapi import Depends
+from sqlalchemy import func
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql import null
 
-from . import models
+from . import models, database
 
 
+# Default number of previous years whose pairings may not be repeated
+DEFAULT_ASSIGNMENT_HISTORY_YEARS = "1"
+
+# The active config is cached per process as an immutable snapshot. The snapshot is
+# trusted without any query for CONFIG_VERSION_CHECK_SECONDS; after that, one read of
+# the config_version row tells whether another process has changed the config.
+CONFIG_VERSION_CHECK_SECONDS = float(os.environ.get("CONFIG_VERSION_CHECK_SECONDS", 5))
+_config_cache = {"version": None, "snapshot": None, "checked_at": 0.0}
+_config_cache_lock = threading.Lock()
+
+# Active assignment year, valid for as long as the config version it was resolved under
+_active_year_cache = {"version": None, "year": None}
+
 def initialize_config(db: Session):
     """
     If the config table is missing certain values, initialize those
     """
     initialize_assignment_year(db)
     initialize_allow_registration(db)
+    initialize_assignment_history_years(db)
+    initialize_config_version(db)
+    invalidate_config_cache()
 
 
 def initialize_assignment_year(db: Session):
@@ -48,9 +72,98 @@ def initialize_allow_registration(db: Session):
         db.commit()
 
 
+def initialize_assignment_history_years(db: Session):
+    """
+    If the config is missing assignment_history_years, initialize it to only exclude last year's pairings
+    """
+
+    # Check if 'assignment_history_years' exists in the config
+    history_years_config = db.query(models.Config).filter(models.Config.key == 'assignment_history_years').first()
+
+    if not history_years_config:
+
+        # Add 'assignment_history_years' to the config
+        now = datetime.datetime.utcnow()
+        new_config = models.Config(
+            key='assignment_history_years', value=DEFAULT_ASSIGNMENT_HISTORY_YEARS, start_time=now, end_time=None
+        )
+        db.add(new_config)
+        db.commit()
+
+
+def initialize_config_version(db: Session):
+    """
+    If the config version row is missing, initialize it at version 0
+    """
+    if not db.query(models.ConfigVersion).filter(models.ConfigVersion.id == 1).first():
+        db.add(models.ConfigVersion(id=1, version=0))
+        db.commit()
+
+
+def get_config_version(db: Session) -> int:
+    """
+    Reads the current config version, a single-row primary key lookup.
+    """
+    return db.query(models.ConfigVersion.version).filter(models.ConfigVersion.id == 1).scalar() or 0
+
+
+def bump_config_version(db: Session):
+    """
+    Marks every process's cached config as stale. Joins the caller's transaction; the caller commits.
+    """
+    updated = db.query(models.ConfigVersion).filter(models.ConfigVersion.id == 1).update(
+        {models.ConfigVersion.version: models.ConfigVersion.version + 1}, synchronize_session=False
+    )
+    if not updated:
+        db.add(models.ConfigVersion(id=1, version=1))
+
+
+def invalidate_config_cache():
+    """
+    Drops this process's cached config so the next read reloads it.
+    """
+    with _config_cache_lock:
+        _config_cache.update(version=None, snapshot=None, checked_at=0.0)
+        _active_year_cache.update(version=None, year=None)
+
+
 def get_config(db: Session):
     """
-    Retrieves the active config as a dictionary of key-value pairs.
+    Retrieves the active config as an immutable mapping of key-value pairs.
+    Served from the process cache; see CONFIG_VERSION_CHECK_SECONDS.
+    """
+    now = time.monotonic()
+
+    with _config_cache_lock:
+        snapshot = _config_cache["snapshot"]
+        cached_version = _config_cache["version"]
+        fresh = now - _config_cache["checked_at"] < CONFIG_VERSION_CHECK_SECONDS
+
+    # Recently checked: no query at all
+    if snapshot is not None and fresh:
+        return snapshot
+
+    # Otherwise a cheap version check decides whether to reload
+    version = get_config_version(db)
+    if snapshot is None or version != cached_version:
+        snapshot = MappingProxyType(load_config(db))
+
+    with _config_cache_lock:
+        _config_cache.update(version=version, snapshot=snapshot, checked_at=now)
+
+    return snapshot
+
+
+async def get_config_async(db: AsyncSession):
+    """
+    Async counterpart of get_config, sharing its cache. A cache hit issues no query.
+    """
+    return await db.run_sync(get_config)
+
+
+def load_config(db: Session):
+    """
+    Retrieves the active config from the database as a dictionary of key-value pairs.
     """
     config_dict = {}
 
@@ -71,6 +184,55 @@ def get_config(db: Session):
     return config_dict
 
 
+def get_active_assignment_year(db: Session) -> Optional[int]:
+    """
+    Resolves the active assignment year: the assignment_year config value, or else the
+    latest year in the assignments table. Cached until the config version changes, so
+    the max() scan over assignments does not run on page views.
+    """
+    config_dict = get_config(db)
+
+    with _config_cache_lock:
+        version = _config_cache["version"]
+        if version is not None and _active_year_cache["version"] == version:
+            return _active_year_cache["year"]
+
+    assignment_year = config_dict.get('assignment_year')
+    if assignment_year:
+        assignment_year = int(assignment_year)
+    else:
+        assignment_year = db.query(func.max(models.Assignment.year)).scalar()
+
+    with _config_cache_lock:
+        _active_year_cache.update(version=version, year=assignment_year)
+
+    return assignment_year
+
+
+def active_assignment_year(db: Session = Depends(database.get_db)) -> Optional[int]:
+    """Dependency that provides the active assignment year to a route."""
+    return get_active_assignment_year(db)
+
+
+async def get_active_assignment_year_async(db: AsyncSession) -> Optional[int]:
+    """Async counterpart of get_active_assignment_year, sharing its cache."""
+    return await db.run_sync(get_active_assignment_year)
+
+
+async def active_assignment_year_async(db: AsyncSession = Depends(database.get_async_db)) -> Optional[int]:
+    """Dependency that provides the active assignment year to an async route."""
+    return await get_active_assignment_year_async(db)
+
+
+def invalidate_active_assignment_year(db: Session):
+    """
+    Marks the active year stale in every process, e.g. after new assignments are written.
+    """
+    bump_config_version(db)
+    db.commit()
+    invalidate_config_cache()
+
+
 def set_config(db: Session, key: str, value: str):
     """
     Sets a new config value, expiring the old one.
@@ -93,5 +255,9 @@ def set_config(db: Session, key: str, value: str):
     new_setting = models.Config(key=key, value=value, start_time=now, end_time=None)
     db.add(new_setting)
 
+    # Let every process know its cached config is stale
+    bump_config_version(db)
+
     db.commit()
+    invalidate_config_cache()
     return True
@@ -0,0 +1,130 @@
+from typing import Dict, Optional
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import User, Assignment, Tip
+
+
+# Dashboard cache, keyed by (user ID, year). Tip and assignment writes in this process
+# invalidate entries directly; the TTL bounds how stale a write from another worker can be.
+DASHBOARD_CACHE_TTL_SECONDS = float(os.environ.get("DASHBOARD_CACHE_TTL_SECONDS", 30))
+DASHBOARD_CACHE_MAX_ENTRIES = int(os.environ.get("DASHBOARD_CACHE_MAX_ENTRIES", 4096))
+_dashboard_cache = OrderedDict()
+_dashboard_cache_lock = threading.Lock()
+
+# The recipient fields the home page renders (plus the ID, for tip invalidation). Only these
+# are cached, so no password hash or reset token sits in process memory
+DASHBOARD_USER_FIELDS = ("id", "first_name", "last_name")
+
+# Adding logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _tips_given_query(user_id: int, year: int):
+    """Number of tips the user has written this year."""
+    return select(func.count(Tip.id)).filter(
+        Tip.contributor_user_id == user_id,
+        Tip.year == year
+    ).scalar_subquery()
+
+
+def dashboard_query(user_id: int, year: int):
+    """
+    The user's assigned recipient together with both tip counts, as one statement.
+    The tips-for-snake count is correlated with the assignment row, so no separate
+    assignment lookup is needed. Returns no row when the user has no assignment.
+    """
+    tips_for_snake = select(func.count(Tip.id)).filter(
+        Tip.subject_user_id == Assignment.assigned_user_id,
+        Tip.year == Assignment.year
+    ).scalar_subquery()
+
+    return select(
+        *(getattr(User, field) for field in DASHBOARD_USER_FIELDS),
+        tips_for_snake.label("tips_for_snake"),
+        _tips_given_query(user_id, year).label("tips_given")
+    ).select_from(Assignment).join(
+        User, User.id == Assignment.assigned_user_id
+    ).filter(
+        Assignment.assignee_user_id == user_id,
+        Assignment.year == year
+    )
+
+
+async def load_dashboard(db: AsyncSession, user_id: int, year: int) -> Dict:
+    """
+    Load the home page dashboard for a user: one round trip, or two for a user without an assignment.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+        user_id (int): The current user's ID.
+        year (int): The active assignment year.
+
+    Returns:
+        Dict: assigned_user (a dict of the recipient's DASHBOARD_USER_FIELDS, or None), tips_for_snake and tips_given.
+    """
+    row = (await db.execute(dashboard_query(user_id, year))).first()
+
+    if row is None:
+        tips_given = (await db.execute(select(_tips_given_query(user_id, year)))).scalar()
+        return {"assigned_user": None, "tips_for_snake": 0, "tips_given": tips_given or 0}
+
+    mapping = row._mapping
+    return {
+        "assigned_user": {field: mapping[field] for field in DASHBOARD_USER_FIELDS},
+        "tips_for_snake": mapping["tips_for_snake"] or 0,
+        "tips_given": mapping["tips_given"] or 0,
+    }
+
+
+async def get_dashboard(db: AsyncSession, user_id: int, year: int) -> Dict:
+    """
+    The home page dashboard for a user, served from the cache when fresh.
+    """
+    key = (user_id, year)
+    now = time.monotonic()
+
+    with _dashboard_cache_lock:
+        entry = _dashboard_cache.get(key)
+        if entry is not None and entry[0] > now:
+            _dashboard_cache.move_to_end(key)
+            return entry[1]
+
+    dashboard = await load_dashboard(db, user_id, year)
+
+    with _dashboard_cache_lock:
+        _dashboard_cache[key] = (now + DASHBOARD_CACHE_TTL_SECONDS, dashboard)
+        _dashboard_cache.move_to_end(key)
+        while len(_dashboard_cache) > DASHBOARD_CACHE_MAX_ENTRIES:
+            _dashboard_cache.popitem(last=False)
+
+    return dashboard
+
+
+def invalidate_dashboards_for_tip(contributor_user_id: int, subject_user_id: int, year: Optional[int]):
+    """
+    Drop the dashboards a tip appears on: its contributor's (tips given) and
+    the dashboard of whoever is assigned to its subject (tips for snake).
+    """
+    with _dashboard_cache_lock:
+        stale = [
+            key for key, (_, dashboard) in _dashboard_cache.items()
+            if key[1] == year and (
+                key[0] == contributor_user_id
+                or (dashboard["assigned_user"] or {}).get("id") == subject_user_id
+            )
+        ]
+        for key in stale:
+            del _dashboard_cache[key]
+
+
+def invalidate_dashboard_cache():
+    """Drop every cached dashboard, e.g. after new assignments are drawn."""
+    with _dashboard_cache_lock:
+        _dashboard_cache.clear()
@@ -1,8 +1,13 @@
+from typing import Dict
 import os
 import logging
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.models import Base
+from app import migrations
 
 
 logging.basicConfig(level=logging.INFO)
@@ -10,22 +15,151 @@ logger = logging.getLogger(__name__)
 
 SQLITE_DATABASE_FILEPATH = os.environ.get("SQLITE_DATABASE_FILEPATH", "./database.db")
 SQLALCHEMY_DATABASE_URL = f"sqlite:///{SQLITE_DATABASE_FILEPATH}"
+SQLALCHEMY_ASYNC_DATABASE_URL = f"sqlite+aiosqlite:///{SQLITE_DATABASE_FILEPATH}"
 logger.info(f"Using database URL: {SQLALCHEMY_DATABASE_URL}")
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+# Pragmas applied to every new SQLite connection, by profile.
+# "production": WAL lets readers run alongside a writer, NORMAL sync is durable across
+#               app crashes in WAL mode, and writers wait on the lock instead of failing.
+# "legacy": SQLite defaults (rollback journal, no busy wait), for comparison.
+SQLITE_PRAGMA_PROFILES = {
+    "production": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": "5000",
+        "mmap_size": str(256 * 1024 * 1024),
+        "cache_size": "-64000",
+        "temp_store": "MEMORY",
+    },
+    "legacy": {},
+}
+SQLITE_PRAGMA_PROFILE = os.environ.get("SQLITE_PRAGMA_PROFILE", "production")
+
+# Per-pragma overrides on top of the profile, e.g. SQLITE_PRAGMAS="busy_timeout=10000,mmap_size=0"
+SQLITE_PRAGMAS = os.environ.get("SQLITE_PRAGMAS", "")
+
+# Connections are kept open and reused; each one holds its own page cache and mmap
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 8))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 16))
+DB_POOL_TIMEOUT_SECONDS = float(os.environ.get("DB_POOL_TIMEOUT_SECONDS", 30))
+
+
+def sqlite_pragmas(profile: str = SQLITE_PRAGMA_PROFILE, overrides: str = SQLITE_PRAGMAS) -> Dict[str, str]:
+    """
+    Resolve the pragmas for a profile plus comma-separated name=value overrides.
+    """
+    if profile not in SQLITE_PRAGMA_PROFILES:
+        raise ValueError(f"Unknown SQLite pragma profile: {profile}")
+
+    pragmas = dict(SQLITE_PRAGMA_PROFILES[profile])
+    for override in filter(None, (item.strip() for item in overrides.split(","))):
+        name, _, value = override.partition("=")
+        pragmas[name.strip()] = value.strip()
+
+    return pragmas
+
+
+def apply_sqlite_pragmas(engine: Engine, pragmas: Dict[str, str]):
+    """
+    Run the given pragmas on every new connection the engine opens.
+    """
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def _engine_options(pragmas: Dict[str, str], pool_size: int, max_overflow: int) -> Dict:
+    """Connection and pool arguments shared by the sync and async engines."""
+
+    # The driver-level timeout matches busy_timeout so both layers wait for the lock
+    connect_args = {"check_same_thread": False}
+    if "busy_timeout" in pragmas:
+        connect_args["timeout"] = int(pragmas["busy_timeout"]) / 1000
+
+    return {
+        "connect_args": connect_args,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": DB_POOL_TIMEOUT_SECONDS
+    }
+
+
+def create_sqlite_engine(
+        database_url: str,
+        pragmas: Dict[str, str],
+        pool_size: int = DB_POOL_SIZE,
+        max_overflow: int = DB_MAX_OVERFLOW
+) -> Engine:
+    """
+    Create a SQLite engine with a connection pool and the given pragmas.
+
+    Args:
+        database_url (str): SQLite database URL.
+        pragmas (Dict[str, str]): Pragmas to apply to every new connection.
+        pool_size (int): Connections kept open in the pool.
+        max_overflow (int): Extra connections allowed under load.
+
+    Returns:
+        Engine: The configured engine.
+    """
+    engine = create_engine(
+        database_url,
+        poolclass=QueuePool,
+        **_engine_options(pragmas, pool_size, max_overflow)
+    )
+    apply_sqlite_pragmas(engine, pragmas)
+
+    return engine
+
+
+def create_async_sqlite_engine(
+        database_url: str,
+        pragmas: Dict[str, str],
+        pool_size: int = DB_POOL_SIZE,
+        max_overflow: int = DB_MAX_OVERFLOW
+) -> AsyncEngine:
+    """
+    Create an aiosqlite engine for async handlers, configured like create_sqlite_engine.
+    Queries run on aiosqlite's connection threads, so awaiting them does not block the event loop.
+    """
+    engine = create_async_engine(
+        database_url,
+        poolclass=AsyncAdaptedQueuePool,
+        **_engine_options(pragmas, pool_size, max_overflow)
+    )
+    apply_sqlite_pragmas(engine.sync_engine, pragmas)
+
+    return engine
+
+
+engine = create_sqlite_engine(SQLALCHEMY_DATABASE_URL, sqlite_pragmas())
 SessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False,
     bind=engine
 )
 
+# Async path for the async route handlers; the sync path above remains for scripts and sync routes
+async_engine = create_async_sqlite_engine(SQLALCHEMY_ASYNC_DATABASE_URL, sqlite_pragmas())
+AsyncSessionLocal = sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 
 def init_db():
     """
-    If no database exists, create all tables in the database.
+    If no database exists, create all tables in the database, then apply any
+    pending migrations to bring an existing database up to date.
     """
     logger.info("Checking for and creating any missing database tables.")
     Base.metadata.create_all(bind=engine)
+    migrations.run_migrations(engine)
     logger.info("Database initialization complete.")
 
 
@@ -35,3 +169,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
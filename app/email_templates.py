@@ -0,0 +1,137 @@
+from typing import Dict, Iterable, List
+import os
+import re
+import logging
+from jinja2 import Environment, FileSystemLoader
+
+
+EMAIL_TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates", "emails")
+EMAIL_STYLESHEET = "email.css"
+
+# Every email body; each extends base.html and is compiled up front by create_environment
+EMAIL_TEMPLATES = [
+    "username_recovery.html",
+    "password_reset.html",
+    "assignment.html",
+    "tip.html",
+    "assignment_note.html",
+]
+
+# Adding logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+_css_comment = re.compile(r"/\*.*?\*/", re.S)
+_css_rule = re.compile(r"([^{}]+)\{([^}]*)\}")
+_html_tag = re.compile(r"<([a-zA-Z][a-zA-Z0-9]*)((?:\s[^<>]*?)?)(/?)>")
+_class_attribute = re.compile(r'\s+class="([^"]*)"')
+_style_attribute = re.compile(r'\s+style="([^"]*)"')
+
+
+def parse_stylesheet(css: str) -> Dict[str, str]:
+    """
+    Parse a flat stylesheet into {selector: declarations}. Only bare tag and single class
+    selectors are supported, which is all an email needs once the styles are inlined.
+    """
+    rules = {}
+    for selectors, declarations in _css_rule.findall(_css_comment.sub("", css)):
+        declarations = " ".join(declarations.split()).rstrip(";").strip()
+        for selector in selectors.split(","):
+            selector = selector.strip()
+            if not re.fullmatch(r"\.?[a-zA-Z][\w-]*", selector):
+                raise ValueError(f"Unsupported email CSS selector: {selector!r}")
+            rules[selector] = f"{rules[selector]}; {declarations}" if selector in rules else declarations
+    return rules
+
+
+def inline_styles(source: str, rules: Dict[str, str]) -> str:
+    """
+    Move stylesheet rules onto the elements they match as style attributes, tag rules
+    first, then class rules in class order, then any style the element already had.
+    Class attributes are dropped once inlined.
+    """
+
+    def inline(match):
+        tag, attributes, self_closing = match.groups()
+
+        styles = []
+        if tag.lower() in rules:
+            styles.append(rules[tag.lower()])
+
+        class_match = _class_attribute.search(attributes)
+        if class_match:
+            for name in class_match.group(1).split():
+                if f".{name}" not in rules:
+                    raise ValueError(f"Email template uses undefined CSS class: {name!r}")
+                styles.append(rules[f".{name}"])
+            attributes = _class_attribute.sub("", attributes, count=1)
+
+        if not styles:
+            return match.group(0)
+
+        style_match = _style_attribute.search(attributes)
+        if style_match:
+            styles.append(style_match.group(1).strip().rstrip(";"))
+            attributes = _style_attribute.sub("", attributes, count=1)
+
+        return f'<{tag}{attributes} style="{"; ".join(styles)};"{self_closing}>'
+
+    return _html_tag.sub(inline, source)
+
+
+class InliningLoader(FileSystemLoader):
+    """
+    Loads email templates with the shared stylesheet already inlined, so the CSS is
+    applied once at compile time rather than on every render.
+    """
+
+    def __init__(self, searchpath: str, stylesheet: str = EMAIL_STYLESHEET):
+        super().__init__(searchpath)
+        with open(os.path.join(searchpath, stylesheet), encoding="utf-8") as css_file:
+            self.rules = parse_stylesheet(css_file.read())
+
+    def get_source(self, environment, template):
+        source, filename, uptodate = super().get_source(environment, template)
+        return inline_styles(source, self.rules), filename, uptodate
+
+
+def create_environment(base_url: str, template_dir: str = EMAIL_TEMPLATE_DIR) -> Environment:
+    """
+    Build the email template environment and compile every email template up front.
+
+    Args:
+        base_url (str): Site URL, available to every template as base_url.
+        template_dir (str): Directory holding the templates and the stylesheet.
+
+    Returns:
+        Environment: The environment, with its template cache already filled.
+    """
+    environment = Environment(
+        loader=InliningLoader(template_dir),
+        autoescape=True,
+        auto_reload=False,
+        cache_size=-1,
+    )
+    environment.globals["base_url"] = base_url
+
+    for name in EMAIL_TEMPLATES:
+        environment.get_template(name)
+
+    return environment
+
+
+def render_batch(environment: Environment, template_name: str, contexts: Iterable[Dict]) -> List[str]:
+    """
+    Render one compiled template once per context.
+
+    Args:
+        environment (Environment): Environment from create_environment.
+        template_name (str): One of EMAIL_TEMPLATES.
+        contexts (Iterable[Dict]): Template variables for each message.
+
+    Returns:
+        List[str]: The rendered HTML bodies, in order.
+    """
+    template = environment.get_template(template_name)
+    return [template.render(context) for context in contexts]
@@ -1,8 +1,17 @@
 import os
+import json
+import time
 import datetime
 import logging
+import threading
+from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
+from markupsafe import escape
+
+from app import email_templates, metrics
 
 
 ENV = os.environ.get("ENVIRONMENT", "dev")
@@ -10,20 +19,89 @@ SES_SENDER_EMAIL = os.environ.get("SES_SENDER_EMAIL", "no-reply@secretsnakes.com
 AWS_REGION = os.environ.get("AWS_REGION", "us-east-2")
 BASE_URL = os.environ.get("BASE_URL", "http://localhost:8000")
 
-PRIMARY_COLOR_THREE = "#3d523d"
-ACCENT_COLOR_TWO = "#4682B4"
+# Point the SES client at a local stub (e.g. moto_server or LocalStack) for offline testing,
+# or set SES_BACKEND to "fake" to use the in-process fake in app/fake_ses.py
+SES_ENDPOINT_URL = os.environ.get("SES_ENDPOINT_URL")
+SES_BACKEND = os.environ.get("SES_BACKEND", "aws")
+
+# Bulk sending limits. SES_MAX_SEND_RATE should match the account's SES sending quota (messages/second)
+EMAIL_MAX_WORKERS = int(os.environ.get("EMAIL_MAX_WORKERS", 8))
+SES_MAX_SEND_RATE = float(os.environ.get("SES_MAX_SEND_RATE", 14))
+
+# Send assignment announcements through a stored SES template with SendBulkTemplatedEmail,
+# up to SES_BULK_BATCH_SIZE destinations per call (SES allows at most 50)
+SES_BULK_TEMPLATED = os.environ.get("SES_BULK_TEMPLATED", "false").lower() in ("1", "true", "yes")
+SES_BULK_BATCH_SIZE = min(int(os.environ.get("SES_BULK_BATCH_SIZE", 50)), 50)
+SES_ASSIGNMENT_TEMPLATE_NAME = os.environ.get("SES_ASSIGNMENT_TEMPLATE_NAME", f"secret-snakes-assignment-{ENV}")
 
 # Adding logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+# Email bodies are Jinja2 templates in templates/emails, compiled with the stylesheet
+# inlined when this module is imported, then rendered per message
+_email_environment = email_templates.create_environment(base_url=BASE_URL)
+
+
+def render_emails(template_name: str, contexts: List[Dict]) -> List[str]:
+    """Render a batch of email bodies from one compiled template (see email_templates.render_batch)."""
+    return email_templates.render_batch(_email_environment, template_name, contexts)
+
+
+# Shared SES client. boto3 clients are thread-safe, so one client and its
+# connection pool serve every send instead of building a client per message.
+_ses_client = None
+_ses_client_lock = threading.Lock()
+
+
+def get_ses_client():
+    """Return the process-wide SES client, creating it on first use."""
+    global _ses_client
+
+    if _ses_client is None:
+        with _ses_client_lock:
+            if _ses_client is None and SES_BACKEND == "fake":
+                from app.fake_ses import FakeSES
+                _ses_client = FakeSES()
+            elif _ses_client is None:
+                _ses_client = boto3.client(
+                    'ses',
+                    region_name=AWS_REGION,
+                    endpoint_url=SES_ENDPOINT_URL,
+                    config=Config(max_pool_connections=max(EMAIL_MAX_WORKERS, 10))
+                )
+
+    return _ses_client
+
+
+class RateLimiter:
+    """
+    Thread-safe limiter that spaces calls evenly to stay under a rate (calls per second).
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.next_slot = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, count: int = 1):
+        """Block until the caller may make the next call, which counts as count calls against the rate."""
+        with self.lock:
+            now = time.monotonic()
+            slot = max(self.next_slot, now)
+            self.next_slot = slot + self.interval * count
+        if slot > now:
+            time.sleep(slot - now)
+
+
 def send_email(to_email, subject, html_body, logger_info="Email sent successfully"):
     """Generic function to send an email using AWS SES.
     """
 
+    started = time.perf_counter()
     try:
-        ses = boto3.client('ses', region_name=AWS_REGION)
+        ses = get_ses_client()
         response = ses.send_email(
             Source=SES_SENDER_EMAIL,
             Destination={'ToAddresses': [to_email]},
@@ -41,6 +119,7 @@ def send_email(to_email, subject, html_body, logger_info="Email sent successfull
             }
         )
         logger.info(logger_info + f"! Message ID: {response['MessageId']}")
+        metrics.email_sends_total.inc(path="single", outcome="sent")
         return response['MessageId']
 
     except ClientError as e:
@@ -49,228 +128,336 @@ def send_email(to_email, subject, html_body, logger_info="Email sent successfull
         logger.warning(f"Failed to send email. Error Code: {error_code}, Message: {error_message}")
         if error_code == 'MessageRejected':
             logger.warning("Common reasons for rejection: Recipient not verified (if in SES Sandbox), sender not verified, or content issues.")
+        metrics.email_sends_total.inc(path="single", outcome="failed")
         return None
 
     except Exception as e:
         logger.warning(f"An unexpected error occurred while sending email: {e}")
+        metrics.email_sends_total.inc(path="single", outcome="failed")
         return None
 
+    finally:
+        metrics.email_send_duration_seconds.observe(time.perf_counter() - started, path="single")
 
-def send_username_recovery_email(to_email: str, username: str):
+
+def send_bulk_emails(
+    messages: List[Dict],
+    max_workers: int = EMAIL_MAX_WORKERS,
+    max_send_rate: float = SES_MAX_SEND_RATE
+) -> List[Dict]:
     """
-    Sends an email to the user with their forgotten username.
+    Send many emails through the shared SES client with bounded concurrency.
+
+    Args:
+        messages (List[Dict]): Messages with to_email, subject and html_body keys.
+        max_workers (int): Maximum number of sends in flight at once.
+        max_send_rate (float): Maximum sends per second across all workers (0 for no limit).
+
+    Returns:
+        List[Dict]: One result per message, in order, with to_email, status ("sent" or "failed")
+                    and the SES message_id when sent.
     """
-    subject = "Secret Snakes Username Recovery"
+    rate_limiter = RateLimiter(max_send_rate)
+
+    def send_one(message):
+        rate_limiter.acquire()
+        message_id = send_email(
+            message["to_email"],
+            message["subject"],
+            message["html_body"],
+            logger_info=f"Email sent successfully to {message['to_email']}"
+        )
+        return {
+            "to_email": message["to_email"],
+            "status": "sent" if message_id else "failed",
+            "message_id": message_id,
+        }
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        results = list(executor.map(send_one, messages))
+
+    sent = sum(1 for result in results if result["status"] == "sent")
+    logger.info(f"Bulk email dispatch complete: {sent} sent, {len(results) - sent} failed.")
+
+    return results
+
 
-    html_body = f"""
-    <html>
-    <head>
-        <style>
-            body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-            .container {{ max-width: 600px; margin: 0 auto; padding: 20px; border: 1px solid #ddd; border-radius: 8px; background-color: #f9f9f9; }}
-            .header {{ background-color: {PRIMARY_COLOR_THREE}; color: #ffffff; padding: 10px 20px; border-radius: 8px 8px 0 0; text-align: center; }}
-            .content {{ padding: 20px; }}
-            .footer {{ text-align: center; margin-top: 30px; font-size: 0.8em; color: #777; }}
-            .username-box {{ background-color: #ffffff; border: 1px solid #eee; padding: 15px; margin-top: 20px; text-align: center; font-size: 1.2em; font-weight: bold; border-radius: 5px; }}
-            .button {{ display: inline-block; padding: 10px 20px; margin-top: 20px; background-color: {ACCENT_COLOR_TWO}; text-color: #ffffff; text-decoration: none; border-radius: 5px; text-align: center; }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <h2>🐍 Secret Snakes Username Recovery 🐍</h2>
-            </div>
-            <div class="content">
-                <p>You recently requested your username for the Secret Snakes application. Your username is:</p>
-                <div class="username-box">
-                    {username}
-                </div>
-                <p>You can now use this username to log in.</p>
-                
-                <a href="{BASE_URL}/home" 
-                style="
-                        display: inline-block;
-                        padding: 10px 20px;
-                        margin-top: 20px;
-                        background-color: {ACCENT_COLOR_TWO};
-                        color: #ffffff;
-                        text-decoration: none;
-                        border-radius: 5px;
-                        -webkit-text-size-adjust: none;   /* Email client compatibility for text sizing */
-                        mso-hide: all;                    /* Email client compatibility for text sizing */
-                        ">
-                    Log In Here
-                </a>
-
-                <p>If you did not request this, please ignore this email.</p>
-            </div>
-            <div class="footer">
-                <p>Thanks to you, Snakesmas just got a little more shitty</p>
-            </div>
-        </div>
-    </body>
-    </html>
+# Stored templates this process has already registered, by name and content
+_registered_templates = set()
+_registered_templates_lock = threading.Lock()
+
+
+def register_template(template_name: str, subject_part: str, html_part: str) -> bool:
+    """
+    Store an SES template, creating it or updating it in place. Each distinct template
+    is only sent to SES once per process.
+
+    Returns:
+        bool: Whether the template is registered.
+    """
+    key = (template_name, subject_part, html_part)
+    with _registered_templates_lock:
+        if key in _registered_templates:
+            return True
+
+    template = {"TemplateName": template_name, "SubjectPart": subject_part, "HtmlPart": html_part}
+
+    try:
+        ses = get_ses_client()
+        try:
+            ses.create_template(Template=template)
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'AlreadyExists':
+                raise
+            ses.update_template(Template=template)
+
+    except ClientError as e:
+        logger.warning(f"Failed to register SES template {template_name}. Error Code: {e.response['Error']['Code']}, Message: {e.response['Error']['Message']}")
+        return False
+
+    except Exception as e:
+        logger.warning(f"An unexpected error occurred while registering SES template {template_name}: {e}")
+        return False
+
+    with _registered_templates_lock:
+        _registered_templates.add(key)
+    logger.info(f"Registered SES template {template_name}.")
+
+    return True
+
+
+def send_bulk_templated_emails(
+    template_name: str,
+    destinations: List[Dict],
+    default_data: Dict,
+    batch_size: int = SES_BULK_BATCH_SIZE,
+    max_send_rate: float = SES_MAX_SEND_RATE
+) -> List[Dict]:
+    """
+    Send a stored SES template to many recipients with SendBulkTemplatedEmail, batch_size per call.
+
+    Args:
+        template_name (str): A template registered with register_template.
+        destinations (List[Dict]): One dict per recipient with to_email and data, the
+                                   recipient's replacement values.
+        default_data (Dict): Replacement values shared by every recipient.
+        batch_size (int): Destinations per API call, at most 50.
+        max_send_rate (float): Maximum messages per second (0 for no limit). A batch counts
+                               as one message per destination.
+
+    Returns:
+        List[Dict]: One result per destination, in order, with to_email, status ("sent" or "failed")
+                    and the SES message_id when sent, the same shape as send_bulk_emails.
     """
+    batch_size = max(1, min(batch_size, 50))
+    rate_limiter = RateLimiter(max_send_rate)
+    ses = get_ses_client()
+
+    results = []
+    for start in range(0, len(destinations), batch_size):
+        batch = destinations[start:start + batch_size]
+        rate_limiter.acquire(len(batch))
+
+        started = time.perf_counter()
+        try:
+            response = ses.send_bulk_templated_email(
+                Source=SES_SENDER_EMAIL,
+                Template=template_name,
+                DefaultTemplateData=json.dumps(default_data),
+                Destinations=[
+                    {
+                        'Destination': {'ToAddresses': [destination["to_email"]]},
+                        'ReplacementTemplateData': json.dumps(destination["data"]),
+                    }
+                    for destination in batch
+                ]
+            )
+            statuses = response['Status']
+
+        except ClientError as e:
+            logger.warning(f"Failed to send templated batch. Error Code: {e.response['Error']['Code']}, Message: {e.response['Error']['Message']}")
+            statuses = [{'Status': e.response['Error']['Code']}] * len(batch)
+
+        except Exception as e:
+            logger.warning(f"An unexpected error occurred while sending templated batch: {e}")
+            statuses = [{'Status': 'Failed'}] * len(batch)
+
+        metrics.email_send_duration_seconds.observe(time.perf_counter() - started, path="templated")
+
+        for destination, status in zip(batch, statuses):
+            sent = status.get('Status') == 'Success'
+            metrics.email_sends_total.inc(path="templated", outcome="sent" if sent else "failed")
+            if not sent:
+                logger.warning(f"Templated email to {destination['to_email']} failed: {status.get('Status')} {status.get('Error', '')}")
+            results.append({
+                "to_email": destination["to_email"],
+                "status": "sent" if sent else "failed",
+                "message_id": status.get('MessageId') if sent else None,
+            })
+
+    sent = sum(1 for result in results if result["status"] == "sent")
+    logger.info(f"Bulk templated dispatch complete: {sent} sent, {len(results) - sent} failed in {-(-len(destinations) // batch_size)} calls.")
+
+    return results
+
+
+def build_username_recovery_email(to_email: str, username: str):
+    """
+    Builds the email that gives the user their forgotten username.
+    """
+    subject = "Secret Snakes Username Recovery"
+    html_body, = render_emails("username_recovery.html", [{"username": username}])
+
+    return {"to_email": to_email, "subject": subject, "html_body": html_body}
 
+
+def send_username_recovery_email(to_email: str, username: str):
+    """
+    Sends an email to the user with their forgotten username.
+    """
+    message = build_username_recovery_email(to_email, username)
     logger_info = f"Username recovery email sent successfully to {to_email}!"
 
-    send_email(to_email, subject, html_body, logger_info=logger_info) 
+    send_email(message["to_email"], message["subject"], message["html_body"], logger_info=logger_info)
 
 
-def send_password_reset_email(to_email: str, reset_token: str):
+def build_password_reset_email(to_email: str, reset_token: str):
     """
-    Sends an email to the user with a link to reset their password.
+    Builds the email with a link for the user to reset their password.
     """
     subject = "Secret Snakes Password Reset"
-    reset_link = f"{BASE_URL}/reset-password?token={reset_token}"
-
-    html_body = f"""
-    <html>
-    <head>
-        <style>
-            body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-            .container {{ max-width: 600px; margin: 0 auto; padding: 20px; border: 1px solid #ddd; border-radius: 8px; background-color: #f9f9f9; }}
-            .header {{ background-color: {PRIMARY_COLOR_THREE}; color: #ffffff; padding: 10px 20px; border-radius: 8px 8px 0 0; text-align: center; }}
-            .content {{ padding: 20px; }}
-            .footer {{ text-align: center; margin-top: 30px; font-size: 0.8em; color: #777; }}
-            .button {{ display: inline-block; padding: 10px 20px; margin-top: 20px; background-color: {ACCENT_COLOR_TWO}; color: white; text-decoration: none; text-color: white; border-radius: 5px; }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <h2>🐍 Secret Snakes Password Reset 🐍</h2>
-            </div>
-            <div class="content">
-                <p>You recently requested to reset your password.  Please click the link below to reset your password:</p>
-                <a href="{reset_link}" 
-                    style="
-                        display: inline-block;
-                        padding: 10px 20px;
-                        margin-top: 20px;
-                        background-color: {ACCENT_COLOR_TWO};
-                        color: #ffffff;
-                        text-decoration: none;
-                        border-radius: 5px;
-                        -webkit-text-size-adjust: none;   /* Email client compatibility for text sizing */
-                        mso-hide: all;                    /* Email client compatibility for text sizing */
-                        ">
-                    Reset Your Password
-                </a>
-                <p>This link will expire in one hour.  If you did not request a password reset, you can ignore this email.</p>
-            </div>
-            <div class="footer">
-                <p>Thanks to you, Snakesmas just got a little more shitty</p>
-            </div>
-        </div>
-    </body>
-    </html>
-    """
+    html_body, = render_emails("password_reset.html", [{"reset_token": reset_token}])
 
+    return {"to_email": to_email, "subject": subject, "html_body": html_body}
+
+
+def send_password_reset_email(to_email: str, reset_token: str):
+    """
+    Sends an email to the user with a link to reset their password.
+    """
+    message = build_password_reset_email(to_email, reset_token)
     logger_info = f"Password reset email sent successfully to {to_email}!"
 
-    send_email(to_email, subject, html_body, logger_info=logger_info) 
+    send_email(message["to_email"], message["subject"], message["html_body"], logger_info=logger_info)
 
 
-def send_assignment_email(to_email, assigned_username, shipping_info, subject="Your Secret Snakes Assignment"):
-    """Send an email with assignment details to the specified recipient."""
+def build_assignment_emails(recipients: List[Dict], subject="Your Secret Snakes Assignment") -> List[Dict]:
+    """
+    Build assignment emails for a whole draw at once, all rendered from the one compiled template.
+
+    Args:
+        recipients (List[Dict]): One dict per message with to_email, assigned_username and
+                                 shipping_info (first_name, last_name, street_address, unit,
+                                 city, zipcode and state).
+        subject (str): Subject line shared by every message.
+
+    Returns:
+        List[Dict]: Messages ready for send_bulk_emails, in recipient order.
+    """
 
     # Append [DEV] to the subject if in development environment
     if ENV == "dev":
         subject = f"[DEV] {subject}"
 
-    # Construct the HTML body
-    html_body = f"""
-    <html>
-    <head>
-        <style>
-            body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-            .container {{ max-width: 600px; margin: 0 auto; padding: 20px; border: 1px solid #ddd; border-radius: 8px; background-color: #f9f9f9; }}
-            .header {{ background-color: {PRIMARY_COLOR_THREE}; color: #ffffff; padding: 10px 20px; border-radius: 8px 8px 0 0; text-align: center; }}
-            .content {{ padding: 20px; }}
-            .shipping-box {{ background-color: #ffffff; border: 1px dashed #ccc; padding: 15px; margin-top: 20px; border-radius: 5px; }}
-            .shipping-box p {{ margin: 5px 0; }}
-            .footer {{ text-align: center; margin-top: 30px; font-size: 0.8em; color: #777; }}
-            .button {{ display: inline-block; padding: 10px 20px; margin-top: 20px; background-color: {ACCENT_COLOR_TWO}; color: white; text-decoration: none; text-color: white; border-radius: 5px; }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <h2>🐍 Your Secret Snakes Assignment! 🎁</h2>
-            </div>
-            <div class="content">
-                <p>The moment you've been waiting for is here! You've been assigned your recipient for the annual Secret Snakes gift exchange.</p>
-                <p>This year, you are the Secret Snake for:</p>
-                <h3>{assigned_username}</h3>
-                
-                <p>Here is their shipping information:</p>
-                <div class="shipping-box">
-                    <p><strong>{shipping_info.get('first_name', '')} {shipping_info.get('last_name', '')}</strong></p>
-                    <p>{shipping_info.get('street_address', '')}</p>
-                    <p>{shipping_info.get('unit', '')}</p>
-                    <p>{shipping_info.get('city', '')}, {shipping_info.get('state', '')} {shipping_info.get('zipcode', '')}</p>
-                </div>
-                
-                <p>When needed, you can check the website in case they've updated their shipping address.</p>
-                
-                <a href="https://secretsnakes.com/assignment" class="button">View My Assignment Online</a>
-            </div>
-            <div class="footer">
-                <p>Remember to keep Snakesmas shitty!</p>
-            </div>
-        </div>
-    </body>
-    </html>
+    html_bodies = render_emails("assignment.html", recipients)
+
+    return [
+        {"to_email": recipient["to_email"], "subject": subject, "html_body": html_body}
+        for recipient, html_body in zip(recipients, html_bodies)
+    ]
+
+
+def build_assignment_email(to_email, assigned_username, shipping_info, subject="Your Secret Snakes Assignment"):
+    """Build the assignment details email for the specified recipient, ready for send_bulk_emails."""
+    recipient = {"to_email": to_email, "assigned_username": assigned_username, "shipping_info": shipping_info}
+    return build_assignment_emails([recipient], subject=subject)[0]
+
+
+# Replacement keys of the stored assignment template. Values are HTML-escaped before they are
+# sent, so the template uses SES's unescaped {{{key}}} form.
+ASSIGNMENT_TEMPLATE_FIELDS = ["first_name", "last_name", "street_address", "unit", "city", "zipcode", "state"]
+
+
+def assignment_template_parts(template_name: str = SES_ASSIGNMENT_TEMPLATE_NAME):
     """
+    The subject and HTML of the stored SES assignment template, rendered from the same
+    compiled Jinja2 template as build_assignment_emails with SES placeholders in place
+    of the recipient's details.
+    """
+    placeholders = {
+        "assigned_username": "{{{assigned_username}}}",
+        "shipping_info": {field: "{{{" + field + "}}}" for field in ASSIGNMENT_TEMPLATE_FIELDS},
+    }
+    html_part, = render_emails("assignment.html", [placeholders])
 
-    send_email(to_email, subject, html_body) 
+    return {"template_name": template_name, "subject_part": "{{{subject}}}", "html_part": html_part}
 
 
-def send_tip_email(to_email, tip_content, subject="You received a new Snakesmas tip!"):
-    """Send an email with a tip to the specified recipient."""
+def assignment_template_data(assigned_username, shipping_info) -> Dict:
+    """One recipient's replacement data for the stored assignment template."""
+    data = {field: str(escape(shipping_info.get(field) or "")) for field in ASSIGNMENT_TEMPLATE_FIELDS}
+    data["assigned_username"] = str(escape(assigned_username or ""))
+    return data
+
+
+def send_assignment_emails_templated(recipients: List[Dict], subject="Your Secret Snakes Assignment") -> List[Dict]:
+    """
+    Send assignment emails through the stored SES template: the template is registered
+    once and the recipients go out in batches of SES_BULK_BATCH_SIZE per API call.
+
+    Args:
+        recipients (List[Dict]): As for build_assignment_emails.
+        subject (str): Subject line shared by every message.
+
+    Returns:
+        List[Dict]: Per-recipient results, as from send_bulk_emails.
+    """
+    parts = assignment_template_parts()
+    if not register_template(parts["template_name"], parts["subject_part"], parts["html_part"]):
+        logger.warning("Could not register the assignment template. Sending individually instead.")
+        return send_bulk_emails(build_assignment_emails(recipients, subject=subject))
 
     # Append [DEV] to the subject if in development environment
     if ENV == "dev":
         subject = f"[DEV] {subject}"
 
-    html_body = f"""
-    <html>
-    <head>
-        <style>
-            body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-            .container {{ max-width: 600px; margin: 0 auto; padding: 20px; border: 1px solid #ddd; border-radius: 8px; background-color: #f9f9f9; }}
-            .header {{ background-color: {PRIMARY_COLOR_THREE}; color: #ffffff; padding: 10px 20px; border-radius: 8px 8px 0 0; text-align: center; }}
-            .content {{ padding: 20px; }}
-            .footer {{ text-align: center; margin-top: 30px; font-size: 0.8em; color: #777; }}
-            .tip-box {{ background-color: #ffffff; border: 1px solid #eee; padding: 15px; margin-top: 20px; text-align: center; font-size: 1.2em; font-weight: bold; border-radius: 5px; }}
-            .button {{ display: inline-block; padding: 10px 20px; margin-top: 20px; background-color: {ACCENT_COLOR_TWO}; color: white; text-decoration: none; text-color: white; border-radius: 5px; }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <h2>🐍 Secret Snakes Tip for Your Assignment 🐍</h2>
-            </div>
-            <div class="content">
-                <p>You received a new tip from an anonymous user:</p>
-                <div class="tip-box">
-                    {tip_content}
-                </div>
-            </div>
-            <div class="footer">
-                <p>Remember to keep Snakesmas shitty!</p>
-            </div>
-        </div>
-    </body>
-    </html>
-    """
+    destinations = [
+        {
+            "to_email": recipient["to_email"],
+            "data": assignment_template_data(recipient["assigned_username"], recipient["shipping_info"]),
+        }
+        for recipient in recipients
+    ]
 
-    send_email(to_email, subject, html_body) 
+    return send_bulk_templated_emails(parts["template_name"], destinations, default_data={"subject": subject})
 
 
-def send_assignment_note_email(to_email, note_content, subject="You received a note from your secret snake!"):
-    """Send an email with a note to the assigned user."""
+def send_assignment_email(to_email, assigned_username, shipping_info, subject="Your Secret Snakes Assignment"):
+    """Send an email with assignment details to the specified recipient."""
+    message = build_assignment_email(to_email, assigned_username, shipping_info, subject=subject)
+    send_email(message["to_email"], message["subject"], message["html_body"])
+
+
+def build_tip_email(to_email, tip_content, subject="You received a new Snakesmas tip!"):
+    """Build the email with a tip for the specified recipient."""
+
+    # Append [DEV] to the subject if in development environment
+    if ENV == "dev":
+        subject = f"[DEV] {subject}"
+
+    html_body, = render_emails("tip.html", [{"tip_content": tip_content}])
+
+    return {"to_email": to_email, "subject": subject, "html_body": html_body}
+
+
+def send_tip_email(to_email, tip_content, subject="You received a new Snakesmas tip!"):
+    """Send an email with a tip to the specified recipient."""
+    message = build_tip_email(to_email, tip_content, subject=subject)
+    send_email(message["to_email"], message["subject"], message["html_body"])
+
+
+def build_assignment_note_email(to_email, note_content, subject="You received a note from your secret snake!"):
+    """Build the email with a note for the assigned user."""
 
     # Append [DEV] to the subject if in development environment
     if ENV == "dev":
@@ -278,36 +465,12 @@ def send_assignment_note_email(to_email, note_content, subject="You received a n
         logger.info(f"Would send note email to: {to_email}")
         to_email = "daniel.wayne.kidd@gmail.com"  # Override email for testing in dev
 
-    html_body = f"""
-    <html>
-    <head>
-        <style>
-            body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-            .container {{ max-width: 600px; margin: 0 auto; padding: 20px; border: 1px solid #ddd; border-radius: 8px; background-color: #f9f9f9; }}
-            .header {{ background-color: {PRIMARY_COLOR_THREE}; color: #ffffff; padding: 10px 20px; border-radius: 8px 8px 0 0; text-align: center; }}
-            .content {{ padding: 20px; }}
-            .footer {{ text-align: center; margin-top: 30px; font-size: 0.8em; color: #777; }}
-            .tip-box {{ background-color: #ffffff; border: 1px solid #eee; padding: 15px; margin-top: 20px; text-align: center; font-size: 1.2em; font-weight: bold; border-radius: 5px; }}
-            .button {{ display: inline-block; padding: 10px 20px; margin-top: 20px; background-color: {ACCENT_COLOR_TWO}; color: white; text-decoration: none; text-color: white; border-radius: 5px; }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <h2>🐍 Secret Snakes Note from Your Secret Snake 🐍</h2>
-            </div>
-            <div class="content">
-                <p>You received a new note from your secret snake:</p>
-                <div class="tip-box">
-                    {note_content}
-                </div>
-            </div>
-            <div class="footer">
-                <p>Remember to keep Snakesmas shitty!</p>
-            </div>
-        </div>
-    </body>
-    </html>
-    """
+    html_body, = render_emails("assignment_note.html", [{"note_content": note_content}])
+
+    return {"to_email": to_email, "subject": subject, "html_body": html_body}
 
-    send_email(to_email, subject, html_body) 
\ No newline at end of file
+
+def send_assignment_note_email(to_email, note_content, subject="You received a note from your secret snake!"):
+    """Send an email with a note to the assigned user."""
+    message = build_assignment_note_email(to_email, note_content, subject=subject)
+    send_email(message["to_email"], message["subject"], message["html_body"])
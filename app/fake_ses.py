@@ -0,0 +1,122 @@
+from typing import Dict, Iterable, List
+import re
+import json
+import logging
+import threading
+from botocore.exceptions import ClientError
+from markupsafe import escape
+
+
+# SES limits the fake enforces
+MAX_BULK_DESTINATIONS = 50
+
+# Adding logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+_placeholder = re.compile(r"\{\{\{\s*(\w+)\s*\}\}\}|\{\{\s*(\w+)\s*\}\}")
+
+
+def _client_error(code: str, message: str, operation: str) -> ClientError:
+    return ClientError({'Error': {'Code': code, 'Message': message}}, operation)
+
+
+def render_template_part(part: str, data: Dict) -> str:
+    """
+    Fill an SES template part: {{{key}}} is replaced as is and {{key}} HTML-escaped,
+    with missing keys left blank.
+    """
+
+    def replace(match):
+        raw_key, escaped_key = match.groups()
+        if raw_key:
+            return str(data.get(raw_key, ""))
+        return str(escape(data.get(escaped_key, "")))
+
+    return _placeholder.sub(replace, part)
+
+
+class FakeSES:
+    """
+    In-process stand-in for the boto3 SES client, for offline development and tests.
+
+    Implements the calls the emails module makes: send_email, create_template,
+    update_template, get_template and send_bulk_templated_email. Delivered messages
+    are recorded in sent, fully rendered, and the API calls made in calls.
+    Addresses in reject are refused the way SES refuses unverified recipients.
+    """
+
+    def __init__(self, reject: Iterable[str] = ()):
+        self.reject = set(reject)
+        self.templates = {}
+        self.sent = []
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def _deliver(self, to_email: str, subject: str, html_body: str) -> str:
+        with self.lock:
+            self.sent.append({"to_email": to_email, "subject": subject, "html_body": html_body})
+            return f"fake-{len(self.sent)}"
+
+    def _record(self, operation: str):
+        with self.lock:
+            self.calls.append(operation)
+
+    def send_email(self, Source, Destination, Message):
+        self._record("send_email")
+        to_email = Destination['ToAddresses'][0]
+        if to_email in self.reject:
+            raise _client_error('MessageRejected', f"Email address is not verified: {to_email}", 'SendEmail')
+
+        message_id = self._deliver(to_email, Message['Subject']['Data'], Message['Body']['Html']['Data'])
+        return {'MessageId': message_id}
+
+    def create_template(self, Template):
+        self._record("create_template")
+        with self.lock:
+            if Template['TemplateName'] in self.templates:
+                raise _client_error('AlreadyExists', f"Template {Template['TemplateName']} already exists", 'CreateTemplate')
+            self.templates[Template['TemplateName']] = dict(Template)
+        return {}
+
+    def update_template(self, Template):
+        self._record("update_template")
+        with self.lock:
+            if Template['TemplateName'] not in self.templates:
+                raise _client_error('TemplateDoesNotExist', f"Template {Template['TemplateName']} does not exist", 'UpdateTemplate')
+            self.templates[Template['TemplateName']] = dict(Template)
+        return {}
+
+    def get_template(self, TemplateName):
+        self._record("get_template")
+        if TemplateName not in self.templates:
+            raise _client_error('TemplateDoesNotExist', f"Template {TemplateName} does not exist", 'GetTemplate')
+        return {'Template': dict(self.templates[TemplateName])}
+
+    def send_bulk_templated_email(self, Source, Template, DefaultTemplateData, Destinations: List[Dict]):
+        self._record("send_bulk_templated_email")
+        if Template not in self.templates:
+            raise _client_error('TemplateDoesNotExist', f"Template {Template} does not exist", 'SendBulkTemplatedEmail')
+        if len(Destinations) > MAX_BULK_DESTINATIONS:
+            raise _client_error('InvalidParameterValue', f"At most {MAX_BULK_DESTINATIONS} destinations per call", 'SendBulkTemplatedEmail')
+
+        template = self.templates[Template]
+        default_data = json.loads(DefaultTemplateData)
+
+        statuses = []
+        for destination in Destinations:
+            to_email = destination['Destination']['ToAddresses'][0]
+            if to_email in self.reject:
+                statuses.append({'Status': 'MessageRejected', 'Error': f"Email address is not verified: {to_email}"})
+                continue
+
+            data = {**default_data, **json.loads(destination.get('ReplacementTemplateData') or "{}")}
+            message_id = self._deliver(
+                to_email,
+                render_template_part(template['SubjectPart'], data),
+                render_template_part(template.get('HtmlPart', ""), data)
+            )
+            statuses.append({'Status': 'Success', 'MessageId': message_id})
+
+        return {'Status': statuses}
@@ -0,0 +1,168 @@
+from typing import Dict, List, Optional
+import os
+import json
+import time
+import logging
+import contextvars
+from distutils.util import strtobool
+from fastapi.templating import Jinja2Templates
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# A request slower than this, or issuing more queries than this, is logged with its timings
+SLOW_REQUEST_THRESHOLD_MS = float(os.environ.get("SLOW_REQUEST_THRESHOLD_MS", 500))
+SLOW_REQUEST_QUERY_COUNT = int(os.environ.get("SLOW_REQUEST_QUERY_COUNT", 25))
+
+# Any single statement slower than this is logged, inside a request or not
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get("SLOW_QUERY_THRESHOLD_MS", 100))
+
+# Add a Server-Timing header with the request's db, template and handler times
+SERVER_TIMING_ENABLED = bool(strtobool(os.environ.get("SERVER_TIMING_ENABLED", "True")))
+
+# Adding logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class RequestMetrics:
+    """Timings collected while one request is handled."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.db_seconds = 0.0
+        self.render_seconds = 0.0
+        self.handler_seconds = None
+        self.slow_queries = []
+
+    def server_timing(self) -> str:
+        """The timings as a Server-Timing header value, in milliseconds."""
+        handler_seconds = self.handler_seconds if self.handler_seconds is not None else time.perf_counter() - self.started
+        return ", ".join([
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{self.query_count} queries"',
+            f"tpl;dur={self.render_seconds * 1000:.1f}",
+            f"app;dur={handler_seconds * 1000:.1f}",
+        ])
+
+
+# Metrics of the request being handled. Starlette copies the context into the threadpool for sync
+# routes and dependencies, and SQLAlchemy's async greenlets inherit it, so database work on either
+# path finds the same RequestMetrics.
+_current_metrics: contextvars.ContextVar[Optional[RequestMetrics]] = contextvars.ContextVar("request_metrics", default=None)
+
+
+def current_metrics() -> Optional[RequestMetrics]:
+    """The metrics of the request in progress, or None outside a request."""
+    return _current_metrics.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.query_count += 1
+        metrics.db_seconds += elapsed
+
+    if elapsed * 1000 >= SLOW_QUERY_THRESHOLD_MS:
+        statement = " ".join(statement.split())
+        logger.warning(f"Slow query ({elapsed * 1000:.1f} ms): {statement[:500]}")
+        if metrics is not None:
+            metrics.slow_queries.append({"ms": round(elapsed * 1000, 1), "statement": statement[:200]})
+
+
+def instrument_engine(engine: Engine):
+    """
+    Count and time every statement the engine runs. For an AsyncEngine pass its sync_engine.
+    """
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class InstrumentedTemplates(Jinja2Templates):
+    """Jinja2Templates that adds the time spent rendering to the current request's metrics."""
+
+    def TemplateResponse(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().TemplateResponse(*args, **kwargs)
+        finally:
+            metrics = _current_metrics.get()
+            if metrics is not None:
+                metrics.render_seconds += time.perf_counter() - start
+
+
+def route_path(scope: Dict) -> str:
+    """The path template of the route that handled the request, e.g. /tips/{tip_id}."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or scope.get("path", "")
+
+
+def request_log_record(scope: Dict, status_code: Optional[int], metrics: RequestMetrics) -> Dict:
+    """The structured slow request log entry."""
+    return {
+        "event": "slow_request",
+        "method": scope.get("method"),
+        "route": route_path(scope),
+        "path": scope.get("path"),
+        "status": status_code,
+        "duration_ms": round(metrics.handler_seconds * 1000, 1),
+        "db_ms": round(metrics.db_seconds * 1000, 1),
+        "template_ms": round(metrics.render_seconds * 1000, 1),
+        "query_count": metrics.query_count,
+        "slow_queries": metrics.slow_queries,
+    }
+
+
+class InstrumentationMiddleware:
+    """
+    ASGI middleware that measures each HTTP request: query count and time, template render
+    time and total handler time. Adds a Server-Timing header and logs slow requests as JSON.
+    """
+
+    def __init__(
+            self,
+            app,
+            slow_request_ms: float = SLOW_REQUEST_THRESHOLD_MS,
+            slow_request_queries: int = SLOW_REQUEST_QUERY_COUNT,
+            server_timing: bool = SERVER_TIMING_ENABLED
+    ):
+        self.app = app
+        self.slow_request_ms = slow_request_ms
+        self.slow_request_queries = slow_request_queries
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        # Pass through non-HTTP scopes, and requests an outer instance is already measuring
+        if scope["type"] != "http" or _current_metrics.get() is not None:
+            await self.app(scope, receive, send)
+            return
+
+        metrics = RequestMetrics()
+        token = _current_metrics.set(metrics)
+        status_code = None
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing:
+                    headers: List = list(message.get("headers", []))
+                    headers.append((b"server-timing", metrics.server_timing().encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            metrics.handler_seconds = time.perf_counter() - metrics.started
+            _current_metrics.reset(token)
+
+            if metrics.handler_seconds * 1000 >= self.slow_request_ms or metrics.query_count > self.slow_request_queries:
+                logger.warning(json.dumps(request_log_record(scope, status_code, metrics)))
@@ -1,20 +1,20 @@
-from typing import List
+from typing import List, Optional
 import datetime
 from distutils.util import strtobool
-from fastapi import FastAPI, Depends, HTTPException, Request, Form, status
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
+from fastapi import FastAPI, Depends, HTTPException, Request, Form, Query, status
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
 from fastapi_mail import ConnectionConfig, FastMail, MessageSchema
 from starlette.middleware.sessions import SessionMiddleware
-from sqlalchemy import desc, func
+from sqlalchemy import desc, func, select
 from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
 import logging
 
 import os
 
-from app import models, schemas, auth, database, config, snake_assignments, tips, emails
+from app import models, schemas, auth, database, config, snake_assignments, tips, emails, outbox, dashboard, profile_data, users
+from app import instrumentation, metrics, static_assets
 
 
 # Adding logging
@@ -38,8 +38,9 @@ conf = None
 # Initialize app
 app = FastAPI()
 
-# Mount static files
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Mount static files, fingerprinted by content hash and precompressed (templates link them with static_url)
+static_files = static_assets.FingerprintedStaticFiles(directory="static", url_prefix="/static")
+app.mount("/static", static_files, name="static")
 
 # Session Configuration
 # The session cookie carries the user's access token, so its signing key must be
@@ -54,21 +55,70 @@ if not SESSION_SECRET_KEY:
     )
 app.add_middleware(SessionMiddleware, secret_key=SESSION_SECRET_KEY)
 
-# Set up Jinja2 templates
-templates = Jinja2Templates(directory="templates")
+# Per-request query counts and timings (Server-Timing header and slow request log)
+instrumentation.instrument_engine(database.engine)
+instrumentation.instrument_engine(database.async_engine.sync_engine)
+app.add_middleware(instrumentation.InstrumentationMiddleware)
+
+# Request, pool, password hashing, email and assignment metrics, served at /metrics
+metrics.instrument_pool(database.engine, "sync")
+metrics.instrument_pool(database.async_engine.sync_engine, "async")
+metrics.instrument_password_pool(auth.password_pool_stats)
+app.add_middleware(metrics.MetricsMiddleware)
+
+# Set up Jinja2 templates, timing each render
+templates = instrumentation.InstrumentedTemplates(directory="templates")
+templates.env.globals["static_url"] = static_files.static_url
+
+
+# Run the outbound email worker inside the web process unless a separate worker (outbox_worker.py) is deployed
+OUTBOX_WORKER_IN_PROCESS = bool(strtobool(os.environ.get("OUTBOX_WORKER_IN_PROCESS", "True")))
+outbox_worker_stop = None
 
 
 @app.on_event("startup")
 def startup_event():
     """Initialize the database when the app starts."""
+    global outbox_worker_stop
+
     database.init_db()
     config.initialize_config(next(database.get_db()))
 
+    if OUTBOX_WORKER_IN_PROCESS:
+        outbox_worker_stop = outbox.start_background_worker()
+
+
+@app.on_event("shutdown")
+def shutdown_event():
+    """Stop the in-process outbox worker."""
+    if outbox_worker_stop:
+        outbox_worker_stop.set()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def read_metrics(request: Request, db: Session = Depends(database.get_db)):
+    """
+    Prometheus metrics for this process. Open to the loopback interface (unless
+    METRICS_ALLOW_LOCALHOST is off); anyone else must be logged in as an admin.
+    """
+    client_host = request.client.host if request.client else None
+
+    if not (metrics.METRICS_ALLOW_LOCALHOST and metrics.is_local_request(client_host)):
+        access_token = request.session.get("access_token")
+        if not access_token:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+
+        current_user = auth.get_request_user(request, db, access_token)
+        auth.get_current_admin_user(current_user)
+
+    return PlainTextResponse(metrics.render_metrics(), media_type="text/plain; version=0.0.4")
+
 
 @app.get("/", response_class=HTMLResponse)
 async def home(
     request: Request,
-    db: Session = Depends(database.get_db)
+    db: AsyncSession = Depends(database.get_async_db),
+    assignment_year: Optional[int] = Depends(config.active_assignment_year_async)
 ):
     """Home page."""
 
@@ -86,7 +136,7 @@ async def home(
         return unauthenticated_response
 
     # Get current user and generate context for template response
-    current_user = auth.get_current_user(db, access_token)
+    current_user = await auth.get_request_user_async(request, db, access_token)
 
     # If authentication token not valid, display home page with user is authenticated set to false
     if not current_user:
@@ -94,28 +144,10 @@ async def home(
 
     # --- Authenticated: build the personalized dashboard context ---------
 
-    # Resolve the active assignment year (fall back to the latest year on record)
-    latest_year = db.query(func.max(models.Assignment.year)).scalar()
-    assignment_year = config.get_config(db).get('assignment_year')
-    assignment_year = int(assignment_year) if assignment_year else latest_year
-
-    # The user's assignment (who they are buying for) for the active year
-    assigned_user = None
-    if assignment_year:
-        assignment = db.query(models.Assignment).filter(
-            models.Assignment.assignee_user_id == current_user.id,
-            models.Assignment.year == assignment_year,
-        ).first()
-        if assignment:
-            assigned_user = db.query(models.User).filter(
-                models.User.id == assignment.assigned_user_id
-            ).first()
-
-    # Tip counts for at-a-glance status
-    tips_for_snake = tips.count_tips_for_current_assignment(
-        db, current_user.id, assignment_year) if assignment_year else 0
-    tips_given = len(tips.get_tips_for_contributor_user(
-        db, current_user.id, assignment_year)) if assignment_year else 0
+    # The user's assignment (who they are buying for) and tip counts, in one round trip
+    user_dashboard = await dashboard.get_dashboard(db, current_user.id, assignment_year) if assignment_year else {
+        "assigned_user": None, "tips_for_snake": 0, "tips_given": 0
+    }
 
     # Nudge the user if their shipping address looks incomplete
     shipping_complete = all([
@@ -133,9 +165,9 @@ async def home(
             "user": current_user,
             "is_admin": current_user.is_admin,
             "assignment_year": assignment_year,
-            "assigned_user": assigned_user,
-            "tips_for_snake": tips_for_snake or 0,
-            "tips_given": tips_given,
+            "assigned_user": user_dashboard["assigned_user"],
+            "tips_for_snake": user_dashboard["tips_for_snake"],
+            "tips_given": user_dashboard["tips_given"],
             "shipping_complete": shipping_complete,
         }
     )
@@ -200,7 +232,7 @@ async def register(
 
     # Get hashed password from provided password
     # We will store this version of the password
-    hashed_password = auth.get_password_hash(password)
+    hashed_password = await auth.get_password_hash_async(password)
 
     # Initialize User table-object instance using the provided details and the hashed password
     new_user = models.User(
@@ -256,7 +288,7 @@ async def login(
     logger.info(f"Login attempt for user: {form_data.username}")
 
     # Check if user exists
-    user = auth.authenticate_user(db, form_data.username, form_data.password)
+    user = await auth.authenticate_user_async(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -300,12 +332,12 @@ async def request_username_recovery(
     # endpoint to enumerate valid email addresses/users on your system.
     if user:
         try:
-            # Send the email with the actual username
-            emails.send_username_recovery_email(to_email=user.email, username=user.username)
-            logger.info(f"Username recovery email initiated for {user_email_data.email} (User found).")
+            # Queue the email with the actual username
+            outbox.enqueue_email(db, emails.build_username_recovery_email(to_email=user.email, username=user.username))
+            logger.info(f"Username recovery email queued for {user_email_data.email} (User found).")
         except Exception as e:
             # Log the actual error, but don't expose it to the user.
-            logger.error(f"Error sending username recovery email for {user_email_data.email}: {e}")
+            logger.error(f"Error queueing username recovery email for {user_email_data.email}: {e}")
             # The user will still receive the generic success message below.
             pass
     else:
@@ -348,12 +380,16 @@ async def request_password_reset(
 
         try:
 
-            # Send the password reset email
-            emails.send_password_reset_email(to_email=user.email, reset_token=reset_token)
-            logger.info(f"Password reset email initiated for {user_email_data.email} (User found).")
+            # Queue the password reset email
+            outbox.enqueue_email(
+                db,
+                emails.build_password_reset_email(to_email=user.email, reset_token=reset_token),
+                dedup_key=f"password-reset:{reset_token}"
+            )
+            logger.info(f"Password reset email queued for {user_email_data.email} (User found).")
 
         except Exception as e:
-            logger.error(f"Error sending password reset email for {user_email_data.email}: {e}")
+            logger.error(f"Error queueing password reset email for {user_email_data.email}: {e}")
             # Consider rolling back the token if the email fails.
             db.rollback() # Or handle more gracefully
             # But still return the generic success message.
@@ -410,7 +446,7 @@ async def reset_password(
             detail="Passwords do not match."
         )
 
-    user = auth.update_user_password(db, user, password_reset_data.password)
+    user = await auth.update_user_password_async(db, user, password_reset_data.password)
 
     # Redirect to login page (or show a success message)
     return RedirectResponse(url="/", status_code=302)
@@ -465,7 +501,9 @@ def read_users_me(current_user: models.User = Depends(auth.get_current_user)):
 @app.get("/profile")
 async def profile(
     request: Request,
-    db: Session = Depends(database.get_db)
+    users_page: int = 1,
+    db: AsyncSession = Depends(database.get_async_db),
+    assignment_year: Optional[int] = Depends(config.active_assignment_year_async)
 ):
     """Profile page."""
 
@@ -478,48 +516,30 @@ async def profile(
             return RedirectResponse(url="/", status_code=302)
 
         # Get current user and generate context for template response
-        current_user = auth.get_current_user(db, access_token)
+        current_user = await auth.get_request_user_async(request, db, access_token)
 
         if not current_user:
             return RedirectResponse(url="/", status_code=302)
 
-        # Fetch all users if admin
-        all_users = db.query(models.User).all() if current_user.is_admin else []
-
-        # Fetch user's assignments
-        user_assignments = db.query(models.Assignment).filter(
-            models.Assignment.assignee_user_id == current_user.id
-        ).order_by(desc(models.Assignment.year)).all()
-
-        # Get the current assignment year
-        assignment_year = config.get_config(db)['assignment_year']
-
-        # Get current year's exclusions if admin
-        current_exclusions = snake_assignments.fetch_exclusions(db, assignment_year) if current_user.is_admin else None
-
-        # Check if assignments exist for the current assignment year
-        assignments_exist_for_year = db.query(models.Assignment).filter(
-            models.Assignment.year == assignment_year
-        ).first() is not None
+        # Assignments, admin data and the page's checks, in a fixed number of queries
+        page_data = await profile_data.load_profile(db, current_user, assignment_year, users_page)
 
         # Check if registration is allowed
-        allow_registration = config.get_config(db).get("allow_registration", "True")
+        allow_registration = (await config.get_config_async(db)).get("allow_registration", "True")
         allow_registration = (allow_registration == "True")
 
-        # Get number of tips for current assignemnt
-        number_of_tips = tips.count_tips_for_current_assignment(db, current_user.id, assignment_year)
-
         context = {
             "request": request,
             "user": current_user,
             "is_admin": current_user.is_admin,
-            "all_users": all_users,
-            "assignments": user_assignments,
+            "all_users": page_data["all_users"],
+            "users_pagination": page_data["users_pagination"],
+            "assignments": page_data["assignments"],
             "assignment_year": assignment_year,
-            "current_exclusions": current_exclusions,
-            "assignments_exist_for_year": assignments_exist_for_year,
+            "current_exclusions": page_data["current_exclusions"],
+            "assignments_exist_for_year": page_data["assignments_exist_for_year"],
             "allow_registration": allow_registration,
-            "number_of_tips": number_of_tips,
+            "number_of_tips": page_data["number_of_tips"],
             "user_authenticated": True
         }
         return templates.TemplateResponse("profile.html", context)
@@ -544,7 +564,7 @@ async def update_profile(
     access_token = request.session.get("access_token")
 
     # Get current user
-    current_user = auth.get_current_user(db, access_token)
+    current_user = auth.get_request_user(request, db, access_token)
 
     # For all fields provided, overwrite current user object's attributes
     for field, value in user_update.dict(exclude_unset=True).items():
@@ -553,6 +573,7 @@ async def update_profile(
     # Commit updates to database
     db.commit()
     db.refresh(current_user)
+    auth.invalidate_cached_user(current_user.id)
     return {"message": "Email updated successfully"}
 
 
@@ -567,7 +588,7 @@ async def update_profile(
     access_token = request.session.get("access_token")
 
     # Get current user
-    current_user = auth.get_current_user(db, access_token)
+    current_user = auth.get_request_user(request, db, access_token)
 
     # For all fields provided, overwrite current user object's attributes
     for field, value in user_update.dict(exclude_unset=True).items():
@@ -576,6 +597,7 @@ async def update_profile(
     # Commit updates to database
     db.commit()
     db.refresh(current_user)
+    auth.invalidate_cached_user(current_user.id)
 
     return {"message": "Shipping address updated successfully"}
 
@@ -588,24 +610,50 @@ async def update_profile_page(
     return templates.TemplateResponse("profile.html", {"request": request, "user": current_user})
 
 
-@app.get("/users/", response_model=List[schemas.User])
+@app.get("/users/")
 def list_users(
     request: Request,
+    after_id: int = 0,
+    limit: Optional[int] = Query(None, ge=1),
+    fields: Optional[str] = None,
+    username_prefix: Optional[str] = None,
+    email_prefix: Optional[str] = None,
+    format: str = "json",
     db: Session = Depends(database.get_db),
 ):
-    """Retrieve a list of all users. Requires admin privileges."""
+    """
+    Stream users in id order. Requires admin privileges.
+
+    Pages are keyset based: pass the last id received as after_id to continue; a page
+    shorter than limit is the last one. fields selects a comma-separated subset of columns
+    (id is always included). Prefix filters are case-sensitive. format is "json" for a JSON
+    array or "ndjson" for one user per line.
+    """
 
     # Get the token from the session
     access_token = request.session.get("access_token")
 
     # Get current user and check admin
-    current_user = auth.get_current_user(db, access_token)
+    current_user = auth.get_request_user(request, db, access_token)
     auth.get_current_admin_user(current_user)
 
-    # Query users
-    users = db.query(models.User).all()
+    if format not in ("json", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be json or ndjson")
 
-    return users
+    # Stream users in keyset batches
+    rows = users.iter_users(
+        db,
+        users.parse_fields(fields),
+        after_id=after_id,
+        limit=limit,
+        username_prefix=username_prefix,
+        email_prefix=email_prefix
+    )
+
+    if format == "ndjson":
+        return StreamingResponse(users.encode_ndjson(rows), media_type="application/x-ndjson")
+
+    return StreamingResponse(users.encode_json_array(rows), media_type="application/json")
 
 
 @app.post("/admin/toggle-registration", response_model=dict)
@@ -622,7 +670,7 @@ def toggle_registration(
     access_token = request.session.get("access_token")
 
     # Get current user and check admin
-    current_user = auth.get_current_user(db, access_token)
+    current_user = auth.get_request_user(request, db, access_token)
     auth.get_current_admin_user(current_user)
 
     # Set the configuration for registration
@@ -644,7 +692,7 @@ def set_assignment_year(
     access_token = request.session.get("access_token")
 
     # Get current user and generate context for template response
-    current_user = auth.get_current_user(db, access_token)
+    current_user = auth.get_request_user(request, db, access_token)
 
     # Check if current user is admin
     auth.get_current_admin_user(current_user)
@@ -655,6 +703,27 @@ def set_assignment_year(
     return {"message": f"Assignment year set to {assignment_year_request.assignment_year} successfully"}
 
 
+@app.post("/admin/set-history-years")
+def set_history_years(
+        request: Request,
+        history_years_request: schemas.AssignmentHistoryYearsUpdate,
+        db: Session = Depends(database.get_db)
+):
+    """If current user is admin, set how many previous years' pairings may not be repeated."""
+
+    # Get the token from the session
+    access_token = request.session.get("access_token")
+
+    # Get current user and check admin
+    current_user = auth.get_request_user(request, db, access_token)
+    auth.get_current_admin_user(current_user)
+
+    # Set history lookback
+    config.set_config(db, 'assignment_history_years', str(history_years_request.assignment_history_years))
+
+    return {"message": f"Pairings from the last {history_years_request.assignment_history_years} year(s) will not be repeated"}
+
+
 @app.post("/admin/exclusions", response_model=dict)
 def set_exclusions(
     request: Request,
@@ -667,7 +736,7 @@ def set_exclusions(
     access_token = request.session.get("access_token")
 
     # Get current user and generate context for template response
-    current_user = auth.get_current_user(db, access_token)
+    current_user = auth.get_request_user(request, db, access_token)
 
     # Check if current user is admin
     auth.get_current_admin_user(current_user)
@@ -700,6 +769,138 @@ def set_exclusions(
     return {"message": "Exclusions updated successfully."}
 
 
+@app.post("/admin/exclusions/bulk", response_model=schemas.ExclusionDiff)
+def set_exclusions_bulk(
+    request: Request,
+    bulk_request: schemas.ExclusionBulkUpdate,
+    db: Session = Depends(database.get_db)
+):
+    """
+    If current user is admin, apply a whole exclusion graph or household grouping
+    for a year in one transaction, and return what changed.
+    """
+
+    # Get the token from the session
+    access_token = request.session.get("access_token")
+
+    # Get current user and check admin
+    current_user = auth.get_request_user(request, db, access_token)
+    auth.get_current_admin_user(current_user)
+
+    # Check if assignments already exist for the year
+    existing_assignments = db.query(models.Assignment.id).filter(models.Assignment.year == bulk_request.year).first()
+    if existing_assignments:
+        raise HTTPException(
+            status_code=400,
+            detail="Assignments for this year have already been created. Exclusions cannot be updated."
+        )
+
+    pairs = snake_assignments.expand_exclusion_graph(bulk_request.exclusions, bulk_request.households)
+
+    # Every user in the graph must exist
+    user_ids = {user_id for pair in pairs for user_id in pair}
+    known_ids = {row.id for row in db.query(models.User.id).filter(models.User.id.in_(user_ids))} if user_ids else set()
+    if user_ids - known_ids:
+        raise HTTPException(status_code=400, detail=f"Unknown user IDs: {sorted(user_ids - known_ids)}")
+
+    return snake_assignments.apply_exclusion_graph(db, bulk_request.year, pairs, replace=bulk_request.replace)
+
+
+@app.get("/admin/exclusion-groups", response_model=List[schemas.ExclusionGroup])
+def list_exclusion_groups(
+    request: Request,
+    year: Optional[int] = None,
+    db: Session = Depends(database.get_db)
+):
+    """If current user is admin, list exclusion groups, or only those in effect for a year."""
+
+    # Get the token from the session
+    access_token = request.session.get("access_token")
+
+    # Get current user and check admin
+    current_user = auth.get_request_user(request, db, access_token)
+    auth.get_current_admin_user(current_user)
+
+    query = db.query(models.ExclusionGroup).options(joinedload(models.ExclusionGroup.members))
+    if year is not None:
+        query = query.filter(*snake_assignments.active_in_year(year))
+
+    return [
+        schemas.ExclusionGroup(
+            id=group.id,
+            name=group.name,
+            members=sorted(member.user_id for member in group.members),
+            start_year=group.start_year,
+            end_year=group.end_year
+        )
+        for group in query.order_by(models.ExclusionGroup.id).all()
+    ]
+
+
+@app.post("/admin/exclusion-groups", response_model=schemas.ExclusionGroup)
+def create_exclusion_group(
+    request: Request,
+    group_request: schemas.ExclusionGroupCreate,
+    db: Session = Depends(database.get_db)
+):
+    """
+    If current user is admin, create a group whose members may not draw each other.
+    The group carries over to every later year until its end year.
+    """
+
+    # Get the token from the session
+    access_token = request.session.get("access_token")
+
+    # Get current user and check admin
+    current_user = auth.get_request_user(request, db, access_token)
+    auth.get_current_admin_user(current_user)
+
+    members = sorted(set(group_request.members))
+    known_ids = {row.id for row in db.query(models.User.id).filter(models.User.id.in_(members))}
+    if set(members) - known_ids:
+        raise HTTPException(status_code=400, detail=f"Unknown user IDs: {sorted(set(members) - known_ids)}")
+
+    if group_request.end_year is not None and group_request.end_year < group_request.start_year:
+        raise HTTPException(status_code=400, detail="end_year must not be before start_year")
+
+    group = models.ExclusionGroup(
+        name=group_request.name,
+        start_year=group_request.start_year,
+        end_year=group_request.end_year,
+        created_at=datetime.datetime.now(),
+        members=[models.ExclusionGroupMember(user_id=user_id) for user_id in members]
+    )
+    db.add(group)
+    db.commit()
+
+    return schemas.ExclusionGroup(id=group.id, **{**group_request.dict(), "members": members})
+
+
+@app.delete("/admin/exclusion-groups/{group_id}", response_model=dict)
+def delete_exclusion_group(
+    request: Request,
+    group_id: int,
+    db: Session = Depends(database.get_db)
+):
+    """If current user is admin, delete an exclusion group."""
+
+    # Get the token from the session
+    access_token = request.session.get("access_token")
+
+    # Get current user and check admin
+    current_user = auth.get_request_user(request, db, access_token)
+    auth.get_current_admin_user(current_user)
+
+    group = db.query(models.ExclusionGroup).filter(models.ExclusionGroup.id == group_id).first()
+    if not group:
+        raise HTTPException(status_code=404, detail="Exclusion group not found")
+
+    db.delete(group)
+    db.commit()
+
+    return {"message": "Exclusion group deleted successfully."}
+
+
 @app.post("/admin/assign", response_model=dict)
 def create_assignments(
         request: Request,
@@ -712,7 +913,7 @@ def create_assignments(
     access_token = request.session.get("access_token")
 
     # Get current user and generate context for template response
-    current_user = auth.get_current_user(db, access_token)
+    current_user = auth.get_request_user(request, db, access_token)
 
     # Check if current user is admin
     auth.get_current_admin_user(current_user)
@@ -743,10 +944,42 @@ def create_assignments(
     return {"message": "Assignments created successfully"}
 
 
+@app.post("/admin/assignments/feasibility", response_model=schemas.AssignmentFeasibility)
+def check_assignment_feasibility(
+        request: Request,
+        assignments_request: schemas.AssignmentCreate,
+        db: Session = Depends(database.get_db)
+):
+    """
+    If current user is admin, check whether the participants and rules for a year admit a valid assignment.
+    Nothing is drawn or saved, so this is cheap enough to run after every exclusion edit.
+    """
+
+    # Get the token from the session
+    access_token = request.session.get("access_token")
+
+    # Get current user and check admin
+    current_user = auth.get_request_user(request, db, access_token)
+    auth.get_current_admin_user(current_user)
+
+    year = assignments_request.year
+
+    # Apply the same rules that /admin/assign will use
+    feasibility = snake_assignments.check_feasibility(
+        assignments_request.participants,
+        snake_assignments.fetch_previous_assignments(db, year, snake_assignments.get_history_lookback_years(db)),
+        snake_assignments.fetch_exclusions(db, year, include_groups=False),
+        snake_assignments.fetch_exclusion_groups(db, year)
+    )
+
+    return {"year": year, **feasibility}
+
+
 @app.get("/assignment", response_class=HTMLResponse)
 async def assignment(
     request: Request,
-    db: Session = Depends(database.get_db),
+    db: AsyncSession = Depends(database.get_async_db),
+    assignment_year: Optional[int] = Depends(config.active_assignment_year_async),
 ):
     """Assignment page for the current user's latest assignment."""
 
@@ -757,23 +990,16 @@ async def assignment(
         return RedirectResponse(url="/", status_code=302)
 
     # Get current user and generate context for template response
-    current_user = auth.get_current_user(db, access_token)
+    current_user = await auth.get_request_user_async(request, db, access_token)
 
     if not current_user:
         return RedirectResponse(url="/", status_code=302)
 
-    # Get the latest year in the assignments table
-    latest_year = db.query(func.max(models.Assignment.year)).scalar()
-
-    # Get the current assignment year
-    assignment_year = config.get_config(db)['assignment_year']
-    assignment_year = int(assignment_year) if assignment_year else latest_year
-
     # Get the latest assignment for the current user
-    assignment = db.query(models.Assignment).filter(
+    assignment = (await db.execute(select(models.Assignment).filter(
         models.Assignment.assignee_user_id == current_user.id,
         models.Assignment.year == assignment_year,
-    ).first()
+    ))).scalars().first()
 
     if not assignment:
         context = {
@@ -787,13 +1013,13 @@ async def assignment(
         return templates.TemplateResponse("assignment.html", context)
 
     # Get the user they are assigned to (assigned_user)
-    assigned_user = db.query(models.User).filter(models.User.id == assignment.assigned_user_id).first()
+    assigned_user = await db.get(models.User, assignment.assigned_user_id)
 
     if not assigned_user:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Assigned user not found")
 
     # Get tips for the assigned user
-    current_tips = tips.get_tips_for_subject_user(db, assigned_user.id, assignment_year)
+    current_tips = await tips.get_tips_for_subject_user_async(db, assigned_user.id, assignment_year)
 
     context = {
         "request": request,
@@ -812,6 +1038,7 @@ async def send_anonymous_note(
     request: Request,
     note_content: str = Form(...),
     db: Session = Depends(database.get_db),
+    assignment_year: Optional[int] = Depends(config.active_assignment_year),
 ):
     """
     Allows the current user (the giver) to send an anonymous note to their
@@ -829,7 +1056,7 @@ async def send_anonymous_note(
         )
 
     # Get current user (the giver)
-    current_user = auth.get_current_user(db, access_token)
+    current_user = auth.get_request_user(request, db, access_token)
 
     if not current_user:
         raise HTTPException(
@@ -837,13 +1064,6 @@ async def send_anonymous_note(
             detail="Invalid authentication token."
         )
 
-    # Get the latest year in the assignments table
-    latest_year = db.query(func.max(models.Assignment.year)).scalar()
-
-    # Get the current assignment year
-    assignment_year = config.get_config(db).get('assignment_year')
-    assignment_year = int(assignment_year) if assignment_year else latest_year
-
     # Find the current user's assignment for the current year
     assignment = db.query(models.Assignment).filter(
         models.Assignment.assignee_user_id == current_user.id,
@@ -868,10 +1088,10 @@ async def send_anonymous_note(
             detail="Assigned user not found in the database."
         )
 
-    emails.send_assignment_note_email(
+    outbox.enqueue_email(db, emails.build_assignment_note_email(
         to_email=assigned_user.email,
         note_content=note_content,
-    )
+    ))
 
     # Use a RedirectResponse to prevent resubmission on page refresh, 
     # but since this is an API endpoint, we'll return a JSON response.
@@ -881,7 +1101,8 @@ async def send_anonymous_note(
 @app.get("/tips/create", response_class=HTMLResponse)
 async def create_tip_form(
     request: Request,
-    db: Session = Depends(database.get_db),
+    db: AsyncSession = Depends(database.get_async_db),
+    assignment_year: Optional[int] = Depends(config.active_assignment_year_async),
 ):
     """Displays a form to create a new tip for a user in the latest assignment year."""
 
@@ -892,29 +1113,22 @@ async def create_tip_form(
         return RedirectResponse(url="/", status_code=302)
 
     # Get current user and generate context for template response
-    current_user = auth.get_current_user(db, access_token)
+    current_user = await auth.get_request_user_async(request, db, access_token)
 
     if not current_user:
         return RedirectResponse(url="/", status_code=302)
 
-    # Get the latest year in the assignments table
-    latest_year = db.query(func.max(models.Assignment.year)).scalar()
-
-    # Get the current assignment year
-    assignment_year = config.get_config(db)['assignment_year']
-    assignment_year = int(assignment_year) if assignment_year else latest_year
-
     # Get the participants from the latest assignment year
-    participants = db.query(models.User).join(
+    participants = (await db.execute(select(models.User).join(
         models.Assignment,
         models.User.id == models.Assignment.assignee_user_id
     ).filter(
         models.Assignment.year == assignment_year,
         models.Assignment.assignee_user_id != current_user.id  # Exclude current user
-    ).distinct().all()
+    ).distinct())).scalars().all()
 
     # Get the user's past tips
-    past_tips = tips.get_tips_for_contributor_user(db, current_user.id, assignment_year)
+    past_tips = await tips.get_tips_for_contributor_user_async(db, current_user.id, assignment_year)
 
     return templates.TemplateResponse("create_tip.html", {
         "request": request,
@@ -931,6 +1145,7 @@ async def create_tip(
     subject_user_id: int = Form(...),
     content: str = Form(...),
     db: Session = Depends(database.get_db),
+    assignment_year: Optional[int] = Depends(config.active_assignment_year),
 ):
     """Creates a new tip."""
 
@@ -938,14 +1153,7 @@ async def create_tip(
     access_token = request.session.get("access_token")
 
     # Get current user and generate context for template response
-    current_user = auth.get_current_user(db, access_token)
-
-    # Get the latest year in the assignments table
-    latest_year = db.query(func.max(models.Assignment.year)).scalar()
-
-    # Get the current assignment year
-    assignment_year = config.get_config(db)['assignment_year']
-    assignment_year = int(assignment_year) if assignment_year else latest_year
+    current_user = auth.get_request_user(request, db, access_token)
 
     # Construct the data model
     tip = schemas.TipCreate(content=content, subject_user_id=subject_user_id, year=assignment_year)
@@ -969,7 +1177,7 @@ async def delete_tip_route(
     access_token = request.session.get("access_token")
 
     # Get current user and generate context for template response
-    current_user = auth.get_current_user(db, access_token)
+    current_user = auth.get_request_user(request, db, access_token)
 
     try:
         tips.delete_tip(db, tip_id, current_user.id)
@@ -992,7 +1200,7 @@ async def update_tip_route(
     access_token = request.session.get("access_token")
 
     # Get current user and generate context for template response
-    current_user = auth.get_current_user(db, access_token)
+    current_user = auth.get_request_user(request, db, access_token)
 
     try:
         updated_tip = tips.update_tip(db, current_user.id, tip_id, content)
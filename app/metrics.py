@@ -0,0 +1,289 @@
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import os
+import time
+import bisect
+import logging
+import threading
+from abc import ABC, abstractmethod
+from distutils.util import strtobool
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# Serve /metrics without authentication to requests from the loopback interface
+METRICS_ALLOW_LOCALHOST = bool(strtobool(os.environ.get("METRICS_ALLOW_LOCALHOST", "True")))
+
+# Histogram buckets, in seconds
+REQUEST_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+POOL_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+EMAIL_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ASSIGNMENT_BUCKETS = (0.001, 0.01, 0.1, 0.5, 1.0, 5.0, 30.0, 120.0)
+
+# Adding logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape_label_value(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Metric(ABC):
+    """Base for in-process metrics: a name, help text and label names, with one lock per metric."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self.lock = threading.Lock()
+
+    def _key(self, labels: Dict) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    @abstractmethod
+    def samples(self) -> List[str]:
+        """The metric's sample lines in the exposition format."""
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"] + self.samples()
+
+
+class Counter(Metric):
+    """A monotonically increasing count per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        super().__init__(name, documentation, labels)
+        self.values = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def set(self, value: float, **labels):
+        """Set the value outright, for counts mirrored from a running total kept elsewhere."""
+        with self.lock:
+            self.values[self._key(labels)] = value
+
+    def samples(self) -> List[str]:
+        with self.lock:
+            values = sorted(self.values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}" for key, value in values]
+
+
+class Gauge(Counter):
+    """A value per label set that can go up and down."""
+
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    """Observations counted into cumulative buckets per label set, with their sum and count."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = (), buckets: Iterable[float] = REQUEST_LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        self.series = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self) -> List[str]:
+        with self.lock:
+            series = sorted((key, (list(counts), total, count)) for key, (counts, total, count) in self.series.items())
+
+        lines = []
+        for key, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {count}")
+        return lines
+
+
+# Every metric this process exports, in output order
+REGISTRY: List[Metric] = []
+
+
+def _register(metric):
+    REGISTRY.append(metric)
+    return metric
+
+
+http_requests_total = _register(Counter(
+    "http_requests_total", "HTTP requests handled, by route template, method and status.",
+    labels=("route", "method", "status")))
+http_request_duration_seconds = _register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency, by route template and method.",
+    labels=("route", "method"), buckets=REQUEST_LATENCY_BUCKETS))
+http_requests_in_flight = _register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled."))
+
+db_pool_checkouts_total = _register(Counter(
+    "db_pool_checkouts_total", "Connections checked out of the pool, by engine.", labels=("engine",)))
+db_pool_checkout_duration_seconds = _register(Histogram(
+    "db_pool_checkout_duration_seconds", "How long a connection stays checked out before it is returned, by engine.",
+    labels=("engine",), buckets=POOL_BUCKETS))
+db_pool_connections = _register(Gauge(
+    "db_pool_connections", "Pool connections at scrape time, by engine and state (checked_out, checked_in, overflow, size).",
+    labels=("engine", "state")))
+
+password_hash_workers = _register(Gauge(
+    "password_hash_workers", "Threads in the password hashing pool."))
+password_hash_queue_depth = _register(Gauge(
+    "password_hash_queue_depth", "Password hash and verify calls waiting for a pool thread."))
+password_hash_active = _register(Gauge(
+    "password_hash_active", "Password hash and verify calls running on the pool."))
+password_hash_completed_total = _register(Counter(
+    "password_hash_completed_total", "Password hash and verify calls completed on the pool."))
+
+email_sends_total = _register(Counter(
+    "email_sends_total", "Emails handed to SES, by send path (single or templated) and outcome (sent or failed).",
+    labels=("path", "outcome")))
+email_send_duration_seconds = _register(Histogram(
+    "email_send_duration_seconds", "SES API call latency, by send path.",
+    labels=("path",), buckets=EMAIL_LATENCY_BUCKETS))
+
+assignment_draws_total = _register(Counter(
+    "assignment_draws_total", "Assignment draws run by the engine, by outcome (assigned or infeasible).",
+    labels=("outcome",)))
+assignment_draw_duration_seconds = _register(Histogram(
+    "assignment_draw_duration_seconds", "Time the engine takes to draw assignments.",
+    buckets=ASSIGNMENT_BUCKETS))
+assignment_draw_participants = _register(Histogram(
+    "assignment_draw_participants", "Participants per assignment draw.",
+    buckets=(10, 50, 100, 500, 1000, 5000, 10000, 50000, 100000)))
+
+
+# Engines whose pool is reported at scrape time, by name
+_pools = {}
+
+# Returns the password pool snapshot (auth.password_pool_stats) at scrape time
+_password_pool_stats = None
+
+
+def instrument_pool(engine: Engine, name: str):
+    """
+    Count checkouts on the engine's pool and time how long each connection is held.
+    For an AsyncEngine pass its sync_engine.
+    """
+    _pools[name] = engine.pool
+
+    @event.listens_for(engine, "checkout")
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+        db_pool_checkouts_total.inc(engine=name)
+
+    @event.listens_for(engine, "checkin")
+    def checkin(dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop("checked_out_at", None)
+        if checked_out_at is not None:
+            db_pool_checkout_duration_seconds.observe(time.perf_counter() - checked_out_at, engine=name)
+
+
+def _collect_pool_stats():
+    for name, pool in _pools.items():
+        for state, method in (("checked_out", "checkedout"), ("checked_in", "checkedin"), ("overflow", "overflow"), ("size", "size")):
+            if hasattr(pool, method):
+                db_pool_connections.set(getattr(pool, method)(), engine=name, state=state)
+
+
+def instrument_password_pool(stats: Callable[[], Dict]):
+    """
+    Report the password hashing pool at scrape time. stats returns the snapshot from
+    auth.password_pool_stats (workers, queue_depth, active and completed).
+    """
+    global _password_pool_stats
+    _password_pool_stats = stats
+
+
+def _collect_password_pool_stats():
+    if _password_pool_stats is None:
+        return
+    stats = _password_pool_stats()
+    password_hash_workers.set(stats["workers"])
+    password_hash_queue_depth.set(stats["queue_depth"])
+    password_hash_active.set(stats["active"])
+    password_hash_completed_total.set(stats["completed"])
+
+
+def render_metrics() -> str:
+    """Every registered metric in the Prometheus text exposition format."""
+    _collect_pool_stats()
+    _collect_password_pool_stats()
+
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware that counts requests and records their latency per route template,
+    and tracks the number in flight. Requests that match no route are reported as "unmatched".
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_requests_in_flight.dec()
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            http_request_duration_seconds.observe(time.perf_counter() - started, route=route, method=scope["method"])
+            http_requests_total.inc(route=route, method=scope["method"], status=status_code)
+
+
+def is_local_request(host: Optional[str]) -> bool:
+    """Whether a client address is the loopback interface."""
+    return host in ("127.0.0.1", "::1", "localhost")
@@ -0,0 +1,91 @@
+from typing import Callable, List, Tuple
+import logging
+import datetime
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from app.models import SchemaMigration
+
+
+# Adding logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _add_assignment_year_index(connection: Connection):
+    """Index assignments by year, for the history lookback and active year lookups."""
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_assignments_year ON assignments (year)"))
+
+
+def _add_assignment_composite_indexes(connection: Connection):
+    """
+    One assignment per giver and per receiver each year, indexed for the page lookups.
+    Refuses to run while duplicates exist, since the unique indexes could not be built.
+    """
+    for column in ("assignee_user_id", "assigned_user_id"):
+        duplicates = connection.execute(text(
+            f"SELECT COUNT(*) FROM (SELECT 1 FROM assignments GROUP BY {column}, year HAVING COUNT(*) > 1)"
+        )).scalar()
+        if duplicates:
+            raise RuntimeError(
+                f"Cannot add unique index on assignments ({column}, year): "
+                f"{duplicates} duplicate groups exist. Remove the duplicates and restart."
+            )
+
+        connection.execute(text(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS uq_assignments_{column}_year ON assignments ({column}, year)"
+        ))
+
+
+def _add_tip_composite_indexes(connection: Connection):
+    """Index tips by contributor and by subject within a year."""
+    for column in ("contributor_user_id", "subject_user_id"):
+        connection.execute(text(f"CREATE INDEX IF NOT EXISTS ix_tips_{column}_year ON tips ({column}, year)"))
+
+
+# Applied in order, each at most once per database. Append new migrations; never reorder or rename.
+MIGRATIONS: List[Tuple[str, Callable[[Connection], None]]] = [
+    ("0001_assignments_year_index", _add_assignment_year_index),
+    ("0002_assignments_composite_indexes", _add_assignment_composite_indexes),
+    ("0003_tips_composite_indexes", _add_tip_composite_indexes),
+]
+
+
+def applied_migrations(connection: Connection) -> List[str]:
+    """Names of the migrations already recorded in this database."""
+    return [row.name for row in connection.execute(text("SELECT name FROM schema_migrations"))]
+
+
+def run_migrations(engine: Engine) -> List[str]:
+    """
+    Apply any pending migrations to an existing database.
+
+    create_all only adds missing tables, so indexes and constraints added to existing
+    tables reach production databases through here. Each migration runs in its own
+    transaction together with its schema_migrations record.
+
+    Args:
+        engine (Engine): SQLAlchemy engine of the database to migrate.
+
+    Returns:
+        List[str]: Names of the migrations applied by this call.
+    """
+    SchemaMigration.__table__.create(bind=engine, checkfirst=True)
+
+    with engine.connect() as connection:
+        already_applied = set(applied_migrations(connection))
+
+    applied = []
+    for name, migration in MIGRATIONS:
+        if name in already_applied:
+            continue
+
+        logger.info(f"Applying migration {name}.")
+        with engine.begin() as connection:
+            migration(connection)
+            connection.execute(
+                SchemaMigration.__table__.insert().values(name=name, applied_at=datetime.datetime.utcnow())
+            )
+        applied.append(name)
+
+    return applied
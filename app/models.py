@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Boolean, Integer, String, DateTime, ForeignKey, PrimaryKeyConstraint
+from sqlalchemy import Column, Boolean, Integer, String, DateTime, ForeignKey, PrimaryKeyConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy import UniqueConstraint, CheckConstraint
@@ -45,12 +45,38 @@ class AssignmentExclusion(Base):
     excluded = relationship("User", foreign_keys=[excluded_user_id])
 
 
+class ExclusionGroup(Base):
+    __tablename__ = "exclusion_groups"
+
+    # Members of a group (e.g. a household) may not draw each other. The group applies
+    # from start_year through end_year, or indefinitely while end_year is NULL, so it
+    # carries over without copying pair rows every year.
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String)
+    start_year = Column(Integer, nullable=False)
+    end_year = Column(Integer, nullable=True)
+    created_at = Column(DateTime)
+
+    members = relationship("ExclusionGroupMember", cascade="all, delete-orphan")
+
+
+class ExclusionGroupMember(Base):
+    __tablename__ = "exclusion_group_members"
+
+    group_id = Column(Integer, ForeignKey("exclusion_groups.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+
+    __table_args__ = (
+        PrimaryKeyConstraint('group_id', 'user_id'),
+    )
+
+
 class Assignment(Base):
     __tablename__ = "assignments"
 
     # Assignment attributes
     id = Column(Integer, primary_key=True, index=True)
-    year = Column(Integer)
+    year = Column(Integer, index=True)
     assigned_user_id = Column(Integer, ForeignKey("users.id"))
     assignee_user_id = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime)
@@ -58,6 +84,13 @@ class Assignment(Base):
     assigned_user = relationship("User", foreign_keys=[assigned_user_id])
     assignee_user = relationship("User", foreign_keys=[assignee_user_id])
 
+    # Pages look assignments up by giver or receiver within a year, and each
+    # participant gives and receives exactly once per year
+    __table_args__ = (
+        Index("uq_assignments_assignee_user_id_year", "assignee_user_id", "year", unique=True),
+        Index("uq_assignments_assigned_user_id_year", "assigned_user_id", "year", unique=True),
+    )
+
 
 class Tip(Base):
     __tablename__ = "tips"
@@ -73,6 +106,12 @@ class Tip(Base):
     subject_user = relationship("User", foreign_keys=[subject_user_id])
     contributor_user = relationship("User", foreign_keys=[contributor_user_id])
 
+    # Tips are listed by contributor or by subject within a year
+    __table_args__ = (
+        Index("ix_tips_contributor_user_id_year", "contributor_user_id", "year"),
+        Index("ix_tips_subject_user_id_year", "subject_user_id", "year"),
+    )
+
 
 class Config(Base):
     __tablename__ = "config"
@@ -91,3 +130,43 @@ class Config(Base):
         ),
     )
 
+
+class ConfigVersion(Base):
+    __tablename__ = "config_version"
+
+    # Single row, bumped on every config change so each process knows when its cached config is stale
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+class SchemaMigration(Base):
+    __tablename__ = "schema_migrations"
+
+    # One row per migration applied to this database
+    name = Column(String, primary_key=True)
+    applied_at = Column(DateTime)
+
+
+class OutboundEmail(Base):
+    __tablename__ = "outbound_emails"
+
+    # Outbox attributes
+    id = Column(Integer, primary_key=True, index=True)
+    dedup_key = Column(String, unique=True, nullable=True)
+    to_email = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    html_body = Column(String, nullable=False)
+
+    # Delivery state: pending -> sending -> sent, or failed once retries run out
+    status = Column(String, nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False)
+    last_error = Column(String, nullable=True)
+    message_id = Column(String, nullable=True)
+    created_at = Column(DateTime)
+    sent_at = Column(DateTime, nullable=True)
+
+    # The worker polls for due messages by status and time
+    __table_args__ = (
+        Index("ix_outbound_emails_status_next_attempt_at", "status", "next_attempt_at"),
+    )
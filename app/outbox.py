@@ -0,0 +1,186 @@
+from typing import Dict, Optional
+import os
+import random
+import logging
+import datetime
+import threading
+from sqlalchemy.orm import Session
+
+from app import database, emails
+from app.models import OutboundEmail
+
+
+# Outbox worker settings
+OUTBOX_BATCH_SIZE = int(os.environ.get("OUTBOX_BATCH_SIZE", 50))
+OUTBOX_POLL_INTERVAL_SECONDS = float(os.environ.get("OUTBOX_POLL_INTERVAL_SECONDS", 2))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get("OUTBOX_MAX_ATTEMPTS", 8))
+OUTBOX_BACKOFF_BASE_SECONDS = float(os.environ.get("OUTBOX_BACKOFF_BASE_SECONDS", 30))
+OUTBOX_BACKOFF_MAX_SECONDS = float(os.environ.get("OUTBOX_BACKOFF_MAX_SECONDS", 3600))
+
+# A claimed message that is not finished within the lease is handed to another worker
+OUTBOX_LEASE_SECONDS = float(os.environ.get("OUTBOX_LEASE_SECONDS", 300))
+
+# Adding logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def enqueue_email(db: Session, message: Dict, dedup_key: Optional[str] = None, commit: bool = True) -> OutboundEmail:
+    """
+    Queue an email for the outbox worker to send, and commit.
+
+    Args:
+        db (Session): SQLAlchemy database session.
+        message (Dict): Message with to_email, subject and html_body keys, as built by the emails module.
+        dedup_key (Optional[str]): Identifies the logical message. A second enqueue with the same key
+                                   returns the existing row instead of sending twice.
+        commit (bool): Commit the row. Pass False to only add it to the session, so it is saved
+                       in the same transaction as the change that triggered the email.
+
+    Returns:
+        OutboundEmail: The queued (or previously queued) outbox row.
+    """
+
+    # Skip messages that are already queued
+    if dedup_key:
+        existing = db.query(OutboundEmail).filter(OutboundEmail.dedup_key == dedup_key).first()
+        if existing:
+            logger.info(f"Email already queued for dedup key {dedup_key}. Skipping.")
+            return existing
+
+    now = datetime.datetime.utcnow()
+    outbound_email = OutboundEmail(
+        dedup_key=dedup_key,
+        to_email=message["to_email"],
+        subject=message["subject"],
+        html_body=message["html_body"],
+        status="pending",
+        attempts=0,
+        next_attempt_at=now,
+        created_at=now
+    )
+    db.add(outbound_email)
+    if commit:
+        db.commit()
+        db.refresh(outbound_email)
+
+    return outbound_email
+
+
+def retry_delay(attempts: int) -> datetime.timedelta:
+    """
+    Exponential backoff with jitter before the next attempt of a failed message.
+    """
+    delay = min(OUTBOX_BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), OUTBOX_BACKOFF_MAX_SECONDS)
+    return datetime.timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def claim_due_emails(db: Session, batch_size: int = OUTBOX_BATCH_SIZE):
+    """
+    Claim a batch of due messages for this worker.
+
+    Each row is moved from pending to sending with a conditional update, so a row
+    is only ever claimed by one worker even when several poll the same table.
+    Rows stuck in sending past their lease (a worker died mid-send) become due again.
+    """
+    now = datetime.datetime.utcnow()
+
+    candidate_ids = [row.id for row in db.query(OutboundEmail.id).filter(
+        OutboundEmail.status.in_(["pending", "sending"]),
+        OutboundEmail.next_attempt_at <= now
+    ).order_by(OutboundEmail.id).limit(batch_size).all()]
+
+    lease_expiry = now + datetime.timedelta(seconds=OUTBOX_LEASE_SECONDS)
+    claimed_ids = []
+    for candidate_id in candidate_ids:
+        claimed = db.query(OutboundEmail).filter(
+            OutboundEmail.id == candidate_id,
+            OutboundEmail.status.in_(["pending", "sending"]),
+            OutboundEmail.next_attempt_at <= now
+        ).update({"status": "sending", "next_attempt_at": lease_expiry}, synchronize_session=False)
+        if claimed:
+            claimed_ids.append(candidate_id)
+    db.commit()
+
+    if not claimed_ids:
+        return []
+
+    return db.query(OutboundEmail).filter(OutboundEmail.id.in_(claimed_ids)).order_by(OutboundEmail.id).all()
+
+
+def process_outbox(db: Session, batch_size: int = OUTBOX_BATCH_SIZE) -> int:
+    """
+    Send one batch of due messages and record the outcome of each.
+
+    Returns:
+        int: Number of messages processed in this batch.
+    """
+    batch = claim_due_emails(db, batch_size)
+    if not batch:
+        return 0
+
+    results = emails.send_bulk_emails([
+        {"to_email": row.to_email, "subject": row.subject, "html_body": row.html_body}
+        for row in batch
+    ])
+
+    now = datetime.datetime.utcnow()
+    for row, result in zip(batch, results):
+        row.attempts += 1
+
+        if result["status"] == "sent":
+            row.status = "sent"
+            row.message_id = result["message_id"]
+            row.sent_at = now
+            row.last_error = None
+
+        elif row.attempts >= OUTBOX_MAX_ATTEMPTS:
+            row.status = "failed"
+            row.last_error = "Send failed; giving up after maximum attempts"
+            logger.error(f"Giving up on outbound email {row.id} to {row.to_email} after {row.attempts} attempts.")
+
+        else:
+            row.status = "pending"
+            row.last_error = "Send failed"
+            row.next_attempt_at = now + retry_delay(row.attempts)
+
+    db.commit()
+
+    return len(batch)
+
+
+def run_worker(stop_event: threading.Event = None, poll_interval: float = OUTBOX_POLL_INTERVAL_SECONDS):
+    """
+    Drain the outbox until stopped, sleeping between polls when the queue is empty.
+    """
+    stop_event = stop_event or threading.Event()
+    logger.info("Outbox worker started.")
+
+    while not stop_event.is_set():
+        db = database.SessionLocal()
+        try:
+            processed = process_outbox(db)
+        except Exception as e:
+            logger.error(f"Outbox worker error: {e}")
+            db.rollback()
+            processed = 0
+        finally:
+            db.close()
+
+        # Keep draining while there is a backlog, otherwise wait for the next poll
+        if not processed:
+            stop_event.wait(poll_interval)
+
+    logger.info("Outbox worker stopped.")
+
+
+def start_background_worker() -> threading.Event:
+    """
+    Run the outbox worker on a daemon thread inside this process.
+
+    Returns:
+        threading.Event: Set it to stop the worker.
+    """
+    stop_event = threading.Event()
+    threading.Thread(target=run_worker, args=(stop_event,), name="outbox-worker", daemon=True).start()
+    return stop_event
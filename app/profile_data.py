@@ -0,0 +1,90 @@
+from typing import Dict
+import os
+import math
+import logging
+from sqlalchemy import desc, exists, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+
+from app import snake_assignments, tips
+from app.models import User, Assignment
+
+
+# Users shown per page in the admin panel
+ADMIN_USERS_PAGE_SIZE = int(os.environ.get("ADMIN_USERS_PAGE_SIZE", 100))
+
+# Adding logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def profile_summary_query(user_id: int, year: int, include_user_count: bool = False):
+    """
+    The profile page's scalar checks as one statement: whether assignments exist for the
+    year, the tip count for the user's current assignment and, for admins, the user count.
+    """
+    columns = [
+        exists().where(Assignment.year == year).label("assignments_exist_for_year"),
+        tips.count_tips_for_current_assignment_query(user_id, year).scalar_subquery().label("number_of_tips"),
+    ]
+    if include_user_count:
+        columns.append(select(func.count(User.id)).scalar_subquery().label("user_count"))
+
+    return select(*columns)
+
+
+async def load_profile(db: AsyncSession, user: User, year: int, users_page: int = 1) -> Dict:
+    """
+    Assemble the profile page data in a fixed number of queries: two for a participant,
+    four for an admin, however many assignments or users there are.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+        user (User): The current user.
+        year (int): The active assignment year.
+        users_page (int): Page of the admin user list, starting at 1.
+
+    Returns:
+        Dict: assignments (with assigned users loaded), assignments_exist_for_year, number_of_tips,
+              and for admins all_users (one page), current_exclusions and users_pagination.
+    """
+
+    # The user's assignments, with each assigned user joined in rather than lazy loaded per row
+    assignments = (await db.execute(
+        select(Assignment).filter(
+            Assignment.assignee_user_id == user.id
+        ).options(
+            joinedload(Assignment.assigned_user)
+        ).order_by(desc(Assignment.year))
+    )).scalars().all()
+
+    summary = (await db.execute(profile_summary_query(user.id, year, include_user_count=user.is_admin))).one()
+
+    profile = {
+        "assignments": assignments,
+        "assignments_exist_for_year": bool(summary.assignments_exist_for_year),
+        "number_of_tips": summary.number_of_tips or 0,
+        "all_users": [],
+        "current_exclusions": None,
+        "users_pagination": None,
+    }
+
+    if not user.is_admin:
+        return profile
+
+    # One page of users for the admin panel
+    pages = max(1, math.ceil(summary.user_count / ADMIN_USERS_PAGE_SIZE))
+    users_page = min(max(1, users_page), pages)
+    profile["all_users"] = (await db.execute(
+        select(User).order_by(User.id).limit(ADMIN_USERS_PAGE_SIZE).offset((users_page - 1) * ADMIN_USERS_PAGE_SIZE)
+    )).scalars().all()
+    profile["users_pagination"] = {
+        "page": users_page,
+        "pages": pages,
+        "page_size": ADMIN_USERS_PAGE_SIZE,
+        "total": summary.user_count,
+    }
+
+    profile["current_exclusions"] = await snake_assignments.fetch_exclusions_async(db, year)
+
+    return profile
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr, Field, constr
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 
 class UserBase(BaseModel):
@@ -90,8 +90,45 @@ class ExclusionCreate(BaseModel):
     year: int
     giver_id: int
     excluded_receivers: List[int]
+
+
+class ExclusionBulkUpdate(BaseModel):
+    """
+    A year's exclusion graph: explicit giver -> excluded receivers edges, plus households
+    whose members may not draw each other. With replace, the graph becomes the year's
+    complete exclusion list; otherwise its edges are added to the existing ones.
+    """
+    year: int
+    exclusions: Dict[int, List[int]] = {}
+    households: List[List[int]] = []
+    replace: bool = True
+
+
+class ExclusionDiff(BaseModel):
+    """
+    Summary of an exclusion graph update, with the [giver, excluded] pairs that changed.
+    """
+    year: int
+    added: List[List[int]]
+    removed: List[List[int]]
+    unchanged: int
+    total: int
     
 
+class ExclusionGroupCreate(BaseModel):
+    """
+    A group whose members may not draw each other, from start_year on (through end_year if set).
+    """
+    name: str
+    members: List[int] = Field(..., min_items=2)
+    start_year: int
+    end_year: Optional[int] = None
+
+
+class ExclusionGroup(ExclusionGroupCreate):
+    id: int
+
+
 class AssignmentBase(BaseModel):
     """
     Serves as the foundation for assignment-related data models.
@@ -127,6 +164,19 @@ class Assignment(AssignmentBase):
         orm_mode = True
 
 
+class AssignmentFeasibility(BaseModel):
+    """
+    Result of checking whether a valid assignment exists for a year's participants and rules.
+    Blocking givers have too few receivers they may draw between them; blocking receivers
+    can be drawn by too few givers. Both lists are empty when the assignment is feasible.
+    """
+    year: int
+    feasible: bool
+    participant_count: int
+    blocking_givers: List[int]
+    blocking_receivers: List[int]
+
+
 class TipBase(BaseModel):
     """
     Serves as the foundation for tip-related data models.
@@ -174,3 +224,7 @@ class TokenData(BaseModel):
 
 class AssignmentYearUpdate(BaseModel):
     assignment_year: int
+
+
+class AssignmentHistoryYearsUpdate(BaseModel):
+    assignment_history_years: int = Field(..., ge=0)
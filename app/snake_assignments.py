@@ -1,14 +1,20 @@
-from typing import List, Dict
+from typing import List, Dict, Optional, Set, Tuple, Union
+import time
 import logging
 import datetime
-import random
+import numpy as np
+from sqlalchemy import bindparam, delete, insert, or_, select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.emails import send_assignment_email
+from app import assignment_engine, config, dashboard, emails, metrics
+from app.emails import build_assignment_emails, send_bulk_emails
 from app.models import (
     User,
     Assignment,
-    AssignmentExclusion
+    AssignmentExclusion,
+    ExclusionGroup,
+    ExclusionGroupMember
 )
 
 
@@ -17,13 +23,18 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def fetch_exclusions(db: Session, year: int) -> Dict[int, List[int]]:
+def fetch_exclusions(db: Session, year: int, include_groups: bool = True) -> Dict[int, List[int]]:
     """
     Fetches the exclusion list for a given year from the database.
+
+    Explicit exclusion rows are combined with the exclusion groups active that year,
+    compiled into pairs on the fly, so a household never needs k^2 rows per year.
+    The draw itself passes the groups to build_forbidden_index instead (include_groups=False).
     
     Args:
         db (Session): SQLAlchemy database session.
         year (int): The year for which to fetch exclusions.
+        include_groups (bool): Include the pairs implied by exclusion groups.
 
     Returns:
         Dict[int, List[int]]: A dictionary where keys are giver IDs and values are lists of excluded receiver IDs.
@@ -35,108 +46,337 @@ def fetch_exclusions(db: Session, year: int) -> Dict[int, List[int]]:
         if exclusion.giver_user_id not in exclusion_dict:
             exclusion_dict[exclusion.giver_user_id] = []
         exclusion_dict[exclusion.giver_user_id].append(exclusion.excluded_user_id)
-    
+
+    if not include_groups:
+        return exclusion_dict
+
+    groups = fetch_exclusion_groups(db, year)
+    if not groups:
+        return exclusion_dict
+
+    # Fold the groups into the explicit exclusions as sets, converting to lists once at the end
+    merged = {giver: set(receivers) for giver, receivers in exclusion_dict.items()}
+    for group in groups:
+        members = set(group)
+        for giver in members:
+            merged.setdefault(giver, set()).update(members)
+
+    return {giver: sorted(receivers - {giver}) for giver, receivers in merged.items()}
+
+
+def active_in_year(year: int):
+    """Filter clauses selecting the exclusion groups in effect for the year."""
+    return (
+        ExclusionGroup.start_year <= year,
+        or_(ExclusionGroup.end_year.is_(None), ExclusionGroup.end_year >= year)
+    )
+
+
+def active_exclusion_groups_query(year: int):
+    """(group ID, user ID) rows of every exclusion group in effect for the year."""
+    return select(ExclusionGroupMember.group_id, ExclusionGroupMember.user_id).join(
+        ExclusionGroup, ExclusionGroup.id == ExclusionGroupMember.group_id
+    ).filter(
+        *active_in_year(year)
+    ).order_by(ExclusionGroupMember.group_id, ExclusionGroupMember.user_id)
+
+
+def fetch_exclusion_groups(db: Session, year: int) -> List[List[int]]:
+    """
+    Fetches the member IDs of each exclusion group in effect for a given year, in one query.
+    """
+    groups = {}
+    for group_id, user_id in db.execute(active_exclusion_groups_query(year)):
+        groups.setdefault(group_id, []).append(user_id)
+
+    return list(groups.values())
+
+
+async def fetch_exclusions_async(db: AsyncSession, year: int) -> Dict[int, List[int]]:
+    """
+    Fetches the explicit exclusion list for a given year without blocking the event loop.
+    Exclusion groups are not included, since this is the list the admin panel edits.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+        year (int): The year for which to fetch exclusions.
+
+    Returns:
+        Dict[int, List[int]]: A dictionary where keys are giver IDs and values are lists of excluded receiver IDs.
+    """
+    result = await db.execute(
+        select(AssignmentExclusion.giver_user_id, AssignmentExclusion.excluded_user_id).filter(
+            AssignmentExclusion.year == year
+        )
+    )
+
+    exclusion_dict = {}
+    for giver_user_id, excluded_user_id in result:
+        exclusion_dict.setdefault(giver_user_id, []).append(excluded_user_id)
+
     return exclusion_dict
 
 
+def expand_exclusion_graph(
+    exclusions: Dict[int, List[int]],
+    households: List[List[int]]
+) -> Set[Tuple[int, int]]:
+    """
+    Flattens explicit exclusions and households into (giver, excluded) pairs.
+    Every member of a household excludes every other member; self pairs are dropped.
+    """
+    pairs = {
+        (giver, excluded)
+        for giver, excluded_receivers in exclusions.items()
+        for excluded in excluded_receivers
+    }
+    for household in households:
+        pairs.update((giver, excluded) for giver in household for excluded in household)
+
+    return {(giver, excluded) for giver, excluded in pairs if giver != excluded}
+
+
+def apply_exclusion_graph(db: Session, year: int, pairs: Set[Tuple[int, int]], replace: bool = True) -> Dict:
+    """
+    Applies an exclusion graph for a year in one transaction, using one executemany
+    each for the deletes and the inserts, however many pairs change.
+
+    Args:
+        db (Session): SQLAlchemy database session.
+        year (int): The year the exclusions apply to.
+        pairs (Set[Tuple[int, int]]): (giver, excluded) pairs of the new graph.
+        replace (bool): Remove the year's existing pairs that are not in the graph.
+
+    Returns:
+        Dict: The pairs added and removed, and the counts of unchanged and total pairs.
+    """
+    existing = set(db.execute(
+        select(AssignmentExclusion.giver_user_id, AssignmentExclusion.excluded_user_id).filter(
+            AssignmentExclusion.year == year
+        )
+    ).all())
+
+    added = sorted(pairs - existing)
+    removed = sorted(existing - pairs) if replace else []
+
+    if removed:
+        db.execute(
+            delete(AssignmentExclusion).where(
+                AssignmentExclusion.year == year,
+                AssignmentExclusion.giver_user_id == bindparam("giver"),
+                AssignmentExclusion.excluded_user_id == bindparam("excluded")
+            ).execution_options(synchronize_session=False),
+            [{"giver": giver, "excluded": excluded} for giver, excluded in removed]
+        )
+    if added:
+        db.execute(
+            insert(AssignmentExclusion),
+            [{"year": year, "giver_user_id": giver, "excluded_user_id": excluded} for giver, excluded in added]
+        )
+    db.commit()
+
+    return {
+        "year": year,
+        "added": [list(pair) for pair in added],
+        "removed": [list(pair) for pair in removed],
+        "unchanged": len(existing & pairs),
+        "total": len(existing) + len(added) - len(removed),
+    }
+
+
+def build_forbidden_index(
+    participants: List[int],
+    previous_assignments: Dict[int, Union[int, List[int]]],
+    exclusion_list: Dict[int, List[int]],
+    exclusion_groups: Optional[List[List[int]]] = None
+) -> Tuple[List[int], assignment_engine.EligibilityMatrix]:
+    """
+    Translates the assignment rules into an eligibility matrix over participant positions.
+
+    Args:
+        participants (List[int]): A list of all participant IDs.
+        previous_assignments (Dict[int, Union[int, List[int]]]): Giver IDs mapped to their previous
+                                                                 receiver ID, or to a list of receiver IDs
+                                                                 when several years are excluded.
+        exclusion_list (Dict[int, List[int]]): Giver IDs mapped to lists of receiver IDs to exclude.
+        exclusion_groups (Optional[List[List[int]]]): Member IDs of each exclusion group; no member
+                                                      may draw another member of the same group.
+
+    Returns:
+        Tuple[List[int], EligibilityMatrix]: The de-duplicated participant IDs, and the
+                                             matrix built once over their positions.
+    """
+
+    # Drop duplicate participant IDs, keeping the original order
+    participants = list(dict.fromkeys(participants))
+    position = {participant: index for index, participant in enumerate(participants)}
+
+    # Rule 1: A user cannot be assigned to themselves
+    givers = list(range(len(participants)))
+    receivers = list(range(len(participants)))
+
+    # Rule 2: A user cannot be assigned to a recipient from the lookback window
+    for giver, previous_receivers in previous_assignments.items():
+        if giver not in position:
+            continue
+        if isinstance(previous_receivers, int):
+            previous_receivers = [previous_receivers]
+        for previous_receiver in previous_receivers:
+            if previous_receiver in position:
+                givers.append(position[giver])
+                receivers.append(position[previous_receiver])
+
+    # Rule 3: A user cannot be assigned to anyone on their exclusion list
+    for giver, excluded_receivers in exclusion_list.items():
+        if giver not in position:
+            continue
+        for excluded_receiver in excluded_receivers:
+            if excluded_receiver in position:
+                givers.append(position[giver])
+                receivers.append(position[excluded_receiver])
+
+    # Rule 4: Members of an exclusion group cannot draw each other. Each group's k x k block of
+    # pairs is built with numpy rather than expanded in Python
+    giver_blocks, receiver_blocks = [np.array(givers, dtype=np.int64)], [np.array(receivers, dtype=np.int64)]
+    for group in exclusion_groups or ():
+        members = np.array([position[member] for member in set(group) if member in position], dtype=np.int64)
+        giver_blocks.append(np.repeat(members, members.size))
+        receiver_blocks.append(np.tile(members, members.size))
+
+    matrix = assignment_engine.EligibilityMatrix(len(participants), np.concatenate(giver_blocks), np.concatenate(receiver_blocks))
+
+    return participants, matrix
+
+
 def create_assignments(
     participants: List[int],
-    previous_assignments: Dict[int, int],
-    exclusion_list: Dict[int, List[int]]
+    previous_assignments: Dict[int, Union[int, List[int]]],
+    exclusion_list: Dict[int, List[int]],
+    exclusion_groups: Optional[List[List[int]]] = None,
+    rng: Optional[np.random.Generator] = None
 ):
     """
     Randomly assigns participants to each other, avoiding self-assignment,
     previous year's assignments, and specific exclusions.
+
+    The draw is a random permutation repaired with bipartite matching, so a valid
+    assignment is always found when one exists and infeasibility is reported
+    without retrying.
     
     Args:
         participants (List[int]): A list of all participant IDs.
-        previous_assignments (Dict[int, int]): A dictionary where keys are giver IDs
-                                                and values are the receiver IDs from the previous year.
+        previous_assignments (Dict[int, Union[int, List[int]]]): A dictionary where keys are giver IDs
+                                                and values are the receiver ID from the previous year,
+                                                or a list of receiver IDs from the lookback window.
         exclusion_list (Dict[int, List[int]]): A dictionary where keys are giver IDs
                                                 and values are lists of receiver IDs to exclude.
+        exclusion_groups (Optional[List[List[int]]]): Member IDs of each exclusion group in effect.
+        rng (Optional[np.random.Generator]): Random source for the draw, for reproducible results.
 
     Returns:
-        Dict[int, int]: A dictionary of the new assignments, or None if a valid
-                        assignment could not be created after multiple attempts.
+        Dict[int, int]: A dictionary of the new assignments, or None if no valid
+                        assignment exists for these rules.
     """
-    
-    # Initialize assignments and set a maximum number of attempts
-    assignments = {}
-    max_attempts = 100
-    
-    for _ in range(max_attempts):
-
-        # Initialize assignments dictionary
-        assignments = {}
-
-        # Create set of available receivers
-        available_receivers = set(participants)
-
-        # Shuffle the participants to ensure a more random assignment order
-        shuffled_participants = participants.copy()
-        random.shuffle(shuffled_participants)
-
-        try:
-            for giver in shuffled_participants:
-
-                # Start with all available receivers
-                possible_receivers = available_receivers.copy()
-
-                # Rule 1: A user cannot be assigned to themselves
-                if giver in possible_receivers:
-                    possible_receivers.remove(giver)
-
-                # Rule 2: A user cannot be assigned to their previous year's recipient
-                if giver in previous_assignments and previous_assignments[giver] in possible_receivers:
-                    possible_receivers.remove(previous_assignments[giver])
-
-                # Rule 3: A user cannot be assigned to anyone on their exclusion list
-                if giver in exclusion_list:
-                    for excluded_receiver in exclusion_list[giver]:
-                        if excluded_receiver in possible_receivers:
-                            possible_receivers.remove(excluded_receiver)
-                
-                # If there are no valid receivers, this attempt has failed. Break and try again.
-                if not possible_receivers:
-                    raise ValueError("No valid receivers for a participant. Retrying assignment.")
-                
-                # Randomly select a receiver from the remaining valid options
-                receiver = random.choice(list(possible_receivers))
-                assignments[giver] = receiver
-                available_receivers.remove(receiver)
-            
-            # If the loop completes successfully, a valid assignment has been found.
-            return assignments
-
-        except ValueError:
-            # An attempt failed, so the loop will continue to the next iteration.
-            continue
-    
-    # If all attempts fail, return None to indicate an impossible assignment scenario.
-    return None
 
+    started = time.perf_counter()
 
-def assign_secret_snakes(db: Session, participants: List[int], year: int):
+    # Build the eligibility matrix once, up front
+    participants, matrix = build_forbidden_index(participants, previous_assignments, exclusion_list, exclusion_groups)
+
+    # Sample a random permutation that respects every rule
+    receiver_of = assignment_engine.random_perfect_matching(matrix, rng)
 
-    # Query for prior year assignments
-    previous_assignments = db.query(Assignment).filter(Assignment.year == year - 1).all()
+    metrics.assignment_draw_duration_seconds.observe(time.perf_counter() - started)
+    metrics.assignment_draw_participants.observe(len(participants))
+    metrics.assignment_draws_total.inc(outcome="infeasible" if receiver_of is None else "assigned")
 
-    # Format previous assignments as dictionary
-    # Key: assignee user id, Value: assigned user id
-    prev_assign_dict = {
-        previous_assignment.assignee_user_id: previous_assignment.assigned_user_id for previous_assignment in
-        previous_assignments
+    # No valid permutation exists for these rules
+    if receiver_of is None:
+        return None
+
+    return {participants[giver]: participants[receiver] for giver, receiver in enumerate(receiver_of.tolist())}
+
+
+def check_feasibility(
+    participants: List[int],
+    previous_assignments: Dict[int, Union[int, List[int]]],
+    exclusion_list: Dict[int, List[int]],
+    exclusion_groups: Optional[List[List[int]]] = None
+) -> Dict:
+    """
+    Checks whether any valid assignment exists, without drawing one.
+
+    Runs a single maximum matching over the same rules as create_assignments and, when it
+    falls short, reports the participants that violate Hall's condition.
+
+    Args:
+        participants (List[int]): A list of all participant IDs.
+        previous_assignments (Dict[int, Union[int, List[int]]]): Giver IDs mapped to previous receiver IDs.
+        exclusion_list (Dict[int, List[int]]): Giver IDs mapped to lists of receiver IDs to exclude.
+        exclusion_groups (Optional[List[List[int]]]): Member IDs of each exclusion group in effect.
+
+    Returns:
+        Dict: feasible flag, participant count, and the blocking giver and receiver IDs.
+    """
+    participants, matrix = build_forbidden_index(participants, previous_assignments, exclusion_list, exclusion_groups)
+    blocking_givers, blocking_receivers = assignment_engine.find_hall_violators(matrix)
+
+    return {
+        "feasible": not blocking_givers.size and not blocking_receivers.size,
+        "participant_count": len(participants),
+        "blocking_givers": [participants[giver] for giver in blocking_givers.tolist()],
+        "blocking_receivers": [participants[receiver] for receiver in blocking_receivers.tolist()],
     }
 
-    # Query for current year's exclusion list
-    exclusions = fetch_exclusions(db, year)
+
+def get_history_lookback_years(db: Session) -> int:
+    """
+    Number of previous years whose pairings may not be repeated, from the config table.
+    """
+    return int(config.get_config(db).get("assignment_history_years", config.DEFAULT_ASSIGNMENT_HISTORY_YEARS))
+
+
+def fetch_previous_assignments(db: Session, year: int, lookback_years: int = 1) -> Dict[int, List[int]]:
+    """
+    Fetches the assignments from the lookback window before a year in a single query.
+
+    Args:
+        db (Session): SQLAlchemy database session.
+        year (int): The year being assigned.
+        lookback_years (int): How many previous years to include (year - lookback_years to year - 1).
+
+    Returns:
+        Dict[int, List[int]]: Key: assignee user id, Value: assigned user ids within the window
+    """
+    if lookback_years < 1:
+        return {}
+
+    previous_assignments = db.query(Assignment.assignee_user_id, Assignment.assigned_user_id).filter(
+        Assignment.year.between(year - lookback_years, year - 1)
+    ).all()
+
+    prev_assign_dict = {}
+    for assignee_user_id, assigned_user_id in previous_assignments:
+        prev_assign_dict.setdefault(assignee_user_id, []).append(assigned_user_id)
+
+    return prev_assign_dict
+
+
+def assign_secret_snakes(db: Session, participants: List[int], year: int):
+
+    # Query for assignments within the configured lookback window
+    prev_assign_dict = fetch_previous_assignments(db, year, get_history_lookback_years(db))
+
+    # Query for current year's exclusion list and the exclusion groups in effect
+    exclusions = fetch_exclusions(db, year, include_groups=False)
+    exclusion_groups = fetch_exclusion_groups(db, year)
         
     # Create assignments
-    assignments = create_assignments(participants, prev_assign_dict, exclusions)
+    assignments = create_assignments(participants, prev_assign_dict, exclusions, exclusion_groups)
 
     # If assignments could not be created, log an error and return None
     if assignments is None:
-        logger.error("Failed to create valid assignments after multiple attempts.")
+        logger.error("No valid assignments exist for the given participants and rules.")
         return None
 
     # Save assignments to database
@@ -150,29 +390,56 @@ def assign_secret_snakes(db: Session, participants: List[int], year: int):
         db.add(new_assignment)
     db.commit()
 
+    # The active year may fall back to the latest assignment year
+    config.invalidate_active_assignment_year(db)
+    dashboard.invalidate_dashboard_cache()
+
     # Send email notifications to participants about their assignments
     send_email_notifications(assignments, year, db)
 
     return assignments
 
 
-def send_email_notifications(assignments: Dict[int, int], year: int, db: Session):
+def send_email_notifications(
+        assignments: Dict[int, int],
+        year: int,
+        db: Session,
+        templated: Optional[bool] = None
+) -> List[Dict]:
     """
     Send email notifications to participants about their assignments
+
+    All participants are loaded in one query. By default every body is rendered from the
+    one compiled assignment template and the emails go out through the bulk dispatcher,
+    which reuses one SES client and sends concurrently. With templated (SES_BULK_TEMPLATED
+    by default), they are instead sent through a stored SES template, 50 per API call.
+
+    Returns:
+        List[Dict]: Per-recipient results from emails.send_bulk_emails
     """
 
+    # Query for every participant at once
+    users = db.query(User).filter(User.id.in_(set(assignments) | set(assignments.values()))).all()
+    users_by_id = {user.id: user for user in users}
+
+    subject = f"Your Secret Snakes Assignment for {year}"
+
+    recipients = []
     for assignee_user_id, assigned_user_id in assignments.items():
 
-        try:
+        assignee_user = users_by_id.get(assignee_user_id)
+        assigned_user = users_by_id.get(assigned_user_id)
 
-            # Query for assignee user to get their email
-            assignee_user = db.query(User).get(assignee_user_id)
-            assignee_email = assignee_user.email
+        if assignee_user is None or assigned_user is None:
+            # Log any participants missing from the users table
+            logger.warning(f"Error retrieving user data. Assignee ID: {assignee_user_id}, Assigned ID: {assigned_user_id}, Year: {year}")
+            continue
 
-            # Query for assigned user to get their username and shipping info
-            assigned_user = db.query(User).get(assigned_user_id)
-            assigned_username = assigned_user.username
-            assigned_user_shipping_info = {
+        # Collect the assigned user's username and shipping info
+        recipients.append({
+            "to_email": assignee_user.email,
+            "assigned_username": assigned_user.username,
+            "shipping_info": {
                 "first_name": assigned_user.first_name,
                 "last_name": assigned_user.last_name,
                 "street_address": assigned_user.shipping_street_address,
@@ -180,21 +447,13 @@ def send_email_notifications(assignments: Dict[int, int], year: int, db: Session
                 "city": assigned_user.shipping_city,
                 "zipcode": assigned_user.shipping_zipcode,
                 "state": assigned_user.shipping_state,
-            }
+            },
+        })
 
-        except Exception as e:
-            # Log any errors that occur during the query
-            logger.warning(f"Error retrieving user data. Assignee ID: {assignee_user_id}, Assigned ID: {assigned_user_id}, Year: {year}")
-            logger.warning(f"Error retrieving user data for assignment: {e}")
-            continue
+    if templated is None:
+        templated = emails.SES_BULK_TEMPLATED
 
-        # to_email, assigned_username, shipping_info, subject=
-        subject = f"Your Secret Snakes Assignment for {year}"
+    if templated:
+        return emails.send_assignment_emails_templated(recipients, subject=subject)
 
-        # Pass collected data to the placeholder email sending function
-        send_assignment_email(
-            to_email=assignee_email,
-            assigned_username=assigned_username,
-            shipping_info=assigned_user_shipping_info,
-            subject=subject
-        )
+    return send_bulk_emails(build_assignment_emails(recipients, subject=subject))
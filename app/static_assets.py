@@ -0,0 +1,199 @@
+from typing import Dict, Optional, Set
+import os
+import gzip
+import hashlib
+import logging
+import mimetypes
+from distutils.util import strtobool
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+# Brotli is optional; without it only gzip variants are built
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+
+# Fingerprinted URLs change whenever their content does, so browsers may cache them for good
+STATIC_MAX_AGE = int(os.environ.get("STATIC_MAX_AGE", 31536000))
+IMMUTABLE_CACHE_CONTROL = f"public, max-age={STATIC_MAX_AGE}, immutable"
+
+# Plain URLs (bookmarked favicons, old pages) are revalidated against the ETag on every use
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# Build gzip (and, with brotli installed, br) variants of text assets at startup
+STATIC_PRECOMPRESS = bool(strtobool(os.environ.get("STATIC_PRECOMPRESS", "True")))
+COMPRESSIBLE_EXTENSIONS = {".css", ".js", ".map", ".json", ".svg", ".txt", ".html", ".ico"}
+
+# A variant is only kept when it is at least this much smaller than the original
+MIN_COMPRESSION_SAVING = 0.1
+
+# Hex digits of the content hash in a fingerprinted file name, e.g. css/styles.3f2a9c1b0d4e.css
+FINGERPRINT_LENGTH = 12
+
+# Adding logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def fingerprint_path(path: str, digest: str) -> str:
+    """Insert the start of the content hash before the file extension."""
+    root, extension = os.path.splitext(path)
+    return f"{root}.{digest[:FINGERPRINT_LENGTH]}{extension}"
+
+
+def compress(content: bytes, encoding: str) -> bytes:
+    """Compress with the strongest settings; this runs once per asset, not per request."""
+    if encoding == "br":
+        return brotli.compress(content, quality=11)
+    return gzip.compress(content, compresslevel=9, mtime=0)
+
+
+def accepted_encodings(accept_encoding: str) -> Set[str]:
+    """
+    The content codings an Accept-Encoding header allows, leaving out any given q=0.
+
+    Args:
+        accept_encoding (str): The request's Accept-Encoding header, e.g. "gzip, deflate, br;q=0.9".
+
+    Returns:
+        Set[str]: Lower-cased coding names.
+    """
+    accepted = set()
+    for item in accept_encoding.split(","):
+        name, _, parameters = item.partition(";")
+        quality = 1.0
+        for parameter in parameters.split(";"):
+            key, _, value = parameter.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name.strip() and quality > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+class StaticAsset:
+    """A file under the static directory with its fingerprinted path, ETag and compressed variants."""
+
+    def __init__(self, path: str, full_path: str, content: bytes):
+        digest = hashlib.sha256(content).hexdigest()
+        self.path = path
+        self.full_path = full_path
+        self.fingerprinted_path = fingerprint_path(path, digest)
+        self.etag = digest[:32]
+        self.media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        self.size = len(content)
+        self.variants: Dict[str, bytes] = {}
+
+    def precompress(self, content: bytes, encodings=("br", "gzip")):
+        for encoding in encodings:
+            if encoding == "br" and brotli is None:
+                continue
+            compressed = compress(content, encoding)
+            if len(compressed) <= len(content) * (1 - MIN_COMPRESSION_SAVING):
+                self.variants[encoding] = compressed
+
+    def negotiate(self, accept_encoding: str) -> Optional[str]:
+        """The smallest variant the client accepts, or None for the original file."""
+        accepted = accepted_encodings(accept_encoding)
+        candidates = [encoding for encoding in self.variants if encoding in accepted]
+        return min(candidates, key=lambda encoding: len(self.variants[encoding])) if candidates else None
+
+
+class FingerprintedStaticFiles(StaticFiles):
+    """
+    StaticFiles that also serves every file under a content-hashed name with an immutable
+    Cache-Control header, and precompressed gzip/br variants to clients that accept them.
+    Templates link to assets through static_url(), which returns the fingerprinted URL.
+    """
+
+    def __init__(self, *, directory: str, url_prefix: str = "/static", precompress: bool = STATIC_PRECOMPRESS, **kwargs):
+        super().__init__(directory=directory, **kwargs)
+        self.url_prefix = url_prefix.rstrip("/")
+        self.assets: Dict[str, StaticAsset] = {}
+        self.fingerprinted: Dict[str, StaticAsset] = {}
+        self.build_manifest(precompress)
+
+    def build_manifest(self, precompress: bool = STATIC_PRECOMPRESS):
+        """Hash (and optionally compress) every file under the directory."""
+        self.assets.clear()
+        self.fingerprinted.clear()
+
+        for root, _, filenames in os.walk(self.directory):
+            for filename in sorted(filenames):
+                full_path = os.path.join(root, filename)
+                path = os.path.relpath(full_path, self.directory).replace(os.sep, "/")
+                with open(full_path, "rb") as asset_file:
+                    content = asset_file.read()
+
+                asset = StaticAsset(path, full_path, content)
+                if precompress and os.path.splitext(path)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+                    asset.precompress(content)
+                self.assets[path] = asset
+                self.fingerprinted[asset.fingerprinted_path] = asset
+
+        variants = sum(len(asset.variants) for asset in self.assets.values())
+        logger.info(f"Fingerprinted {len(self.assets)} static assets with {variants} precompressed variants"
+                    f"{'' if brotli is not None else ' (brotli not installed, gzip only)'}")
+
+    def static_url(self, path: str) -> str:
+        """
+        The URL to link an asset by; fingerprinted when the file is known.
+
+        Args:
+            path (str): Path relative to the static directory, e.g. "css/styles.css".
+
+        Returns:
+            str: e.g. "/static/css/styles.3f2a9c1b0d4e.css", or "/static/css/styles.css" for an unknown file.
+        """
+        path = path.lstrip("/")
+        asset = self.assets.get(path)
+        return f"{self.url_prefix}/{asset.fingerprinted_path if asset else path}"
+
+    async def get_response(self, path: str, scope) -> Response:
+        path = path.replace(os.sep, "/")
+        asset = self.fingerprinted.get(path)
+        immutable = asset is not None
+        if asset is None:
+            asset = self.assets.get(path)
+
+        if asset is None:
+            # A file added since startup
+            response = await super().get_response(path, scope)
+            response.headers.setdefault("cache-control", REVALIDATE_CACHE_CONTROL)
+            return response
+
+        if scope["method"] not in ("GET", "HEAD"):
+            raise HTTPException(status_code=405)
+        return self.asset_response(asset, scope, immutable)
+
+    def asset_response(self, asset: StaticAsset, scope, immutable: bool) -> Response:
+        request_headers = Headers(scope=scope)
+        encoding = asset.negotiate(request_headers.get("accept-encoding", ""))
+
+        headers = {
+            "cache-control": IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL,
+            # Each encoding is a separate representation with its own validator
+            "etag": f'"{asset.etag}-{encoding}"' if encoding else f'"{asset.etag}"',
+        }
+        if asset.variants:
+            headers["vary"] = "Accept-Encoding"
+
+        if encoding:
+            headers["content-encoding"] = encoding
+            response = Response(asset.variants[encoding], media_type=asset.media_type, headers=headers)
+        else:
+            response = FileResponse(asset.full_path, media_type=asset.media_type, headers=headers)
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -2,11 +2,12 @@ from typing import List
 import logging
 import datetime
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, func, and_
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import desc, func, and_, select
 
-from app.emails import send_tip_email
-from app import schemas
+from app.emails import build_tip_email
+from app import schemas, outbox, dashboard
 from app.models import (
     User,
     Assignment,
@@ -19,15 +20,9 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def count_tips_for_current_assignment(
-        db: Session,
-        current_user_id: int,
-        assignment_year: int
-):
-    """
-    Count number of tips for a user's current assignment.
-    """
-    tip_count = db.query(func.count(Tip.id)).join(
+def count_tips_for_current_assignment_query(current_user_id: int, assignment_year: int):
+    """Tips about the user the current user is assigned to, in the given year."""
+    return select(func.count(Tip.id)).join(
         Assignment,
         and_(
             Assignment.assigned_user_id == Tip.subject_user_id,
@@ -36,8 +31,30 @@ def count_tips_for_current_assignment(
     ).filter(
         Assignment.assignee_user_id == current_user_id,
         Assignment.year == assignment_year
-    ).scalar()
-    return tip_count
+    )
+
+
+def count_tips_for_current_assignment(
+        db: Session,
+        current_user_id: int,
+        assignment_year: int
+):
+    """
+    Count number of tips for a user's current assignment.
+    """
+    return db.execute(count_tips_for_current_assignment_query(current_user_id, assignment_year)).scalar()
+
+
+async def count_tips_for_current_assignment_async(
+        db: AsyncSession,
+        current_user_id: int,
+        assignment_year: int
+):
+    """
+    Count number of tips for a user's current assignment, without blocking the event loop.
+    """
+    result = await db.execute(count_tips_for_current_assignment_query(current_user_id, assignment_year))
+    return result.scalar()
 
 
 def query_for_subject_assignee_email(
@@ -77,7 +94,7 @@ def create_tip(
 
     1. Take in some tip input
     2. Identify the current user automatically
-    3. Add tip to tips table
+    3. Add tip to tips table, and queue the notification email in the same transaction
     """
 
     # Initialize Tip table-object instance using the provided details
@@ -89,28 +106,55 @@ def create_tip(
         created_at=datetime.datetime.now()
     )
 
-    # Add new row to the tips table for this new assignment
+    # Add new row to the tips table for this new assignment; flush to get its ID for the dedup key
     db.add(db_tip)
-    db.commit()
-    db.refresh(db_tip)
+    db.flush()
+
+    try:
+        # Query for the subject user's assignee to get their email
+        to_email = query_for_subject_assignee_email(db_tip.subject_user_id, db_tip.year, db)
 
-    # Query for the subject user's assignee to get their email
-    to_email = query_for_subject_assignee_email(db_tip.subject_user_id, db_tip.year, db)
-            
-    if to_email:
+        if to_email:
 
-        # Get the current date in MM/DD/YYYY format
-        current_date_str = datetime.datetime.now().strftime("%m/%d/%Y")
+            # Get the current date in MM/DD/YYYY format
+            current_date_str = datetime.datetime.now().strftime("%m/%d/%Y")
 
-        # Create the subject line for the email
-        subject = f"You received a new Snakesmas tip! ({current_date_str})"
+            # Create the subject line for the email
+            subject = f"You received a new Snakesmas tip! ({current_date_str})"
 
-        # Send email to subject user's assignee
-        send_tip_email(to_email, db_tip.content, subject=subject)
+            # Queue email to subject user's assignee, committed together with the tip
+            outbox.enqueue_email(
+                db, build_tip_email(to_email, db_tip.content, subject=subject), dedup_key=f"tip:{db_tip.id}", commit=False
+            )
+
+        db.commit()
+    except Exception:
+        # Neither the tip nor its notification is saved
+        db.rollback()
+        raise
+
+    db.refresh(db_tip)
+    dashboard.invalidate_dashboards_for_tip(db_tip.contributor_user_id, db_tip.subject_user_id, db_tip.year)
 
     return db_tip
 
 
+def _tips_for_contributor_user_query(user_id: int, assignment_year: int):
+    """A contributor's tips for a year, newest first."""
+    return select(Tip).filter(
+        Tip.contributor_user_id == user_id,
+        Tip.year == assignment_year
+    ).order_by(desc(Tip.created_at))
+
+
+def _tips_for_subject_user_query(user_id: int, assignment_year: int):
+    """Tips about a subject user for a year, newest first."""
+    return select(Tip).filter(
+        Tip.subject_user_id == user_id,
+        Tip.year == assignment_year
+    ).order_by(desc(Tip.created_at))
+
+
 def get_tips_for_contributor_user(
         db: Session,
         user_id: int,
@@ -119,11 +163,21 @@ def get_tips_for_contributor_user(
     """
     Retrieve all tips for a specific contributing user.
     """
-    tips_for_user = db.query(Tip).filter(
-        Tip.contributor_user_id == user_id,
-        Tip.year == assignment_year
-    ).order_by(desc(Tip.created_at)).all()
-    return tips_for_user
+    return db.execute(_tips_for_contributor_user_query(user_id, assignment_year)).scalars().all()
+
+
+async def get_tips_for_contributor_user_async(
+        db: AsyncSession,
+        user_id: int,
+        assignment_year: int
+) -> List[schemas.Tip]:
+    """
+    Retrieve all tips for a specific contributing user, with their subject users loaded.
+    Relationships cannot lazy load on an AsyncSession, so the subject is fetched up front.
+    """
+    query = _tips_for_contributor_user_query(user_id, assignment_year).options(selectinload(Tip.subject_user))
+    result = await db.execute(query)
+    return result.scalars().all()
 
 
 def get_tips_for_subject_user(
@@ -134,11 +188,19 @@ def get_tips_for_subject_user(
     """
     Retrieve all tips for a specific contributing user.
     """
-    tips_for_user = db.query(Tip).filter(
-        Tip.subject_user_id == user_id,
-        Tip.year == assignment_year
-    ).order_by(desc(Tip.created_at)).all()
-    return tips_for_user
+    return db.execute(_tips_for_subject_user_query(user_id, assignment_year)).scalars().all()
+
+
+async def get_tips_for_subject_user_async(
+        db: AsyncSession,
+        user_id: int,
+        assignment_year: int
+) -> List[schemas.Tip]:
+    """
+    Retrieve all tips for a specific subject user, without blocking the event loop.
+    """
+    result = await db.execute(_tips_for_subject_user_query(user_id, assignment_year))
+    return result.scalars().all()
 
 
 def get_tip(db: Session, tip_id: int):
@@ -168,6 +230,7 @@ def delete_tip(db: Session, tip_id: int, current_user_id: int):
     # Delete tip in database
     db.delete(tip)
     db.commit()
+    dashboard.invalidate_dashboards_for_tip(tip.contributor_user_id, tip.subject_user_id, tip.year)
 
     return {"message": "Tip deleted successfully"}
 
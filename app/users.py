@@ -0,0 +1,129 @@
+from typing import Iterator, List, Optional
+import os
+import json
+import logging
+import datetime
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import User
+
+
+# Rows fetched per keyset batch while streaming a user listing
+USER_LIST_BATCH_SIZE = int(os.environ.get("USER_LIST_BATCH_SIZE", 1000))
+
+# Columns a listing may project; the default matches schemas.User
+USER_LIST_FIELDS = [
+    "id", "username", "is_admin", "email", "first_name", "last_name",
+    "shipping_street_address", "shipping_unit", "shipping_city", "shipping_zipcode", "shipping_state",
+    "created_at",
+]
+
+# Adding logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    """
+    Validate a comma-separated field list. The id is always included, since it is the cursor.
+    """
+    if not fields:
+        return list(USER_LIST_FIELDS)
+
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = sorted(set(requested) - set(USER_LIST_FIELDS))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown user fields: {', '.join(unknown)}")
+
+    return ["id"] + [field for field in dict.fromkeys(requested) if field != "id"]
+
+
+def prefix_range(column, prefix: str):
+    """
+    A prefix match as a range on the column (prefix <= value < next prefix), which SQLite
+    can answer from the column's index. Matching is case-sensitive.
+    """
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return [column >= prefix, column < upper]
+
+
+def user_list_query(
+        fields: List[str],
+        after_id: int = 0,
+        limit: Optional[int] = None,
+        username_prefix: Optional[str] = None,
+        email_prefix: Optional[str] = None
+):
+    """The projected columns of the users after the cursor, in id order."""
+    query = select(*[getattr(User, field) for field in fields]).filter(User.id > after_id)
+
+    if username_prefix:
+        query = query.filter(*prefix_range(User.username, username_prefix))
+    if email_prefix:
+        query = query.filter(*prefix_range(User.email, email_prefix))
+
+    query = query.order_by(User.id)
+    if limit is not None:
+        query = query.limit(limit)
+
+    return query
+
+
+def iter_users(
+        db: Session,
+        fields: List[str],
+        after_id: int = 0,
+        limit: Optional[int] = None,
+        username_prefix: Optional[str] = None,
+        email_prefix: Optional[str] = None,
+        batch_size: int = USER_LIST_BATCH_SIZE
+) -> Iterator[dict]:
+    """
+    Yield users as dicts of the requested fields, fetching them in keyset batches
+    so memory stays flat however many users match.
+
+    Args:
+        db (Session): SQLAlchemy database session.
+        fields (List[str]): Columns to return; must include id.
+        after_id (int): Cursor; only users with a greater id are returned.
+        limit (Optional[int]): Maximum number of users, or None for all.
+        username_prefix (Optional[str]): Only users whose username starts with this.
+        email_prefix (Optional[str]): Only users whose email starts with this.
+        batch_size (int): Rows fetched per query.
+    """
+    remaining = limit
+    while remaining is None or remaining > 0:
+        size = batch_size if remaining is None else min(batch_size, remaining)
+        rows = db.execute(user_list_query(fields, after_id, size, username_prefix, email_prefix)).all()
+
+        for row in rows:
+            yield dict(row._mapping)
+
+        if len(rows) < size:
+            return
+
+        after_id = rows[-1].id
+        if remaining is not None:
+            remaining -= len(rows)
+
+
+def _json_default(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def encode_ndjson(users: Iterator[dict]) -> Iterator[str]:
+    """One JSON object per line."""
+    for user in users:
+        yield json.dumps(user, default=_json_default) + "\n"
+
+
+def encode_json_array(users: Iterator[dict]) -> Iterator[str]:
+    """A JSON array, written one element at a time."""
+    yield "["
+    for index, user in enumerate(users):
+        yield ("," if index else "") + json.dumps(user, default=_json_default)
+    yield "]"
@@ -0,0 +1,282 @@
+"""
+Success rate, wall time and memory of the assignment engines as the draw grows.
+
+For every combination of group size, exclusion density (the fraction of the group each
+giver excludes) and history depth (past draws each giver may not repeat), builds random
+rules, checks whether any valid draw exists, then runs each engine over several trials
+and validates every draw it returns. Engines:
+
+    matching  snake_assignments.create_assignments (random permutation repaired by matching)
+    retry     the original shuffle-and-retry drawer with max_attempts=100, kept here as a baseline
+
+A draw the retry engine gives up on while the rules are feasible is the failure cliff the
+matching engine removed; the report shows it as success_rate below feasible_rate.
+
+    python -m benchmarks.assignment_scaling --sizes 10 100 1000 10000 100000 \\
+        --densities 0 0.01 0.1 0.5 --history 0 1 5 --trials 5 --output reports/assignment-scaling.json
+
+Configurations with more than --max-forbidden-pairs forbidden pairs are skipped, and the
+retry engine (quadratic per attempt) only runs up to --retry-max-size participants.
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import platform
+import datetime
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import snake_assignments  # noqa: E402
+
+
+def retry_assignments(participants: List[int], previous_assignments: Dict[int, List[int]], exclusion_list: Dict[int, List[int]], seed: int, max_attempts: int = 100):
+    """
+    The original drawer: give each shuffled giver a random remaining receiver, and start
+    over when a giver has none left. Returns (assignments or None, attempts used).
+    """
+    random.seed(seed)
+    for attempt in range(1, max_attempts + 1):
+        assignments = {}
+        available_receivers = set(participants)
+        shuffled_participants = participants.copy()
+        random.shuffle(shuffled_participants)
+
+        for giver in shuffled_participants:
+            possible_receivers = available_receivers.copy()
+            possible_receivers.discard(giver)
+            for receiver in previous_assignments.get(giver, ()):
+                possible_receivers.discard(receiver)
+            for receiver in exclusion_list.get(giver, ()):
+                possible_receivers.discard(receiver)
+
+            if not possible_receivers:
+                break
+
+            receiver = random.choice(list(possible_receivers))
+            assignments[giver] = receiver
+            available_receivers.remove(receiver)
+        else:
+            return assignments, attempt
+
+    return None, max_attempts
+
+
+def matching_assignments(participants, previous_assignments, exclusion_list, seed: int):
+    """The current engine; it draws in a single pass, so attempts is always 1."""
+    rng = np.random.default_rng(seed)
+    return snake_assignments.create_assignments(participants, previous_assignments, exclusion_list, rng=rng), 1
+
+
+ENGINES: Dict[str, Callable] = {
+    "matching": matching_assignments,
+    "retry": retry_assignments,
+}
+
+
+def build_rules(size: int, density: float, history: int, rng: random.Random):
+    """
+    Random rules for a group: history past draws (each a single cycle through the group)
+    and, for each giver, round(density * (size - 1)) random exclusions.
+    """
+    participants = list(range(1, size + 1))
+
+    previous_assignments = {participant: [] for participant in participants}
+    for _ in range(history):
+        order = participants.copy()
+        rng.shuffle(order)
+        for index, giver in enumerate(order):
+            previous_assignments[giver].append(order[(index + 1) % size])
+
+    exclusions_per_giver = min(size - 1, round(density * (size - 1)))
+    exclusion_list = {}
+    if exclusions_per_giver:
+        for giver in participants:
+            excluded = set()
+            while len(excluded) < exclusions_per_giver:
+                receiver = rng.randint(1, size)
+                if receiver != giver:
+                    excluded.add(receiver)
+            exclusion_list[giver] = list(excluded)
+
+    return participants, previous_assignments, exclusion_list
+
+
+def is_valid(assignments: Optional[Dict[int, int]], participants, previous_assignments, exclusion_list) -> bool:
+    """Whether a draw is a permutation of the group that breaks no rule."""
+    if assignments is None or sorted(assignments) != participants or sorted(assignments.values()) != participants:
+        return False
+    for giver, receiver in assignments.items():
+        if receiver == giver or receiver in set(previous_assignments.get(giver, ())) | set(exclusion_list.get(giver, ())):
+            return False
+    return True
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(1, math.ceil(fraction * len(sorted_values))) - 1]
+
+
+def measure(engine: Callable, rules, trials: int, seed: int) -> Dict:
+    """
+    Run an engine trials times on the same rules, each trial with its own seed; time untraced
+    runs, then trace memory once.
+    """
+    participants, previous_assignments, exclusion_list = rules
+
+    seconds, attempts, successes, invalid = [], [], 0, 0
+    for trial in range(trials):
+        started = time.perf_counter()
+        assignments, used = engine(participants, previous_assignments, exclusion_list, seed + trial)
+        seconds.append(time.perf_counter() - started)
+        attempts.append(used)
+
+        if assignments is not None:
+            if is_valid(assignments, participants, previous_assignments, exclusion_list):
+                successes += 1
+            else:
+                invalid += 1
+
+    tracemalloc.start()
+    engine(participants, previous_assignments, exclusion_list, seed)
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    seconds.sort()
+    return {
+        "success_rate": successes / trials,
+        "invalid_draws": invalid,
+        "mean_attempts": sum(attempts) / trials,
+        "seconds_p50": percentile(seconds, 0.50),
+        "seconds_p95": percentile(seconds, 0.95),
+        "seconds_max": seconds[-1],
+        "peak_memory_mb": round(peak_bytes / 2 ** 20, 3),
+    }
+
+
+def run(args) -> List[Dict]:
+    results = []
+    print(f"{'engine':>8} {'size':>7} {'density':>7} {'history':>7} {'feasible':>8} {'success':>7} "
+          f"{'attempts':>8} {'p50 ms':>10} {'p95 ms':>10} {'peak MB':>9}")
+
+    for size in args.sizes:
+        for density in args.densities:
+            for history in args.history:
+                forbidden_pairs = size * (1 + history + round(density * (size - 1)))
+                if forbidden_pairs > args.max_forbidden_pairs:
+                    print(f"{'-':>8} {size:7d} {density:7.4g} {history:7d}  skipped: {forbidden_pairs} forbidden pairs")
+                    continue
+
+                # Fresh rules per rule set; feasibility is judged once per rule set
+                feasible = 0
+                per_engine = {engine: [] for engine in args.engines}
+                for rule_set in range(args.rule_sets):
+                    rules = build_rules(size, density, history, random.Random(args.seed + rule_set))
+                    feasible += snake_assignments.check_feasibility(*rules)["feasible"]
+
+                    for engine in args.engines:
+                        if engine == "retry" and size > args.retry_max_size:
+                            continue
+                        per_engine[engine].append(measure(ENGINES[engine], rules, args.trials, args.seed))
+
+                for engine, measurements in per_engine.items():
+                    if not measurements:
+                        continue
+                    result = {
+                        "engine": engine,
+                        "size": size,
+                        "density": density,
+                        "history": history,
+                        "rule_sets": len(measurements),
+                        "trials": args.trials,
+                        "feasible_rate": feasible / args.rule_sets,
+                        "success_rate": sum(m["success_rate"] for m in measurements) / len(measurements),
+                        "invalid_draws": sum(m["invalid_draws"] for m in measurements),
+                        "mean_attempts": sum(m["mean_attempts"] for m in measurements) / len(measurements),
+                        "seconds_p50": sorted(m["seconds_p50"] for m in measurements)[len(measurements) // 2],
+                        "seconds_p95": max(m["seconds_p95"] for m in measurements),
+                        "peak_memory_mb": max(m["peak_memory_mb"] for m in measurements),
+                    }
+                    results.append(result)
+                    print(f"{engine:>8} {size:7d} {density:7.4g} {history:7d} {result['feasible_rate']:8.2f} "
+                          f"{result['success_rate']:7.2f} {result['mean_attempts']:8.1f} {result['seconds_p50'] * 1000:10.2f} "
+                          f"{result['seconds_p95'] * 1000:10.2f} {result['peak_memory_mb']:9.2f}")
+
+    return results
+
+
+def plot(results: List[Dict], path: str):
+    """Wall time and success rate against group size, one line per engine, density and history."""
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("matplotlib is not installed; skipping --plot")
+        return
+
+    figure, (time_axis, success_axis) = plt.subplots(1, 2, figsize=(14, 5))
+    series = {}
+    for result in results:
+        series.setdefault((result["engine"], result["density"], result["history"]), []).append(result)
+
+    for (engine, density, history), points in sorted(series.items()):
+        points.sort(key=lambda point: point["size"])
+        label = f"{engine} d={density} h={history}"
+        sizes = [point["size"] for point in points]
+        time_axis.plot(sizes, [point["seconds_p50"] * 1000 for point in points], marker="o", label=label)
+        success_axis.plot(sizes, [point["success_rate"] for point in points], marker="o", label=label)
+
+    time_axis.set(xscale="log", yscale="log", xlabel="participants", ylabel="p50 wall time (ms)")
+    success_axis.set(xscale="log", xlabel="participants", ylabel="success rate", ylim=(-0.05, 1.05))
+    success_axis.legend(fontsize="x-small", loc="lower left")
+    figure.tight_layout()
+    figure.savefig(path)
+    print(f"Scaling curves written to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000, 100000])
+    parser.add_argument("--densities", type=float, nargs="+", default=[0, 0.01, 0.1, 0.5, 0.9])
+    parser.add_argument("--history", type=int, nargs="+", default=[0, 1, 5])
+    parser.add_argument("--engines", nargs="+", choices=list(ENGINES), default=list(ENGINES))
+    parser.add_argument("--trials", type=int, default=5, help="draws per rule set")
+    parser.add_argument("--rule-sets", type=int, default=3, help="random rule sets per configuration")
+    parser.add_argument("--retry-max-size", type=int, default=5000)
+    parser.add_argument("--max-forbidden-pairs", type=int, default=5_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--plot", help="write scaling curves to this image (needs matplotlib)")
+    args = parser.parse_args()
+
+    results = run(args)
+
+    report = {
+        "generated_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {key: value for key, value in vars(args).items() if key not in ("output", "plot")},
+        "results": results,
+    }
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as report_file:
+            json.dump(report, report_file, indent=2)
+        print(f"Report written to {args.output}")
+
+    if args.plot:
+        plot(results, args.plot)
+
+
+if __name__ == "__main__":
+    main()
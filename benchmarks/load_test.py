@@ -0,0 +1,294 @@
+"""
+Load test of the hot routes against a synthetic database, with a JSON report.
+
+Seeds a fresh SQLite file (benchmarks.seed), starts the app under uvicorn in a
+subprocess pointed at it, logs in one session per client and then, one route at a
+time, has every client request the route back to back for a fixed duration. The
+report gives throughput and p50/p95/p99 latency per route. /admin/assign draws a new
+year for every user on each request, so it runs with its own (smaller) client count
+and request budget.
+
+    python -m benchmarks.load_test --users 10000 --years 5 --tips 50000 --clients 16 --seconds 15 \\
+        --output reports/load-test.json --baseline reports/previous.json
+
+With --baseline, routes whose p95 grew by more than --max-regression against the
+earlier report are listed and the script exits with status 1.
+"""
+import os
+import sys
+import json
+import math
+import time
+import socket
+import logging
+import asyncio
+import argparse
+import datetime
+import platform
+import tempfile
+import subprocess
+from typing import Dict, List
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.seed import SEED_PASSWORD, seed_database  # noqa: E402
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Read-heavy routes every client hits, in run order
+PAGE_ROUTES = ["/", "/profile", "/assignment", "/tips/create"]
+ASSIGN_ROUTE = "/admin/assign"
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies: List[float], errors: int, statuses: Dict[int, int], elapsed: float) -> Dict:
+    """Throughput and latency percentiles (in milliseconds) of one route's run."""
+    latencies = sorted(latencies)
+    milliseconds = [latency * 1000 for latency in latencies]
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(sum(milliseconds) / len(milliseconds), 2) if milliseconds else 0.0,
+            "p50": round(percentile(milliseconds, 0.50), 2),
+            "p95": round(percentile(milliseconds, 0.95), 2),
+            "p99": round(percentile(milliseconds, 0.99), 2),
+            "max": round(milliseconds[-1], 2) if milliseconds else 0.0,
+        },
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(database_filepath: str, port: int, workers: int, log_file=subprocess.DEVNULL) -> subprocess.Popen:
+    """Run the app under uvicorn against the seeded database, with email going to the in-process fake."""
+    env = dict(os.environ)
+    env.update({
+        "SQLITE_DATABASE_FILEPATH": database_filepath,
+        "SECRET_KEY": env.get("SECRET_KEY", "benchmark-secret-key"),
+        "SESSION_SECRET_KEY": env.get("SESSION_SECRET_KEY", "benchmark-session-secret-key"),
+        "SES_BACKEND": "fake",
+        "SES_MAX_SEND_RATE": "0",
+        "OUTBOX_WORKER_IN_PROCESS": "False",
+        "SLOW_REQUEST_THRESHOLD_MS": env.get("SLOW_REQUEST_THRESHOLD_MS", "60000"),
+        "SLOW_REQUEST_QUERY_COUNT": env.get("SLOW_REQUEST_QUERY_COUNT", "1000000"),
+    })
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=REPO_ROOT,
+        env=env,
+        stdout=log_file,
+        stderr=subprocess.STDOUT,
+    )
+
+
+async def wait_for_server(base_url: str, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get("/login")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not start within {timeout} seconds")
+
+
+async def login(base_url: str, user_id: int) -> httpx.AsyncClient:
+    """A client holding a logged-in session for user<user_id>."""
+    client = httpx.AsyncClient(base_url=base_url, follow_redirects=False, timeout=120)
+    response = await client.post("/login", data={"username": f"user{user_id}", "password": SEED_PASSWORD})
+    if response.status_code >= 400:
+        raise RuntimeError(f"Login failed for user{user_id}: {response.status_code}")
+    return client
+
+
+async def run_route(clients: List[httpx.AsyncClient], route: str, seconds: float) -> Dict:
+    """Every client requests the route back to back until the time is up."""
+    latencies, statuses, errors = [], {}, 0
+    deadline = time.perf_counter() + seconds
+
+    async def worker(client):
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                response = await client.get(route)
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(client) for client in clients))
+    return summarize(latencies, errors, statuses, time.perf_counter() - started)
+
+
+async def run_assign(clients: List[httpx.AsyncClient], participants: List[int], first_year: int, requests: int) -> Dict:
+    """Draw requests new years across the admin clients; each request draws every participant."""
+    latencies, statuses, errors = [], {}, 0
+    years = iter(range(first_year, first_year + requests))
+
+    async def worker(client):
+        nonlocal errors
+        for year in years:
+            started = time.perf_counter()
+            try:
+                response = await client.post(ASSIGN_ROUTE, json={"year": year, "participants": participants})
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(client) for client in clients))
+    return summarize(latencies, errors, statuses, time.perf_counter() - started)
+
+
+async def run_load_test(args, database_filepath: str, seeded: Dict) -> Dict:
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    log_file = open(args.server_log, "w") if args.server_log else subprocess.DEVNULL
+    server = start_server(database_filepath, port, args.workers, log_file)
+
+    try:
+        await wait_for_server(base_url)
+
+        # One session per client, spread over the seeded users
+        clients = await asyncio.gather(*(
+            login(base_url, 1 + index * max(1, args.users // args.clients) % args.users)
+            for index in range(args.clients)
+        ))
+        admin_clients = await asyncio.gather(*(login(base_url, 1) for _ in range(args.assign_clients)))
+
+        routes = {}
+        for route in PAGE_ROUTES:
+            routes[route] = await run_route(clients, route, args.seconds)
+            print(f"{route:>14}: {routes[route]['throughput_rps']:8.1f} req/s  p50 {routes[route]['latency_ms']['p50']:8.1f} ms  "
+                  f"p95 {routes[route]['latency_ms']['p95']:8.1f} ms  p99 {routes[route]['latency_ms']['p99']:8.1f} ms  "
+                  f"errors {routes[route]['errors']}")
+
+        if args.assign_requests:
+            routes[ASSIGN_ROUTE] = await run_assign(
+                admin_clients, list(range(1, args.users + 1)), max(seeded["years"]) + 1, args.assign_requests
+            )
+            print(f"{ASSIGN_ROUTE:>14}: {routes[ASSIGN_ROUTE]['throughput_rps']:8.1f} req/s  "
+                  f"p50 {routes[ASSIGN_ROUTE]['latency_ms']['p50']:8.1f} ms  p95 {routes[ASSIGN_ROUTE]['latency_ms']['p95']:8.1f} ms  "
+                  f"errors {routes[ASSIGN_ROUTE]['errors']}")
+
+        for client in list(clients) + list(admin_clients):
+            await client.aclose()
+
+        return routes
+
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+        if args.server_log:
+            log_file.close()
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_to_baseline(report: Dict, baseline: Dict, max_regression: float) -> List[str]:
+    """Routes whose p95 latency grew by more than max_regression times the baseline's."""
+    regressions = []
+    for route, result in report["routes"].items():
+        previous = baseline.get("routes", {}).get(route)
+        if not previous or not previous["latency_ms"]["p95"]:
+            continue
+        ratio = result["latency_ms"]["p95"] / previous["latency_ms"]["p95"]
+        print(f"{route:>14}: p95 {previous['latency_ms']['p95']:8.1f} -> {result['latency_ms']['p95']:8.1f} ms ({ratio:.2f}x)")
+        if ratio > max_regression:
+            regressions.append(route)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--tips", type=int, default=50000)
+    parser.add_argument("--clients", type=int, default=16, help="concurrent clients for the page routes")
+    parser.add_argument("--seconds", type=float, default=15, help="duration of each page route's run")
+    parser.add_argument("--assign-clients", type=int, default=1)
+    parser.add_argument("--assign-requests", type=int, default=3, help="draws to run (0 to skip /admin/assign)")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--server-log", help="write the server's output (including slow query logs) here")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--baseline", help="earlier JSON report to compare p95 latency against")
+    parser.add_argument("--max-regression", type=float, default=1.25)
+    args = parser.parse_args()
+
+    # The app modules imported through benchmarks.seed set up INFO logging, under which httpx
+    # logs every request of the timed client loop
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as directory:
+        database_filepath = os.path.join(directory, "load_test.db")
+        seeded = seed_database(database_filepath, args.users, args.years, args.tips)
+        print(f"Seeded {seeded['users']} users, {seeded['assignments']} assignments and {seeded['tips']} tips in {seeded['seconds']} s")
+
+        routes = asyncio.run(run_load_test(args, database_filepath, seeded))
+
+    report = {
+        "generated_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {
+            "users": args.users, "years": args.years, "tips": args.tips, "clients": args.clients,
+            "seconds": args.seconds, "assign_clients": args.assign_clients,
+            "assign_requests": args.assign_requests, "workers": args.workers,
+        },
+        "seed": seeded,
+        "routes": routes,
+    }
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as report_file:
+            json.dump(report, report_file, indent=2)
+        print(f"Report written to {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare_to_baseline(report, json.load(baseline_file), args.max_regression)
+        if regressions:
+            print(f"p95 regressions over {args.max_regression}x: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
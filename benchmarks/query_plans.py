@@ -0,0 +1,132 @@
+"""
+Query plans and timings of the assignment and tip hot paths, before and after the
+composite index migrations.
+
+Builds a throwaway SQLite database with the pre-migration schema, seeds it, prints
+EXPLAIN QUERY PLAN and the mean time of each query, applies app.migrations and
+prints both again.
+
+    python -m benchmarks.query_plans --users 5000 --years 10 --tips-per-user 5
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from sqlalchemy import create_engine, text, func, and_
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import models, migrations  # noqa: E402
+from app.models import Assignment, Tip  # noqa: E402
+
+
+# Indexes added by the migrations, dropped to reproduce the old schema
+MIGRATED_INDEXES = [
+    "ix_assignments_year",
+    "uq_assignments_assignee_user_id_year",
+    "uq_assignments_assigned_user_id_year",
+    "ix_tips_contributor_user_id_year",
+    "ix_tips_subject_user_id_year",
+]
+
+
+def build_legacy_database(path: str, users: int, years: int, tips_per_user: int):
+    engine = create_engine(f"sqlite:///{path}")
+    models.Base.metadata.create_all(bind=engine)
+
+    with engine.begin() as connection:
+        for index in MIGRATED_INDEXES:
+            connection.execute(text(f"DROP INDEX {index}"))
+        connection.execute(text("DROP TABLE schema_migrations"))
+
+        connection.execute(models.User.__table__.insert(), [
+            {"id": user_id, "username": f"user{user_id}", "email": f"user{user_id}@example.com"}
+            for user_id in range(1, users + 1)
+        ])
+
+        user_ids = list(range(1, users + 1))
+        for year in range(2024 - years + 1, 2025):
+            random.shuffle(user_ids)
+            connection.execute(Assignment.__table__.insert(), [
+                {"assignee_user_id": giver, "assigned_user_id": user_ids[(i + 1) % users], "year": year}
+                for i, giver in enumerate(user_ids)
+            ])
+            connection.execute(Tip.__table__.insert(), [
+                {
+                    "contributor_user_id": random.randint(1, users),
+                    "subject_user_id": random.randint(1, users),
+                    "year": year,
+                    "content": "tip"
+                }
+                for _ in range(users * tips_per_user // years)
+            ])
+
+    return engine
+
+
+def hot_queries(db, user_id: int, year: int):
+    """The lookups the pages run, keyed by a short label."""
+    return {
+        "assignment by giver": db.query(Assignment).filter(
+            Assignment.assignee_user_id == user_id, Assignment.year == year),
+        "assignment by receiver": db.query(Assignment).filter(
+            Assignment.assigned_user_id == user_id, Assignment.year == year),
+        "tips by contributor": db.query(Tip).filter(
+            Tip.contributor_user_id == user_id, Tip.year == year),
+        "tips by subject": db.query(Tip).filter(
+            Tip.subject_user_id == user_id, Tip.year == year),
+        "count tips for assignment": db.query(func.count(Tip.id)).join(
+            Assignment,
+            and_(Assignment.assigned_user_id == Tip.subject_user_id, Assignment.year == Tip.year)
+        ).filter(Assignment.assignee_user_id == user_id, Assignment.year == year),
+    }
+
+
+def report(engine, users: int, repeats: int):
+    db = sessionmaker(bind=engine)()
+    queries = hot_queries(db, users // 2, 2024)
+
+    for label, query in queries.items():
+        statement = str(query.statement.compile(engine, compile_kwargs={"literal_binds": True}))
+        plan = db.execute(text(f"EXPLAIN QUERY PLAN {statement}")).fetchall()
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            db.execute(text(statement)).fetchall()
+        elapsed_ms = (time.perf_counter() - start) / repeats * 1000
+
+        print(f"  {label}: {elapsed_ms:.3f} ms")
+        for row in plan:
+            print(f"      {row[-1]}")
+
+    db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--tips-per-user", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = build_legacy_database(
+            os.path.join(directory, "benchmark.db"), args.users, args.years, args.tips_per_user
+        )
+
+        print("Before migrations:")
+        report(engine, args.users, args.repeats)
+
+        print(f"Applied: {', '.join(migrations.run_migrations(engine))}")
+
+        print("After migrations:")
+        report(engine, args.users, args.repeats)
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
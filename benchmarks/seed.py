@@ -0,0 +1,139 @@
+"""
+Fast bulk seeder for a synthetic Secret Snakes database.
+
+Inserts users, one full draw per year and random tips with executemany inside a single
+transaction, so tens of thousands of users seed in seconds. Every user shares one
+password hash (bcrypt is deliberately slow), and user 1 is an admin.
+
+    python -m benchmarks.seed ./benchmark.db --users 10000 --years 5 --tips 50000
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import datetime
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Throwaway keys for the benchmark database; the app refuses to import without them
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+os.environ.setdefault("SESSION_SECRET_KEY", "benchmark-session-secret-key")
+
+from app import auth, config, migrations, models  # noqa: E402
+
+
+# Every seeded user logs in with user<id> and this password
+SEED_PASSWORD = "benchmark-password"
+
+# Rows per executemany call
+SEED_CHUNK_SIZE = 5000
+
+
+def _insert(connection, table, rows):
+    for start in range(0, len(rows), SEED_CHUNK_SIZE):
+        connection.execute(table.insert(), rows[start:start + SEED_CHUNK_SIZE])
+
+
+def seed_database(database_filepath: str, users: int, years: int, tips: int, last_year: int = None, rng_seed: int = 0) -> dict:
+    """
+    Create the schema in a fresh SQLite file and fill it.
+
+    Args:
+        database_filepath (str): Path of the SQLite file to create.
+        users (int): Number of users; user 1 is an admin.
+        years (int): Number of past draws, each a single cycle through every user.
+        tips (int): Number of tips, spread over the drawn years.
+        last_year (int): Year of the latest draw, which becomes the active assignment year.
+        rng_seed (int): Seed for the draws and tips.
+
+    Returns:
+        dict: Row counts, the years drawn and the seconds taken.
+    """
+    started = time.perf_counter()
+    rng = random.Random(rng_seed)
+    last_year = last_year or datetime.datetime.now().year
+    drawn_years = list(range(last_year - years + 1, last_year + 1))
+    now = datetime.datetime.utcnow()
+
+    engine = create_engine(f"sqlite:///{database_filepath}")
+    models.Base.metadata.create_all(bind=engine)
+    migrations.run_migrations(engine)
+
+    hashed_password = auth.get_password_hash(SEED_PASSWORD)
+
+    with engine.begin() as connection:
+        _insert(connection, models.User.__table__, [
+            {
+                "id": user_id,
+                "username": f"user{user_id}",
+                "email": f"user{user_id}@example.com",
+                "hashed_password": hashed_password,
+                "created_at": now,
+                "is_admin": user_id == 1,
+                "first_name": f"First{user_id}",
+                "last_name": f"Last{user_id}",
+                "shipping_street_address": f"{user_id} Snake Lane",
+                "shipping_unit": None,
+                "shipping_city": "Austin",
+                "shipping_zipcode": "78701",
+                "shipping_state": "TX",
+            }
+            for user_id in range(1, users + 1)
+        ])
+
+        # One cycle per year, so every user gives and receives exactly once
+        assignments = []
+        for year in drawn_years:
+            order = list(range(1, users + 1))
+            rng.shuffle(order)
+            assignments.extend(
+                {"assignee_user_id": giver, "assigned_user_id": order[(index + 1) % users], "year": year, "created_at": now}
+                for index, giver in enumerate(order)
+            )
+        _insert(connection, models.Assignment.__table__, assignments)
+
+        _insert(connection, models.Tip.__table__, [
+            {
+                "content": f"Tip {tip_id}: likes snakes",
+                "year": rng.choice(drawn_years),
+                "subject_user_id": rng.randint(1, users),
+                "contributor_user_id": rng.randint(1, users),
+                "created_at": now,
+            }
+            for tip_id in range(tips)
+        ])
+
+    with Session(engine) as db:
+        config.initialize_config(db)
+        config.set_config(db, "assignment_year", str(last_year))
+    config.invalidate_config_cache()
+    engine.dispose()
+
+    return {
+        "users": users,
+        "assignments": len(assignments),
+        "tips": tips,
+        "years": drawn_years,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("database", help="SQLite file to create (must not exist)")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--tips", type=int, default=50000)
+    args = parser.parse_args()
+
+    if os.path.exists(args.database):
+        parser.error(f"{args.database} already exists")
+
+    print(seed_database(args.database, args.users, args.years, args.tips))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Throughput of concurrent tip writers and page readers under each SQLite pragma profile.
+
+Writer threads post tips (insert + commit) while reader threads run the tip and
+assignment lookups the pages make. Each profile runs for the same duration on a fresh
+database file; the report shows completed operations per second and how many failed
+with "database is locked".
+
+    python -m benchmarks.sqlite_concurrency --writers 8 --readers 16 --seconds 10
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import threading
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import database, models  # noqa: E402
+from app.models import Assignment, Tip  # noqa: E402
+
+
+USERS = 500
+YEAR = 2024
+
+
+def seed(engine):
+    models.Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(models.User.__table__.insert(), [
+            {"id": user_id, "username": f"user{user_id}", "email": f"user{user_id}@example.com"}
+            for user_id in range(1, USERS + 1)
+        ])
+        connection.execute(Assignment.__table__.insert(), [
+            {"assignee_user_id": user_id, "assigned_user_id": user_id % USERS + 1, "year": YEAR}
+            for user_id in range(1, USERS + 1)
+        ])
+
+
+def writer(SessionLocal, stop_event, counts):
+    while not stop_event.is_set():
+        db = SessionLocal()
+        try:
+            db.add(Tip(
+                content="Likes snakes",
+                year=YEAR,
+                subject_user_id=random.randint(1, USERS),
+                contributor_user_id=random.randint(1, USERS)
+            ))
+            db.commit()
+            counts["writes"] += 1
+        except OperationalError:
+            db.rollback()
+            counts["locked"] += 1
+        finally:
+            db.close()
+
+
+def reader(SessionLocal, stop_event, counts):
+    while not stop_event.is_set():
+        db = SessionLocal()
+        try:
+            user_id = random.randint(1, USERS)
+            db.query(Assignment).filter(Assignment.assignee_user_id == user_id, Assignment.year == YEAR).first()
+            db.query(Tip).filter(Tip.subject_user_id == user_id, Tip.year == YEAR).all()
+            counts["reads"] += 1
+        except OperationalError:
+            counts["locked"] += 1
+        finally:
+            db.close()
+
+
+def run_profile(profile: str, writers: int, readers: int, seconds: float):
+    with tempfile.TemporaryDirectory() as directory:
+        engine = database.create_sqlite_engine(
+            f"sqlite:///{os.path.join(directory, 'benchmark.db')}",
+            database.sqlite_pragmas(profile, ""),
+            pool_size=writers + readers,
+            max_overflow=0
+        )
+        seed(engine)
+        SessionLocal = sessionmaker(bind=engine)
+
+        counts = {"writes": 0, "reads": 0, "locked": 0}
+        stop_event = threading.Event()
+        threads = [threading.Thread(target=writer, args=(SessionLocal, stop_event, counts)) for _ in range(writers)]
+        threads += [threading.Thread(target=reader, args=(SessionLocal, stop_event, counts)) for _ in range(readers)]
+
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop_event.set()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+
+    print(
+        f"{profile:>10}: {counts['writes'] / seconds:8.0f} writes/s "
+        f"{counts['reads'] / seconds:8.0f} reads/s {counts['locked']:6d} locked"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--profiles", nargs="+", default=list(database.SQLITE_PRAGMA_PROFILES))
+    args = parser.parse_args()
+
+    for profile in args.profiles:
+        run_profile(profile, args.writers, args.readers, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
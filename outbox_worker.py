@@ -0,0 +1,27 @@
+import os
+import signal
+import threading
+import logging
+
+from app import database, outbox
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+if __name__ == "__main__":
+
+    env = os.environ.get("ENVIRONMENT", "dev")
+    print('', f"Running outbox worker in {env} mode...")
+
+    # Make sure the outbox table exists before polling it
+    database.init_db()
+
+    # Stop cleanly on Ctrl+C or a container stop
+    stop_event = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+
+    # Run the web app with OUTBOX_WORKER_IN_PROCESS=False when using this separate worker
+    outbox.run_worker(stop_event)
@@ -1,27 +1,39 @@
+import os
+import json
+import datetime
+import tempfile
 import pytest
 from fastapi import Depends
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
 
 from app.main import app
-from app.database import get_db
-from app import models, tips, auth
+from app.database import get_db, get_async_db
+from app import models, tips, auth, instrumentation
 
 
-# Create a test database
-SQLALCHEMY_DATABASE_URL = "sqlite://"
+# Create a test database, in a file so the sync and async engines share it
+TEST_DATABASE_FILEPATH = os.path.join(tempfile.mkdtemp(), "test.db")
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{TEST_DATABASE_FILEPATH}"
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool
+    connect_args={"check_same_thread": False}
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(f"sqlite+aiosqlite:///{TEST_DATABASE_FILEPATH}", poolclass=NullPool)
+TestingAsyncSessionLocal = sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
 # Create tables in the test database
 models.Base.metadata.create_all(bind=engine)
 
+# Count queries on the test engines as the app does on its own
+instrumentation.instrument_engine(engine)
+instrumentation.instrument_engine(async_engine.sync_engine)
+
 
 # Build a function that will override get_db
 def override_get_db():
@@ -32,8 +44,15 @@ def override_get_db():
         db.close()
 
 
-# Override get_db
+# Build a function that will override get_async_db
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
+# Override get_db and get_async_db
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_async_db] = override_get_async_db
 
 # Initialize testing client
 client = TestClient(app)
@@ -176,5 +195,198 @@ def test_read_users_me():
     assert data["email"] == "test@example.com"
 
 
+def test_assignment_feasibility():
+    """
+    Test the admin feasibility check endpoint.
+    To be run after test_create_user.
+    """
+
+    # Promote the test user to admin and add a second participant
+    db = TestingSessionLocal()
+    try:
+        user = db.query(models.User).filter(models.User.username == "testuser").first()
+        user.is_admin = True
+        other = models.User(username="otheruser", email="other@example.com", hashed_password="x")
+        db.add(other)
+        db.commit()
+        user_ids = [user.id, other.id]
+    finally:
+        db.close()
+
+    # The promotion bypassed the app, so drop any cached copy of the user
+    auth.invalidate_cached_user(user_ids[0])
+
+    # Log in through the session
+    client.post("/login", data={"username": "testuser", "password": "testpassword"}, follow_redirects=False)
+
+    # Two participants can always draw each other
+    response = client.post("/admin/assignments/feasibility", json={"year": 2030, "participants": user_ids})
+    assert response.status_code == 200
+    assert response.json()["feasible"] is True
+
+    # One giver excluding the only other participant blocks the draw
+    db = TestingSessionLocal()
+    try:
+        db.add(models.AssignmentExclusion(year=2030, giver_user_id=user_ids[0], excluded_user_id=user_ids[1]))
+        db.commit()
+    finally:
+        db.close()
+
+    response = client.post("/admin/assignments/feasibility", json={"year": 2030, "participants": user_ids})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["feasible"] is False
+    assert user_ids[0] in data["blocking_givers"]
+
+
+def test_async_pages_render():
+    """
+    Test that the pages served from the async session render for a logged-in user.
+    To be run after test_assignment_feasibility.
+    """
+
+    db = TestingSessionLocal()
+    try:
+        user = db.query(models.User).filter(models.User.username == "testuser").first()
+        other = db.query(models.User).filter(models.User.username == "otheruser").first()
+        db.add(models.Assignment(assignee_user_id=user.id, assigned_user_id=other.id, year=2031))
+        db.add(models.Tip(
+            content="Likes hats",
+            year=2031,
+            subject_user_id=other.id,
+            contributor_user_id=user.id,
+            created_at=datetime.datetime.now()
+        ))
+        db.commit()
+    finally:
+        db.close()
+
+    client.post("/login", data={"username": "testuser", "password": "testpassword"}, follow_redirects=False)
+
+    for url in ["/", "/profile", "/assignment", "/tips/create"]:
+        response = client.get(url, follow_redirects=False)
+        assert response.status_code == 200, url
+
+    # The assignment page shows the assigned user's tips
+    assert "Likes hats" in client.get("/assignment").text
+
+
+def test_server_timing_header(caplog):
+    """
+    Test that requests report their query count and timings, and slow requests are logged.
+    To be run after test_async_pages_render.
+    """
+
+    client.post("/login", data={"username": "testuser", "password": "testpassword"}, follow_redirects=False)
+
+    # Async session route
+    timing = client.get("/profile").headers["server-timing"]
+    assert timing.startswith("db;dur=")
+    assert int(timing.split('desc="')[1].split(" ")[0]) > 0
+    assert "tpl;dur=" in timing and "app;dur=" in timing
+
+    # Sync session route
+    timing = client.post("/admin/assignments/feasibility", json={"year": 2030, "participants": []}).headers["server-timing"]
+    assert int(timing.split('desc="')[1].split(" ")[0]) > 0
+
+    # Every request counts as slow at a zero threshold
+    slow_client = TestClient(instrumentation.InstrumentationMiddleware(app, slow_request_ms=0))
+    slow_client.post("/login", data={"username": "testuser", "password": "testpassword"}, follow_redirects=False)
+    with caplog.at_level("WARNING", logger="app.instrumentation"):
+        slow_client.post("/tips/424242/delete", follow_redirects=False)
+
+    record = json.loads(caplog.records[-1].getMessage())
+    assert record["event"] == "slow_request"
+    assert record["route"] == "/tips/{tip_id}/delete"
+    assert record["query_count"] > 0
+
+
+def test_list_users_streams_pages():
+    """
+    Test keyset pagination, projection and prefix filters on the admin user listing.
+    To be run after test_assignment_feasibility.
+    """
+
+    client.post("/login", data={"username": "testuser", "password": "testpassword"}, follow_redirects=False)
+
+    # The default response is a JSON array of full users
+    everyone = client.get("/users/").json()
+    assert [user["username"] for user in everyone] == ["testuser", "otheruser"]
+    assert "shipping_city" in everyone[0]
+
+    # One user per page, projected to the username
+    response = client.get("/users/", params={"limit": 1, "fields": "username", "format": "ndjson"})
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines == [{"id": everyone[0]["id"], "username": "testuser"}]
+
+    response = client.get("/users/", params={"limit": 1, "after_id": lines[0]["id"], "fields": "username"})
+    assert response.json() == [{"id": everyone[1]["id"], "username": "otheruser"}]
+
+    # Prefix filters
+    response = client.get("/users/", params={"email_prefix": "other", "fields": "email"})
+    assert [user["email"] for user in response.json()] == ["other@example.com"]
+
+    assert client.get("/users/", params={"fields": "hashed_password"}).status_code == 400
+
+
+def test_metrics_endpoint():
+    """
+    Test that /metrics requires an admin away from localhost and reports per-route latency.
+    To be run after test_assignment_feasibility.
+    """
+
+    assert TestClient(app).get("/metrics").status_code == 401
+
+    client.post("/login", data={"username": "testuser", "password": "testpassword"}, follow_redirects=False)
+    client.get("/profile")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'http_requests_total{route="/profile",method="GET",status="200"}' in response.text
+    assert 'http_request_duration_seconds_bucket{route="/profile",method="GET",le="+Inf"}' in response.text
+    assert "http_requests_in_flight 1" in response.text
+
+
+def test_exclusion_groups():
+    """
+    Test creating, listing and deleting an exclusion group.
+    To be run after test_assignment_feasibility.
+    """
+
+    client.post("/login", data={"username": "testuser", "password": "testpassword"}, follow_redirects=False)
+    user_ids = [user["id"] for user in client.get("/users/", params={"fields": "id"}).json()]
+
+    response = client.post("/admin/exclusion-groups", json={"name": "Household", "members": user_ids, "start_year": 2040})
+    assert response.status_code == 200
+    group = response.json()
+    assert group["members"] == sorted(user_ids)
+
+    assert [g["id"] for g in client.get("/admin/exclusion-groups", params={"year": 2041}).json()] == [group["id"]]
+    assert client.get("/admin/exclusion-groups", params={"year": 2039}).json() == []
+
+    # Members of one group cannot draw each other
+    response = client.post("/admin/assignments/feasibility", json={"year": 2041, "participants": user_ids})
+    assert response.json()["feasible"] is False
+
+    assert client.delete(f"/admin/exclusion-groups/{group['id']}").status_code == 200
+    assert client.get("/admin/exclusion-groups").json() == []
+
+
+def test_pages_link_fingerprinted_static_assets():
+    """Test that pages link static assets by fingerprinted URL, served with an immutable Cache-Control header."""
+
+    anonymous_client = TestClient(app)
+    html = anonymous_client.get("/login").text
+    stylesheet = html.split('rel="stylesheet" href="')[1].split('"')[0]
+    assert stylesheet.startswith("/static/css/styles.") and stylesheet != "/static/css/styles.css"
+
+    response = anonymous_client.get(stylesheet, headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert "immutable" in response.headers["cache-control"]
+    assert response.headers["content-encoding"] == "gzip"
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
@@ -0,0 +1,77 @@
+import asyncio
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import auth, models
+
+
+def test_password_pool_hash_and_verify():
+    """Test that hashing on the password pool round-trips and the pool drains afterwards."""
+
+    async def hash_and_verify():
+        hashed = await auth.get_password_hash_async("hunter22")
+        results = await asyncio.gather(
+            auth.verify_password_async("hunter22", hashed),
+            auth.verify_password_async("wrong", hashed),
+        )
+        return hashed, results
+
+    hashed, results = asyncio.run(hash_and_verify())
+
+    assert auth.verify_password("hunter22", hashed)
+    assert results == [True, False]
+
+    stats = auth.password_pool_stats()
+    assert stats["workers"] == auth.PASSWORD_HASH_WORKERS
+    assert stats["queue_depth"] == 0
+    assert stats["active"] == 0
+    assert stats["completed"] >= 3
+
+
+def test_get_current_user_is_cached(monkeypatch):
+    """Test that a repeat lookup of the same token skips the user query until invalidated."""
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    models.Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(bind=engine)
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    db = SessionLocal()
+    user = models.User(username="cacheduser", email="cached@example.com", hashed_password="x", first_name="Old")
+    db.add(user)
+    db.commit()
+    user_id = user.id
+    db.close()
+
+    token = auth.create_access_token(data={"sub": "cacheduser"})
+
+    # First lookup decodes the token and queries the user
+    db = SessionLocal()
+    assert auth.get_current_user(db, token).id == user_id
+    db.close()
+    query_count = len(statements)
+
+    # Second lookup, in a new session, is served from the cache
+    db = SessionLocal()
+    cached_user = auth.get_current_user(db, token)
+    assert cached_user.first_name == "Old"
+    assert len(statements) == query_count
+
+    # The cache holds no credentials; reading one loads it from the database
+    _, snapshot = auth._user_cache[auth._token_signature(token)]
+    assert not {"hashed_password", "reset_token", "reset_token_expiry"} & set(snapshot.__dict__)
+    assert cached_user.hashed_password == "x"
+
+    # Changes made through the cached user still save, and invalidate the cache
+    cached_user.first_name = "New"
+    db.commit()
+    auth.invalidate_cached_user(user_id)
+    db.close()
+
+    db = SessionLocal()
+    assert auth.get_current_user(db, token).first_name == "New"
+    assert db.query(models.User.hashed_password).scalar() == "x"
+    db.close()
@@ -0,0 +1,102 @@
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import config, models
+
+
+@pytest.fixture
+def session_factory():
+    """Sessions on a fresh in-memory database with initialized config, plus a statement log."""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    models.Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(bind=engine)
+
+    db = SessionLocal()
+    config.initialize_config(db)
+    db.close()
+
+    SessionLocal.statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: SessionLocal.statements.append(args[2]))
+
+    yield SessionLocal
+    config.invalidate_config_cache()
+
+
+def test_get_config_is_cached(session_factory):
+    """Test that repeat reads within the check interval issue no queries."""
+
+    db = session_factory()
+    first = config.get_config(db)
+    query_count = len(session_factory.statements)
+
+    assert config.get_config(db) is first
+    assert len(session_factory.statements) == query_count
+    assert first["allow_registration"] == "True"
+
+    # The snapshot is read-only
+    with pytest.raises(TypeError):
+        first["allow_registration"] = "False"
+    db.close()
+
+
+def test_set_config_invalidates_cache(session_factory):
+    """Test that a config change is visible immediately in this process."""
+
+    db = session_factory()
+    config.get_config(db)
+    config.set_config(db, "allow_registration", "False")
+
+    assert config.get_config(db)["allow_registration"] == "False"
+    db.close()
+
+
+def test_version_change_from_another_process(session_factory, monkeypatch):
+    """Test that a change made elsewhere is picked up once the version is rechecked."""
+
+    db = session_factory()
+    assert config.get_config(db)["allow_registration"] == "True"
+
+    # Simulate another process writing a new value and bumping the version
+    other = session_factory()
+    other.query(models.Config).filter(models.Config.key == "allow_registration").update({"value": "False"})
+    config.bump_config_version(other)
+    other.commit()
+    other.close()
+
+    # Within the interval the cached value is still served
+    assert config.get_config(db)["allow_registration"] == "True"
+
+    # After the interval the version check reloads the config
+    monkeypatch.setattr(config, "CONFIG_VERSION_CHECK_SECONDS", 0)
+    assert config.get_config(db)["allow_registration"] == "False"
+    db.close()
+
+
+def test_active_assignment_year_is_cached(session_factory):
+    """Test that the active year is resolved once and refreshed when assignments are written."""
+
+    db = session_factory()
+    config.set_config(db, "assignment_year", "")
+    db.add(models.Assignment(assignee_user_id=1, assigned_user_id=2, year=2023))
+    db.commit()
+    config.invalidate_active_assignment_year(db)
+
+    assert config.get_active_assignment_year(db) == 2023
+
+    # Page views reuse the cached year without scanning assignments
+    query_count = len(session_factory.statements)
+    assert config.get_active_assignment_year(db) == 2023
+    assert len(session_factory.statements) == query_count
+
+    # A new assignment year is picked up once the writer invalidates
+    db.add(models.Assignment(assignee_user_id=1, assigned_user_id=2, year=2024))
+    db.commit()
+    config.invalidate_active_assignment_year(db)
+    assert config.get_active_assignment_year(db) == 2024
+
+    # An explicit assignment year takes precedence
+    config.set_config(db, "assignment_year", "2030")
+    assert config.get_active_assignment_year(db) == 2030
+    db.close()
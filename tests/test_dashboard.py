@@ -0,0 +1,84 @@
+import asyncio
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import dashboard, models
+
+
+@pytest.fixture
+def session_factory():
+    """Async sessions on a fresh in-memory database with three users, plus a statement log."""
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    SessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def setup():
+        async with engine.begin() as connection:
+            await connection.run_sync(models.Base.metadata.create_all)
+        async with SessionLocal() as db:
+            for user_id in (1, 2, 3):
+                db.add(models.User(id=user_id, username=f"user{user_id}", first_name=f"First{user_id}"))
+            db.add(models.Assignment(assignee_user_id=1, assigned_user_id=2, year=2024))
+            db.add(models.Tip(content="a", year=2024, subject_user_id=2, contributor_user_id=3))
+            db.add(models.Tip(content="b", year=2024, subject_user_id=3, contributor_user_id=1))
+            db.add(models.Tip(content="c", year=2023, subject_user_id=2, contributor_user_id=1))
+            await db.commit()
+
+    asyncio.run(setup())
+
+    SessionLocal.statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: SessionLocal.statements.append(args[2]))
+
+    yield SessionLocal
+    dashboard.invalidate_dashboard_cache()
+    asyncio.run(engine.dispose())
+
+
+def get_dashboard(session_factory, user_id, year):
+    async def load():
+        async with session_factory() as db:
+            return await dashboard.get_dashboard(db, user_id, year)
+    return asyncio.run(load())
+
+
+def test_dashboard_is_one_query(session_factory):
+    """Test that the dashboard loads in one statement and is then served from the cache."""
+
+    result = get_dashboard(session_factory, 1, 2024)
+
+    assert result["assigned_user"]["first_name"] == "First2"
+    assert set(result["assigned_user"]) == {"id", "first_name", "last_name"}
+    assert result["tips_for_snake"] == 1
+    assert result["tips_given"] == 1
+    assert len(session_factory.statements) == 1
+
+    assert get_dashboard(session_factory, 1, 2024) == result
+    assert len(session_factory.statements) == 1
+
+
+def test_dashboard_without_assignment(session_factory):
+    """Test that a user without an assignment still sees the tips they gave."""
+
+    result = get_dashboard(session_factory, 3, 2024)
+
+    assert result == {"assigned_user": None, "tips_for_snake": 0, "tips_given": 1}
+
+
+def test_tip_invalidates_dashboards(session_factory):
+    """Test that a new tip refreshes both the contributor's and the subject's giver's dashboards."""
+
+    get_dashboard(session_factory, 1, 2024)
+    get_dashboard(session_factory, 3, 2024)
+
+    async def add_tip():
+        async with session_factory() as db:
+            db.add(models.Tip(content="d", year=2024, subject_user_id=2, contributor_user_id=3))
+            await db.commit()
+
+    asyncio.run(add_tip())
+    dashboard.invalidate_dashboards_for_tip(contributor_user_id=3, subject_user_id=2, year=2024)
+
+    assert get_dashboard(session_factory, 1, 2024)["tips_for_snake"] == 2
+    assert get_dashboard(session_factory, 3, 2024)["tips_given"] == 2
@@ -0,0 +1,34 @@
+import pytest
+from sqlalchemy import text
+
+from app import database
+
+
+def test_sqlite_pragmas_overrides():
+    """Test that overrides replace or extend the profile's pragmas."""
+
+    pragmas = database.sqlite_pragmas("production", "busy_timeout=10000, cache_size=-2000")
+
+    assert pragmas["journal_mode"] == "WAL"
+    assert pragmas["busy_timeout"] == "10000"
+    assert pragmas["cache_size"] == "-2000"
+    assert database.sqlite_pragmas("legacy", "") == {}
+
+    with pytest.raises(ValueError):
+        database.sqlite_pragmas("fastest", "")
+
+
+def test_engine_applies_pragmas(tmp_path):
+    """Test that every pooled connection gets the profile's pragmas."""
+
+    engine = database.create_sqlite_engine(
+        f"sqlite:///{tmp_path / 'test.db'}",
+        database.sqlite_pragmas("production", "")
+    )
+
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert connection.execute(text("PRAGMA synchronous")).scalar() == 1
+        assert connection.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+        assert connection.execute(text("PRAGMA temp_store")).scalar() == 2
+    engine.dispose()
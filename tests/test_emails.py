@@ -0,0 +1,136 @@
+import threading
+import pytest
+from botocore.exceptions import ClientError
+
+from app import emails
+from app.fake_ses import FakeSES
+
+
+class StubSESClient:
+    """Records send_email calls in place of SES, rejecting any address listed in reject."""
+
+    def __init__(self, reject=()):
+        self.reject = set(reject)
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def send_email(self, Source, Destination, Message):
+        to_email = Destination['ToAddresses'][0]
+        if to_email in self.reject:
+            raise ClientError({'Error': {'Code': 'MessageRejected', 'Message': 'Rejected'}}, 'SendEmail')
+        with self.lock:
+            self.sent.append(to_email)
+            return {'MessageId': f"msg-{len(self.sent)}"}
+
+
+@pytest.fixture
+def ses_stub(monkeypatch):
+    """Swap the shared SES client for a stub."""
+    stub = StubSESClient(reject={"bounce@example.com"})
+    monkeypatch.setattr(emails, "_ses_client", stub)
+    return stub
+
+
+def test_get_ses_client_is_shared(monkeypatch):
+    """Test that the SES client is built once and reused."""
+    monkeypatch.setattr(emails, "_ses_client", None)
+    assert emails.get_ses_client() is emails.get_ses_client()
+
+
+def test_send_bulk_emails(ses_stub):
+    """Test that bulk sends report a result per recipient, in order."""
+
+    messages = [
+        {"to_email": f"user{i}@example.com", "subject": "Hello", "html_body": "<p>Hi</p>"}
+        for i in range(20)
+    ]
+    messages.insert(5, {"to_email": "bounce@example.com", "subject": "Hello", "html_body": "<p>Hi</p>"})
+
+    results = emails.send_bulk_emails(messages, max_workers=4, max_send_rate=0)
+
+    assert [result["to_email"] for result in results] == [message["to_email"] for message in messages]
+    assert results[5]["status"] == "failed"
+    assert results[5]["message_id"] is None
+    assert sum(result["status"] == "sent" for result in results) == 20
+    assert len(ses_stub.sent) == 20
+
+
+def test_rate_limiter_spaces_calls():
+    """Test that the rate limiter holds calls to the configured rate."""
+
+    rate_limiter = emails.RateLimiter(rate=100)
+    start = emails.time.monotonic()
+    for _ in range(11):
+        rate_limiter.acquire()
+
+    # Ten intervals of 10 ms between eleven calls
+    assert emails.time.monotonic() - start >= 0.09
+
+
+def test_assignment_emails_render_in_batch():
+    """Test that a batch of assignment emails renders with the stylesheet inlined and content escaped."""
+
+    recipients = [
+        {
+            "to_email": f"user{i}@example.com",
+            "assigned_username": f"<snake{i}>",
+            "shipping_info": {"first_name": "Sam", "last_name": "Snake", "street_address": "1 Den Rd",
+                              "unit": None, "city": "Austin", "zipcode": "78701", "state": "TX"},
+        }
+        for i in range(3)
+    ]
+
+    messages = emails.build_assignment_emails(recipients, subject="Assignments")
+
+    assert [message["to_email"] for message in messages] == [recipient["to_email"] for recipient in recipients]
+    assert messages[0]["subject"].endswith("Assignments")
+
+    html_body = messages[2]["html_body"]
+    assert "&lt;snake2&gt;" in html_body
+    assert "None" not in html_body
+    assert "class=" not in html_body
+    assert '<body style="font-family: Arial, sans-serif;' in html_body
+    assert "background-color: #3d523d" in html_body
+
+
+def test_password_reset_email_link():
+    """Test that the reset link carries the token and the button styles."""
+
+    message = emails.build_password_reset_email("user@example.com", "a+b/c")
+
+    assert f'href="{emails.BASE_URL}/reset-password?token=a%2Bb/c"' in message["html_body"]
+    assert "background-color: #4682B4" in message["html_body"]
+
+
+def test_bulk_templated_assignment_emails(monkeypatch):
+    """Test that templated assignment sends batch destinations and render like the per-message path."""
+
+    ses = FakeSES(reject={"user7@example.com"})
+    monkeypatch.setattr(emails, "_ses_client", ses)
+    monkeypatch.setattr(emails, "_registered_templates", set())
+    monkeypatch.setattr(emails.RateLimiter, "acquire", lambda self, count=1: None)
+
+    recipients = [
+        {
+            "to_email": f"user{i}@example.com",
+            "assigned_username": f"snake<{i}>",
+            "shipping_info": {"first_name": "Sam", "last_name": "O'Snake", "street_address": f"{i} Den Rd",
+                              "unit": None, "city": "Austin", "zipcode": "78701", "state": "TX"},
+        }
+        for i in range(120)
+    ]
+
+    results = emails.send_assignment_emails_templated(recipients, subject="Assignments")
+
+    # One template registration and three batches of at most 50
+    assert ses.calls == ["create_template"] + ["send_bulk_templated_email"] * 3
+    assert [result["to_email"] for result in results] == [recipient["to_email"] for recipient in recipients]
+    assert results[7]["status"] == "failed"
+    assert sum(result["status"] == "sent" for result in results) == 119
+
+    expected = emails.build_assignment_email(**recipients[3], subject="Assignments")
+    assert ses.sent[3] == expected
+
+    # The template is only registered once per process
+    emails.send_assignment_emails_templated(recipients[:2], subject="Assignments")
+    assert ses.calls.count("create_template") == 1
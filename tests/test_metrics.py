@@ -0,0 +1,64 @@
+from app import metrics
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Test that histogram observations render as cumulative Prometheus buckets with sum and count."""
+
+    histogram = metrics.Histogram("test_latency_seconds", "Test latency.", labels=("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, route="/")
+
+    lines = histogram.render()
+
+    assert lines[:2] == ["# HELP test_latency_seconds Test latency.", "# TYPE test_latency_seconds histogram"]
+    assert 'test_latency_seconds_bucket{route="/",le="0.1"} 2' in lines
+    assert 'test_latency_seconds_bucket{route="/",le="1"} 3' in lines
+    assert 'test_latency_seconds_bucket{route="/",le="+Inf"} 4' in lines
+    assert 'test_latency_seconds_sum{route="/"} 3.65' in lines
+    assert 'test_latency_seconds_count{route="/"} 4' in lines
+
+
+def test_counter_and_gauge_labels():
+    """Test that counters accumulate per label set and label values are escaped."""
+
+    counter = metrics.Counter("test_total", "Test count.", labels=("outcome",))
+    counter.inc(outcome="sent")
+    counter.inc(2, outcome="sent")
+    counter.inc(outcome='say "hi"')
+
+    assert counter.samples() == ['test_total{outcome="say \\"hi\\""} 1', 'test_total{outcome="sent"} 3']
+
+    gauge = metrics.Gauge("test_in_flight", "Test gauge.")
+    gauge.inc()
+    gauge.inc()
+    gauge.dec()
+    assert gauge.samples() == ["test_in_flight 1"]
+
+
+def test_assignment_draws_are_counted():
+    """Test that the assignment engine records each draw and its outcome."""
+
+    from app import snake_assignments
+
+    before = metrics.assignment_draws_total.values.get(("infeasible",), 0)
+    assert snake_assignments.create_assignments([1, 2], {}, {1: [2]}) is None
+    assert metrics.assignment_draws_total.values[("infeasible",)] == before + 1
+
+
+def test_password_pool_is_reported_at_scrape_time():
+    """Test that the password hashing pool's workers, queue and completed calls are exported."""
+
+    import asyncio
+    from app import auth
+
+    metrics.instrument_password_pool(auth.password_pool_stats)
+    asyncio.run(auth.get_password_hash_async("hunter22"))
+
+    lines = metrics.render_metrics().splitlines()
+
+    assert f"password_hash_workers {auth.PASSWORD_HASH_WORKERS}" in lines
+    assert "password_hash_queue_depth 0" in lines
+    assert "password_hash_active 0" in lines
+    assert "# TYPE password_hash_completed_total counter" in lines
+    completed = next(line for line in lines if line.startswith("password_hash_completed_total "))
+    assert int(completed.split()[1]) == auth.password_pool_stats()["completed"] >= 1
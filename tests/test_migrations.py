@@ -0,0 +1,71 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from app import models, migrations
+
+
+NEW_INDEXES = [
+    "ix_assignments_year",
+    "uq_assignments_assignee_user_id_year",
+    "uq_assignments_assigned_user_id_year",
+    "ix_tips_contributor_user_id_year",
+    "ix_tips_subject_user_id_year",
+]
+
+
+@pytest.fixture
+def legacy_engine():
+    """An in-memory database with the tables as they were before the composite indexes."""
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        for index in NEW_INDEXES:
+            connection.execute(text(f"DROP INDEX {index}"))
+        connection.execute(text("DROP TABLE schema_migrations"))
+    return engine
+
+
+def index_names(engine, table):
+    return {index["name"] for index in inspect(engine).get_indexes(table)}
+
+
+def test_run_migrations_adds_indexes(legacy_engine):
+    """Test that pending migrations add the indexes once and are recorded."""
+
+    applied = migrations.run_migrations(legacy_engine)
+
+    assert applied == [name for name, _ in migrations.MIGRATIONS]
+    assert set(NEW_INDEXES[:3]) <= index_names(legacy_engine, "assignments")
+    assert set(NEW_INDEXES[3:]) <= index_names(legacy_engine, "tips")
+
+    # A second run has nothing to do
+    assert migrations.run_migrations(legacy_engine) == []
+
+
+def test_run_migrations_on_fresh_database():
+    """Test that migrations are no-ops where create_all already built the indexes."""
+
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(bind=engine)
+
+    migrations.run_migrations(engine)
+
+    assert set(NEW_INDEXES[:3]) <= index_names(engine, "assignments")
+
+
+def test_duplicate_assignments_block_unique_index(legacy_engine):
+    """Test that the unique index migration refuses to run over duplicate assignments."""
+
+    with legacy_engine.begin() as connection:
+        for assigned_user_id in (2, 3):
+            connection.execute(text(
+                "INSERT INTO assignments (assignee_user_id, assigned_user_id, year) "
+                f"VALUES (1, {assigned_user_id}, 2024)"
+            ))
+
+    with pytest.raises(RuntimeError):
+        migrations.run_migrations(legacy_engine)
+
+    # Migrations before the failing one stay applied; the failing one is retried next time
+    with legacy_engine.connect() as connection:
+        assert migrations.applied_migrations(connection) == ["0001_assignments_year_index"]
@@ -0,0 +1,137 @@
+import datetime
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import models, outbox, emails, schemas, tips
+
+
+@pytest.fixture
+def db():
+    """A fresh in-memory database session."""
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    """Replace SES with a recorder that fails for any address starting with 'bounce'."""
+    sent_emails = []
+
+    def fake_send_email(to_email, subject, html_body, logger_info=None):
+        if to_email.startswith("bounce"):
+            return None
+        sent_emails.append(to_email)
+        return f"msg-{len(sent_emails)}"
+
+    monkeypatch.setattr(emails, "send_email", fake_send_email)
+    return sent_emails
+
+
+def message(to_email):
+    return {"to_email": to_email, "subject": "Subject", "html_body": "<p>Body</p>"}
+
+
+def test_enqueue_email_deduplicates(db):
+    """Test that a repeated dedup key does not queue a second message."""
+
+    first = outbox.enqueue_email(db, message("a@example.com"), dedup_key="tip:1")
+    second = outbox.enqueue_email(db, message("a@example.com"), dedup_key="tip:1")
+
+    assert first.id == second.id
+    assert db.query(models.OutboundEmail).count() == 1
+
+
+def test_process_outbox_sends_pending(db, sent):
+    """Test that the worker sends due messages and marks them sent."""
+
+    outbox.enqueue_email(db, message("a@example.com"))
+    outbox.enqueue_email(db, message("b@example.com"))
+
+    assert outbox.process_outbox(db) == 2
+    assert sorted(sent) == ["a@example.com", "b@example.com"]
+    assert {row.status for row in db.query(models.OutboundEmail)} == {"sent"}
+
+    # Nothing left to send
+    assert outbox.process_outbox(db) == 0
+
+
+def test_process_outbox_retries_with_backoff(db, sent, monkeypatch):
+    """Test that failed sends are rescheduled and eventually given up on."""
+
+    monkeypatch.setattr(outbox, "OUTBOX_MAX_ATTEMPTS", 2)
+    row = outbox.enqueue_email(db, message("bounce@example.com"))
+
+    assert outbox.process_outbox(db) == 1
+    db.refresh(row)
+    assert row.status == "pending"
+    assert row.attempts == 1
+    assert row.next_attempt_at > datetime.datetime.utcnow()
+
+    # Not due yet, so the next poll skips it
+    assert outbox.process_outbox(db) == 0
+
+    # Once due, the last attempt fails for good
+    row.next_attempt_at = datetime.datetime.utcnow()
+    db.commit()
+    assert outbox.process_outbox(db) == 1
+    db.refresh(row)
+    assert row.status == "failed"
+    assert sent == []
+
+
+def test_expired_claim_is_reclaimed(db, sent):
+    """Test that a message stuck in sending past its lease is sent by the next worker."""
+
+    row = outbox.enqueue_email(db, message("a@example.com"))
+    row.status = "sending"
+    row.next_attempt_at = datetime.datetime.utcnow() - datetime.timedelta(seconds=1)
+    db.commit()
+
+    assert outbox.process_outbox(db) == 1
+    assert sent == ["a@example.com"]
+
+
+def add_tip_participants(db):
+    for user_id in (1, 2, 3):
+        db.add(models.User(id=user_id, username=f"user{user_id}", email=f"user{user_id}@example.com"))
+    db.add(models.Assignment(assignee_user_id=1, assigned_user_id=2, year=2024))
+    db.commit()
+
+
+def test_create_tip_queues_email_in_same_transaction(db, monkeypatch):
+    """Test that a tip and its notification are committed together, and a failed commit saves neither."""
+
+    add_tip_participants(db)
+    tip = schemas.TipCreate(content="Likes corn snakes", year=2024, subject_user_id=2)
+
+    db_tip = tips.create_tip(tip, db, current_user_id=3)
+    queued = db.query(models.OutboundEmail).one()
+    assert queued.dedup_key == f"tip:{db_tip.id}"
+    assert queued.to_email == "user1@example.com"
+
+    def failing_commit():
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(db, "commit", failing_commit)
+    with pytest.raises(RuntimeError):
+        tips.create_tip(tip, db, current_user_id=3)
+    monkeypatch.undo()
+
+    assert db.query(models.Tip).count() == 1
+    assert db.query(models.OutboundEmail).count() == 1
+
+    # An error while queueing the email does not leave the tip behind either
+    def failing_enqueue(*args, **kwargs):
+        raise RuntimeError("outbox unavailable")
+
+    monkeypatch.setattr(outbox, "enqueue_email", failing_enqueue)
+    with pytest.raises(RuntimeError):
+        tips.create_tip(tip, db, current_user_id=3)
+
+    assert db.query(models.Tip).count() == 1
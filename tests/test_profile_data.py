@@ -0,0 +1,78 @@
+import asyncio
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import models, profile_data
+
+
+@pytest.fixture
+def session_factory():
+    """Async sessions on an in-memory database with five users and three years of history."""
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    SessionLocal = sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+    async def setup():
+        async with engine.begin() as connection:
+            await connection.run_sync(models.Base.metadata.create_all)
+        async with SessionLocal() as db:
+            for user_id in range(1, 6):
+                db.add(models.User(id=user_id, username=f"user{user_id}", first_name=f"First{user_id}"))
+            for year in (2022, 2023, 2024):
+                db.add(models.Assignment(assignee_user_id=1, assigned_user_id=year - 2020, year=year))
+            db.add(models.Tip(content="a", year=2024, subject_user_id=4, contributor_user_id=2))
+            db.add(models.AssignmentExclusion(year=2024, giver_user_id=1, excluded_user_id=5))
+            await db.commit()
+
+    asyncio.run(setup())
+
+    SessionLocal.statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: SessionLocal.statements.append(args[2]))
+
+    yield SessionLocal
+    asyncio.run(engine.dispose())
+
+
+def load_profile(session_factory, is_admin, users_page=1):
+    async def load():
+        async with session_factory() as db:
+            user = await db.get(models.User, 1)
+            user.is_admin = is_admin
+            session_factory.statements.clear()
+            profile = await profile_data.load_profile(db, user, 2024, users_page)
+
+            # Touch every assigned user the template shows
+            names = [assignment.assigned_user.first_name for assignment in profile["assignments"]]
+            return profile, names
+    return asyncio.run(load())
+
+
+def test_profile_queries_are_bounded(session_factory):
+    """Test that assignments load with their users and the checks share one query."""
+
+    profile, names = load_profile(session_factory, is_admin=False)
+
+    assert names == ["First4", "First3", "First2"]
+    assert profile["assignments_exist_for_year"] is True
+    assert profile["number_of_tips"] == 1
+    assert profile["all_users"] == []
+    assert len(session_factory.statements) == 2
+
+
+def test_admin_users_are_paginated(session_factory, monkeypatch):
+    """Test that admins get one page of users plus the year's exclusions."""
+
+    monkeypatch.setattr(profile_data, "ADMIN_USERS_PAGE_SIZE", 2)
+
+    profile, _ = load_profile(session_factory, is_admin=True, users_page=3)
+
+    assert [user.id for user in profile["all_users"]] == [5]
+    assert profile["users_pagination"] == {"page": 3, "pages": 3, "page_size": 2, "total": 5}
+    assert profile["current_exclusions"] == {1: [5]}
+    assert len(session_factory.statements) == 4
+
+    # Out of range pages are clamped
+    profile, _ = load_profile(session_factory, is_admin=True, users_page=10)
+    assert profile["users_pagination"]["page"] == 3
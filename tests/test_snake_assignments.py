@@ -0,0 +1,226 @@
+import datetime
+import pytest
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import assignment_engine, models
+from app.snake_assignments import (
+    create_assignments,
+    check_feasibility,
+    fetch_previous_assignments,
+    fetch_exclusions,
+    fetch_exclusion_groups,
+    expand_exclusion_graph,
+    apply_exclusion_graph
+)
+
+
+@pytest.fixture
+def db():
+    """A fresh in-memory database session."""
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def assert_valid(assignments, participants, previous_assignments, exclusion_list):
+    """Check that an assignment is a permutation that respects every rule."""
+    assert sorted(assignments) == sorted(participants)
+    assert sorted(assignments.values()) == sorted(participants)
+    for giver, receiver in assignments.items():
+        assert giver != receiver
+        assert previous_assignments.get(giver) != receiver
+        assert receiver not in exclusion_list.get(giver, [])
+
+
+def test_create_assignments_respects_rules():
+    """Test that assignments avoid self, prior-year and excluded receivers."""
+
+    participants = list(range(1, 21))
+    previous_assignments = {giver: giver % 20 + 1 for giver in participants}
+    exclusion_list = {1: [3, 4, 5], 2: [1, 3], 10: [11, 12, 13, 14]}
+
+    for _ in range(50):
+        assignments = create_assignments(participants, previous_assignments, exclusion_list)
+        assert_valid(assignments, participants, previous_assignments, exclusion_list)
+
+
+def test_create_assignments_is_reproducible_with_seeded_rng():
+    """Test that a seeded random source reproduces the same draw."""
+
+    participants = list(range(1, 51))
+    exclusion_list = {1: [2, 3], 4: [5]}
+
+    first = create_assignments(participants, {}, exclusion_list, rng=np.random.default_rng(7))
+    second = create_assignments(participants, {}, exclusion_list, rng=np.random.default_rng(7))
+
+    assert first == second
+
+
+def test_create_assignments_finds_unique_solution():
+    """
+    Test that a heavily constrained group with exactly one valid assignment is always solved.
+    Each giver may only draw the next participant in the circle.
+    """
+
+    participants = list(range(1, 31))
+    exclusion_list = {
+        giver: [receiver for receiver in participants if receiver != giver % 30 + 1]
+        for giver in participants
+    }
+
+    assignments = create_assignments(participants, {}, exclusion_list)
+    assert assignments == {giver: giver % 30 + 1 for giver in participants}
+
+
+def test_create_assignments_infeasible():
+    """Test that impossible rules return None instead of retrying."""
+
+    # Two participants who drew each other last year have nobody left to draw
+    assert create_assignments([1, 2], {1: 2, 2: 1}, {}) is None
+
+    # Every other giver excludes participant 3, so nobody can draw them
+    assert create_assignments([1, 2, 3, 4], {}, {1: [2, 3], 2: [3], 4: [2, 3]}) is None
+
+    # A single participant can never be assigned
+    assert create_assignments([1], {}, {}) is None
+
+
+@pytest.mark.parametrize("participants", [[], [1, 2]])
+def test_create_assignments_small_groups(participants):
+    """Test the edge cases of an empty group and a pair."""
+
+    assignments = create_assignments(participants, {}, {})
+    assert_valid(assignments, participants, {}, {})
+
+
+def test_check_feasibility():
+    """Test that the feasibility check names the participants that block a draw."""
+
+    participants = [1, 2, 3, 4]
+
+    # Without rules any group of two or more is feasible
+    report = check_feasibility(participants, {}, {})
+    assert report == {
+        "feasible": True,
+        "participant_count": 4,
+        "blocking_givers": [],
+        "blocking_receivers": [],
+    }
+
+    # Givers 1 and 2 may only draw participant 3 between them
+    report = check_feasibility(participants, {1: 4}, {1: [2], 2: [1, 4]})
+    assert not report["feasible"]
+    assert report["blocking_givers"] == [1, 2]
+
+    # Nobody may draw participant 3
+    report = check_feasibility(participants, {}, {1: [3], 2: [3], 4: [3]})
+    assert not report["feasible"]
+    assert report["blocking_receivers"] == [3]
+
+
+def test_first_allowed_giver_matches_pairwise_lookup():
+    """Test that the vectorized parent pick finds the same first allowed giver as pairwise lookups."""
+
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        n = int(rng.integers(2, 30))
+        pairs = int(rng.integers(0, n * n))
+        matrix = assignment_engine.EligibilityMatrix(n, rng.integers(0, n, pairs), rng.integers(0, n, pairs))
+        givers = rng.permutation(n)[:rng.integers(1, n + 1)]
+        receivers = rng.permutation(n)[:rng.integers(1, n + 1)]
+
+        for receiver, first in zip(receivers, matrix.first_allowed(givers, receivers)):
+            allowed = np.flatnonzero(matrix.is_allowed(givers, np.full(givers.size, receiver)))
+            assert first == (allowed[0] if allowed.size else givers.size)
+
+
+def test_fetch_previous_assignments_lookback(db):
+    """Test that the lookback window collects every prior pairing within range."""
+
+    for year, pairs in {2020: [(1, 2)], 2021: [(1, 3)], 2022: [(1, 4), (2, 1)], 2023: [(1, 5)]}.items():
+        for giver, receiver in pairs:
+            db.add(models.Assignment(
+                year=year, assignee_user_id=giver, assigned_user_id=receiver, created_at=datetime.datetime.now()
+            ))
+    db.commit()
+
+    assert fetch_previous_assignments(db, 2023, 1) == {1: [4], 2: [1]}
+    assert sorted(fetch_previous_assignments(db, 2023, 3)[1]) == [2, 3, 4]
+    assert fetch_previous_assignments(db, 2023, 0) == {}
+
+
+def test_create_assignments_multi_year_history():
+    """Test that every receiver from the lookback window is avoided."""
+
+    participants = list(range(1, 7))
+    previous_assignments = {giver: [r for r in participants if r not in (giver, giver % 6 + 1)] for giver in participants}
+
+    # Only the next participant in the circle is left for each giver
+    assignments = create_assignments(participants, previous_assignments, {})
+    assert assignments == {giver: giver % 6 + 1 for giver in participants}
+
+
+def test_apply_exclusion_graph(db):
+    """Test that a bulk exclusion update applies households and reports the diff."""
+
+    db.add(models.AssignmentExclusion(year=2024, giver_user_id=1, excluded_user_id=9))
+    db.add(models.AssignmentExclusion(year=2024, giver_user_id=1, excluded_user_id=2))
+    db.commit()
+
+    pairs = expand_exclusion_graph({5: [6]}, households=[[1, 2, 3]])
+    assert len(pairs) == 7
+
+    diff = apply_exclusion_graph(db, 2024, pairs)
+
+    assert diff["removed"] == [[1, 9]]
+    assert [1, 2] not in diff["added"]
+    assert diff["unchanged"] == 1
+    assert diff["total"] == 7
+    assert set(fetch_exclusions(db, 2024)[2]) == {1, 3}
+
+    # Merging only adds
+    diff = apply_exclusion_graph(db, 2024, {(1, 9)}, replace=False)
+    assert diff == {"year": 2024, "added": [[1, 9]], "removed": [], "unchanged": 0, "total": 8}
+
+
+def test_fetch_exclusions_compiles_groups(db):
+    """Test that active exclusion groups become pairs without any per-year rows."""
+
+    db.add(models.AssignmentExclusion(year=2024, giver_user_id=1, excluded_user_id=9))
+    db.add(models.ExclusionGroup(
+        name="Household", start_year=2020,
+        members=[models.ExclusionGroupMember(user_id=user_id) for user_id in (1, 2, 3)]
+    ))
+    db.add(models.ExclusionGroup(
+        name="Ended", start_year=2020, end_year=2022,
+        members=[models.ExclusionGroupMember(user_id=user_id) for user_id in (4, 5)]
+    ))
+    db.commit()
+
+    exclusions = fetch_exclusions(db, 2024)
+
+    assert sorted(exclusions[1]) == [2, 3, 9]
+    assert sorted(exclusions[3]) == [1, 2]
+    assert 4 not in exclusions
+    assert fetch_exclusions(db, 2024, include_groups=False) == {1: [9]}
+
+    # The ended group still applies to its own years
+    assert fetch_exclusions(db, 2021)[4] == [5]
+
+    # A group of three makes a draw among its members impossible
+    assert create_assignments([1, 2, 3], {}, exclusions) is None
+
+    # The draw can take the groups directly instead of their pairs
+    groups = fetch_exclusion_groups(db, 2024)
+    assert groups == [[1, 2, 3]]
+    assert create_assignments([1, 2, 3], {}, {}, groups) is None
+    assert not check_feasibility([1, 2, 3, 4], {}, {}, groups)["feasible"]
+
+    assignments = create_assignments(list(range(1, 7)), {}, {1: [9]}, groups)
+    assert all(not (giver in (1, 2, 3) and receiver in (1, 2, 3)) for giver, receiver in assignments.items())
@@ -0,0 +1,77 @@
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from fastapi.testclient import TestClient
+
+from app import static_assets
+
+
+def make_client(tmp_path):
+    (tmp_path / "css").mkdir()
+    (tmp_path / "css" / "styles.css").write_text("body { color: green; }\n" * 200)
+    (tmp_path / "logo.png").write_bytes(b"\x89PNG not really" * 10)
+
+    static_files = static_assets.FingerprintedStaticFiles(directory=str(tmp_path), url_prefix="/static")
+    app = Starlette(routes=[Mount("/static", app=static_files, name="static")])
+    return TestClient(app), static_files
+
+
+def test_fingerprinted_urls_are_immutable(tmp_path):
+    """Test that static_url fingerprints known files and the fingerprinted URL is cached for good."""
+
+    client, static_files = make_client(tmp_path)
+
+    url = static_files.static_url("css/styles.css")
+    assert url.startswith("/static/css/styles.") and url.endswith(".css") and url != "/static/css/styles.css"
+    assert static_files.static_url("missing.js") == "/static/missing.js"
+
+    response = client.get(url, headers={"Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    assert response.text == "body { color: green; }\n" * 200
+    assert response.headers["cache-control"] == static_assets.IMMUTABLE_CACHE_CONTROL
+    assert "content-encoding" not in response.headers
+
+    # The plain URL still works but is revalidated
+    response = client.get("/static/css/styles.css", headers={"Accept-Encoding": "identity"})
+    assert response.headers["cache-control"] == "no-cache"
+
+    # Revalidation against the ETag
+    response = client.get(url, headers={"Accept-Encoding": "identity", "If-None-Match": response.headers["etag"]})
+    assert response.status_code == 304
+
+    # A fingerprint that matches no file
+    assert client.get("/static/css/styles.000000000000.css").status_code == 404
+
+
+def test_precompressed_variants_are_negotiated(tmp_path):
+    """Test that compressible assets are served precompressed to clients that accept it, and images are not."""
+
+    client, static_files = make_client(tmp_path)
+    url = static_files.static_url("css/styles.css")
+
+    response = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["etag"].endswith('-gzip"')
+    assert response.text == "body { color: green; }\n" * 200
+    assert len(static_files.assets["css/styles.css"].variants["gzip"]) < 200
+
+    # gzip refused with q=0
+    response = client.get(url, headers={"Accept-Encoding": "gzip;q=0, identity"})
+    assert "content-encoding" not in response.headers
+
+    if static_assets.brotli is not None:
+        response = client.get(url, headers={"Accept-Encoding": "gzip, br"})
+        assert response.headers["content-encoding"] == "br"
+
+    # Images are not compressed
+    response = client.get(static_files.static_url("logo.png"), headers={"Accept-Encoding": "gzip, br"})
+    assert "content-encoding" not in response.headers
+    assert not static_files.assets["logo.png"].variants
+
+
+def test_accepted_encodings():
+    """Test that Accept-Encoding parsing drops codings refused with q=0."""
+
+    assert static_assets.accepted_encodings("gzip, deflate, br;q=0.9") == {"gzip", "deflate", "br"}
+    assert static_assets.accepted_encodings("br;q=0, GZIP ; q=0.5") == {"gzip"}
+    assert static_assets.accepted_encodings("") == set()